@@ -51,6 +51,10 @@ class NewsClassifier:
             "other": "其他"
         }
     
+    def is_analyzable(self, post: Post) -> bool:
+        """帖子内容是否足够分析，不足的帖子 analyze_post 直接返回 None"""
+        return bool(post.content and len(post.content.strip()) >= 10)
+    
     def analyze_post(self, post: Post) -> Optional[AnalysisResult]:
         """
         分析单个帖子
@@ -61,7 +65,7 @@ class NewsClassifier:
         Returns:
             AnalysisResult: 分析结果
         """
-        if not post.content or len(post.content.strip()) < 10:
+        if not self.is_analyzable(post):
             return None
         
         if not self.api_key:
@@ -1,7 +1,7 @@
 """
 FastAPI 应用入口
 """
-from fastapi import FastAPI, Query
+from fastapi import FastAPI, Query, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from typing import Optional, List
 from datetime import datetime, timedelta
@@ -30,40 +30,76 @@ app.add_middleware(
 
 @app.on_event("startup")
 async def startup():
+    await db.connect()
     await db.init_tables()
     logger.info("API database initialized")
 
 
 @app.on_event("shutdown")
 async def shutdown():
+    await db.close()
     logger.info("API shutdown")
 
 
 @app.get("/api/dashboard/stats")
 async def get_dashboard_stats(days: int = 7):
-    """获取仪表盘统计数据"""
-    stats = await db.get_stats()
+    """获取仪表盘统计数据（含最近若干天的按天趋势）"""
+    stats = await db.get_stats(date=datetime.now().strftime("%Y-%m-%d"))
+    start_day = (datetime.now() - timedelta(days=max(days, 1) - 1)).strftime("%Y-%m-%d")
+    stats["trend"] = await db.get_rollup_series(start_day, granularity="day")
     return {"data": stats}
 
 
 @app.get("/api/stats/realtime")
 async def get_realtime_stats():
     """获取实时统计"""
-    stats = await db.get_stats()
+    stats = await db.get_stats(date=datetime.now().strftime("%Y-%m-%d"))
     return {"data": stats}
 
 
+@app.get("/api/system/health")
+async def get_system_health():
+    """获取数据库健康指标（页数、空闲页、WAL 大小、最近的检查点与备份）"""
+    health = await db.get_health()
+    return {"data": health}
+
+
 @app.get("/api/dashboard/risk-distribution")
-async def get_risk_distribution():
+async def get_risk_distribution(days: int = 7):
     """获取风险分布"""
-    return {"data": {}}
+    start_day = (datetime.now() - timedelta(days=max(days, 1) - 1)).strftime("%Y-%m-%d")
+    distribution = await db.get_risk_distribution(start_day)
+    return {"data": distribution}
+
+
+@app.get("/api/dashboard/timeseries")
+async def get_timeseries(
+    days: int = 14,
+    granularity: str = "day",
+    group_by: Optional[str] = None
+):
+    """
+    获取分类/社区/危险分桶的时间序列
+    
+    Args:
+        days: 最近天数
+        granularity: hour 或 day
+        group_by: category / submolt / danger_bucket
+    """
+    start_day = (datetime.now() - timedelta(days=max(days, 1) - 1)).strftime("%Y-%m-%d")
+    try:
+        series = await db.get_rollup_series(start_day, granularity=granularity, group_by=group_by)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"data": series}
 
 
 @app.get("/api/dashboard/network-graph")
 async def get_network_graph():
     """获取网络图数据"""
     agents = await db.get_key_persons(limit=50)
-    return {"data": {"nodes": agents, "edges": []}}
+    edges = await db.get_agent_relations([agent["id"] for agent in agents])
+    return {"data": {"nodes": agents, "edges": edges}}
 
 
 @app.get("/api/feed")
@@ -72,27 +108,101 @@ async def get_feed(
     pageSize: int = 20,
     min_score: Optional[float] = None,
     submolt: Optional[str] = None,
-    risk_level: Optional[str] = None
+    risk_level: Optional[str] = None,
+    cursor: Optional[str] = None
 ):
-    """获取帖子列表"""
-    if risk_level:
-        danger_scores = {
-            'low': (0, 3),
-            'medium': (3, 5),
-            'high': (5, 8),
-            'critical': (8, 10)
-        }
-        score_range = danger_scores.get(risk_level)
-        if score_range:
-            posts = await db.get_dangerous_posts(
-                min_score=score_range[0],
-                max_score=score_range[1],
-                limit=pageSize
+    """获取帖子列表（传入上一页的 next_cursor 进行游标分页）"""
+    try:
+        if risk_level:
+            danger_scores = {
+                'low': (0, 3),
+                'medium': (3, 5),
+                'high': (5, 8),
+                'critical': (8, 10)
+            }
+            score_range = danger_scores.get(risk_level)
+            if score_range:
+                result = await db.get_dangerous_page(
+                    min_score=score_range[0],
+                    max_score=score_range[1],
+                    limit=pageSize,
+                    cursor=cursor,
+                    columns=db.list_columns("dangerous_post_details")
+                )
+                total = await db.count_dangerous_posts(score_range[0], score_range[1])
+                return {"data": {**result, "total": total, "page": page}}
+        
+        if cursor or page <= 1:
+            result = await db.get_news_page(
+                limit=pageSize,
+                cursor=cursor,
+                columns=db.list_columns("posts")
             )
-            return {"data": {"items": posts, "total": len(posts), "page": page}}
+        else:
+            posts = await db.get_top_news(
+                limit=pageSize,
+                offset=(page - 1) * pageSize,
+                columns=db.list_columns("posts")
+            )
+            result = {"items": posts, "next_cursor": None}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    posts = await db.get_top_news(limit=pageSize)
-    return {"data": {"items": posts, "total": len(posts), "page": page}}
+    stats = await db.get_stats()
+    return {"data": {**result, "total": stats["top_news"], "page": page}}
+
+
+@app.get("/api/search/posts")
+async def search_posts(
+    query: str,
+    limit: int = 20,
+    top_news_only: bool = False
+):
+    """全文检索帖子（标题、正文、摘要、关键词）"""
+    posts = await db.search_posts(query, limit=limit, top_news_only=top_news_only)
+    return {"data": posts}
+
+
+@app.get("/api/search/dangerous")
+async def search_dangerous_posts(
+    query: str,
+    limit: int = 20,
+    min_score: int = 8
+):
+    """全文检索危险言论"""
+    posts = await db.search_posts(query, limit=limit, min_danger_score=min_score)
+    return {"data": posts}
+
+
+@app.get("/api/keywords/top")
+async def get_top_keywords(days: int = 1, limit: int = 20):
+    """获取最近若干天的热门关键词"""
+    start_day = (datetime.now() - timedelta(days=max(days, 1) - 1)).strftime("%Y-%m-%d")
+    keywords = await db.get_keyword_frequency(start_day=start_day, limit=limit)
+    return {"data": keywords}
+
+
+@app.get("/api/keywords/{keyword}/trend")
+async def get_keyword_trend(keyword: str, days: int = 30):
+    """获取关键词的按天趋势"""
+    start_day = (datetime.now() - timedelta(days=max(days, 1) - 1)).strftime("%Y-%m-%d")
+    trend = await db.get_keyword_trend(keyword, start_day=start_day)
+    return {"data": trend}
+
+
+@app.get("/api/keywords/{keyword}/related")
+async def get_related_keywords(keyword: str, days: int = 7, limit: int = 20):
+    """获取共现关键词"""
+    start_day = (datetime.now() - timedelta(days=max(days, 1) - 1)).strftime("%Y-%m-%d")
+    related = await db.get_keyword_cooccurrence(keyword, start_day=start_day, limit=limit)
+    return {"data": related}
+
+
+@app.get("/api/keywords/{keyword}/posts")
+async def get_keyword_posts(keyword: str, limit: int = 20, date: Optional[str] = None):
+    """获取包含关键词的帖子"""
+    posts = await db.get_keyword_posts(keyword, limit=limit, day=date)
+    return {"data": posts}
 
 
 @app.get("/api/posts/{post_id}")
@@ -111,7 +221,8 @@ async def get_post_comments(post_id: str):
 async def get_network(limit: int = 100, community_id: Optional[int] = None):
     """获取网络数据"""
     agents = await db.get_key_persons(limit=limit)
-    return {"data": {"nodes": agents, "edges": []}}
+    edges = await db.get_agent_relations([agent["id"] for agent in agents])
+    return {"data": {"nodes": agents, "edges": edges}}
 
 
 @app.get("/api/network/communities")
@@ -123,7 +234,8 @@ async def get_communities():
 @app.get("/api/network/agent/{agent_id}/connections")
 async def get_agent_connections(agent_id: str, limit: int = 20):
     """获取成员连接"""
-    return {"data": []}
+    connections = await db.get_agent_connections(agent_id, limit=limit)
+    return {"data": connections}
 
 
 @app.get("/api/agents")
@@ -131,11 +243,21 @@ async def get_agents(
     page: int = 1,
     page_size: int = 20,
     risk_level: Optional[str] = None,
-    community_id: Optional[int] = None
+    community_id: Optional[int] = None,
+    cursor: Optional[str] = None
 ):
-    """获取成员列表"""
-    agents = await db.get_all_agents(limit=page_size, offset=(page - 1) * page_size)
-    return {"data": {"items": agents, "total": len(agents), "page": page}}
+    """获取成员列表（传入上一页的 next_cursor 进行游标分页）"""
+    if cursor or page <= 1:
+        try:
+            result = await db.get_agents_page(limit=page_size, cursor=cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    else:
+        agents = await db.get_all_agents(limit=page_size, offset=(page - 1) * page_size)
+        result = {"items": agents, "next_cursor": None}
+    
+    stats = await db.get_stats()
+    return {"data": {**result, "total": stats["total_agents"], "page": page}}
 
 
 @app.get("/api/agent/{agent_id}")
@@ -160,8 +282,9 @@ async def get_agents_stats():
 
 @app.get("/api/agents/search")
 async def search_agents(query: str, limit: int = 10):
-    """搜索成员"""
-    return {"data": []}
+    """搜索成员（全文检索名称和简介）"""
+    agents = await db.search_agents(query, limit=limit)
+    return {"data": agents}
 
 
 @app.get("/api/agent/{agent_id}/analyze")
@@ -230,12 +353,14 @@ async def get_push_record(push_id: str):
     news_items = await db.get_top_news(
         limit=news_count,
         start_time=start_time_str,
-        end_time=end_time_str
+        end_time=end_time_str,
+        columns=db.list_columns("posts")
     )
     dangerous_posts = await db.get_dangerous_posts(
         limit=10,
         start_time=start_time_str,
-        end_time=end_time_str
+        end_time=end_time_str,
+        columns=db.list_columns("dangerous_post_details")
     )
     
     return {
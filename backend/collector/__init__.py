@@ -3,6 +3,12 @@
 从 Moltbook API 获取帖子数据
 """
 from .moltbook_client import MoltbookClient
+from .crawler import IncrementalCrawler, CrawlResult
+from .enrichment import AgentRefresher, CommentHarvester
+from .governor import RateGovernor
+from .http_cache import ResponseCache
+from .polling import AdaptivePoller
+from .shards import CollectionShard, parse_shards
 from .models import Post, Agent
 
-__all__ = ["MoltbookClient", "Post", "Agent"]
+__all__ = ["MoltbookClient", "IncrementalCrawler", "CrawlResult", "CommentHarvester", "AgentRefresher", "AdaptivePoller", "CollectionShard", "parse_shards", "RateGovernor", "ResponseCache", "Post", "Agent"]
@@ -0,0 +1,219 @@
+"""
+增量采集
+按 sort/submolt 记录高水位与续爬游标，每轮向旧翻页直到遇到已知帖子
+"""
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .governor import PRIORITY_FETCH
+from .models import Post
+from .moltbook_client import MoltbookClient
+
+logger = logging.getLogger(__name__)
+
+# 每个分片记住的已扫描帖子 ID 数量上限
+SHARD_SEEN_LIMIT = 10000
+
+
+@dataclass
+class CrawlResult:
+    """一轮采集的结果"""
+    posts: List[Post] = field(default_factory=list)
+    state: Dict[str, Any] = field(default_factory=dict)
+    sort: str = "new"
+    submolt: str = ""
+    scanned_ids: List[str] = field(default_factory=list)
+    cache_keys: List[str] = field(default_factory=list)
+    pages: int = 0
+    scanned: int = 0
+    complete: bool = True
+    failed: bool = False
+
+
+class IncrementalCrawler:
+    """
+    游标驱动的增量采集
+    
+    sort=new 时 feed 按时间倒序，到达本分片的高水位即说明与上一轮衔接；
+    其他排序不保证时间顺序，整页都是本分片扫描过的帖子时才停止。停止条件
+    只看分片自己的进度：其他分片已入库的帖子由 is_seen 过滤掉，但不会让
+    本分片提前停止，否则两者之间的帖子会被跳过。
+    
+    sort=new 每轮最多翻 max_pages 页，没有衔接上时保存游标，下一轮从断点
+    继续补洞，高水位在补完后才推进；其他排序的名次随时变化，每轮都从头开始。
+    
+    页面与上次提交的响应缓存相同时不再解析，视为已衔接：缓存只在本页帖子
+    持久化、进度保存之后才提交，相同的页面不会再带来新帖子。
+    
+    crawl() 只返回结果而不落库；调用方把帖子写入采集日志后再保存
+    result.state 并调用 commit(result)，保证进度和响应缓存都不会领先于
+    已持久化的数据。
+    """
+    
+    def __init__(
+        self,
+        client: MoltbookClient,
+        is_seen: Callable[[str], bool],
+        page_size: int = 100,
+        max_pages: int = 5
+    ):
+        self.client = client
+        self.is_seen = is_seen
+        self.page_size = page_size
+        self.max_pages = max(1, max_pages)
+        self._shard_seen: Dict[Tuple[str, str], "OrderedDict[str, None]"] = {}
+    
+    @staticmethod
+    def _at_high_water(post: Post, state: Optional[Dict[str, Any]]) -> bool:
+        """按时间倒序的 feed 中，帖子是否已到达本分片上一轮的高水位"""
+        if not state:
+            return False
+        if post.id and post.id == state.get("newest_id"):
+            return True
+        newest_created_at = state.get("newest_created_at")
+        return bool(newest_created_at and post.created_at and post.created_at <= newest_created_at)
+    
+    async def commit(self, result: CrawlResult):
+        """
+        调用方持久化本轮结果后，记下分片扫描过的帖子并提交响应缓存
+        
+        Args:
+            result: crawl() 的返回值
+        """
+        seen = self._shard_seen.setdefault((result.sort, result.submolt), OrderedDict())
+        for post_id in result.scanned_ids:
+            seen[post_id] = None
+            seen.move_to_end(post_id)
+        while len(seen) > SHARD_SEEN_LIMIT:
+            seen.popitem(last=False)
+        if result.cache_keys:
+            await self.client.commit_cache(result.cache_keys)
+    
+    async def crawl(
+        self,
+        sort: str = "new",
+        submolt: str = "",
+        state: Optional[Dict[str, Any]] = None,
+        priority: int = PRIORITY_FETCH,
+        max_pages: Optional[int] = None
+    ) -> CrawlResult:
+        """
+        执行一轮增量采集
+        
+        Args:
+            sort: 排序方式
+            submolt: 社区分区，空字符串表示全站
+            state: 已保存的采集进度，None 表示首次采集
+            priority: 限速排队优先级
+            max_pages: 本轮翻页上限，None 使用构造时的设置
+        
+        Returns:
+            CrawlResult: 新帖子、待保存的进度与翻页情况
+        """
+        state = dict(state) if state else None
+        chronological = sort == "new"
+        resuming = bool(chronological and state and state.get("cursor"))
+        cursor = state.get("cursor") if resuming else None
+        shard_seen = self._shard_seen.get((sort, submolt or ""), {})
+        
+        head: Optional[Post] = None
+        posts: List[Post] = []
+        batch_ids = set()
+        cache_keys: List[str] = []
+        reached = False
+        pages = 0
+        scanned = 0
+        page_limit = max(1, max_pages) if max_pages else self.max_pages
+        
+        while pages < page_limit:
+            page = await self.client.get_posts_page(
+                sort=sort,
+                limit=self.page_size,
+                after=cursor,
+                submolt=submolt or None,
+                priority=priority
+            )
+            if page is None:
+                break
+            
+            pages += 1
+            if page.unchanged:
+                reached = True
+                break
+            if page.cache_key:
+                cache_keys.append(page.cache_key)
+            batch, next_cursor = page.posts, page.next_cursor
+            scanned += len(batch)
+            if head is None and batch and not resuming:
+                head = batch[0]
+            
+            unscanned = 0
+            for post in batch:
+                if not post.id or post.id in batch_ids:
+                    continue
+                if chronological and self._at_high_water(post, state):
+                    reached = True
+                    break
+                batch_ids.add(post.id)
+                if post.id not in shard_seen:
+                    unscanned += 1
+                # 其他分片已采集的帖子只过滤，不作为停止条件
+                if self.is_seen(post.id):
+                    continue
+                posts.append(post)
+            
+            if not chronological and batch and unscanned == 0:
+                reached = True
+            if reached or not batch or not next_cursor:
+                reached = True
+                break
+            cursor = next_cursor
+        
+        result = CrawlResult(
+            posts=posts,
+            sort=sort,
+            submolt=submolt or "",
+            scanned_ids=list(batch_ids),
+            cache_keys=cache_keys,
+            pages=pages,
+            scanned=scanned,
+            complete=reached
+        )
+        if pages == 0:
+            result.failed = True
+            return result
+        
+        new_state: Dict[str, Any] = {
+            "sort": sort,
+            "submolt": submolt or "",
+            "newest_id": state.get("newest_id") if state else None,
+            "newest_created_at": state.get("newest_created_at") if state else None,
+            "pending_id": state.get("pending_id") if state else None,
+            "pending_created_at": state.get("pending_created_at") if state else None,
+            "cursor": None,
+            "pages": pages,
+            "fetched": len(posts)
+        }
+        
+        if head is not None and not resuming:
+            new_state["pending_id"] = head.id
+            new_state["pending_created_at"] = head.created_at
+        
+        if reached or state is None or not chronological:
+            # 与上一轮衔接（首次采集不回溯历史，非时间排序不续爬），高水位推进到本轮起点
+            if new_state["pending_id"]:
+                new_state["newest_id"] = new_state["pending_id"]
+                new_state["newest_created_at"] = new_state["pending_created_at"]
+            new_state["pending_id"] = None
+            new_state["pending_created_at"] = None
+        else:
+            new_state["cursor"] = cursor
+            logger.info(
+                f"Crawl {sort}/{submolt or '*'} hit page limit ({pages}), "
+                f"resuming from cursor next cycle"
+            )
+        
+        result.state = new_state
+        return result
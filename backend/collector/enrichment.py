@@ -0,0 +1,250 @@
+"""
+数据补全
+为已入库的帖子抓取评论，转换为成员之间的互动关系；定期刷新成员资料
+"""
+import asyncio
+import hashlib
+import json
+import logging
+from dataclasses import asdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .models import Interaction, Post
+from .moltbook_client import MoltbookClient
+
+logger = logging.getLogger(__name__)
+
+
+def _age_seconds(created_at: Optional[str]) -> Optional[float]:
+    """距发帖时间的秒数，无法解析时返回 None"""
+    if not created_at:
+        return None
+    try:
+        created = datetime.fromisoformat(str(created_at).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    now = datetime.now(timezone.utc) if created.tzinfo else datetime.now()
+    return (now - created).total_seconds()
+
+
+def _flatten_comments(comments: List[Any], parent_id: Optional[str] = None) -> Iterator[Tuple[dict, Optional[str]]]:
+    """展开嵌套的评论树，返回 (评论, 被回复的评论 ID)"""
+    for comment in comments:
+        if not isinstance(comment, dict):
+            continue
+        yield comment, comment.get("parent_id") or parent_id
+        children = comment.get("replies") or comment.get("children") or []
+        if isinstance(children, list):
+            yield from _flatten_comments(children, comment.get("id"))
+
+
+class CommentHarvester:
+    """
+    评论采集
+    
+    每轮从 comment_harvest 队列取出到期的帖子（评论多的优先），以不超过
+    concurrency 的并发抓取评论。回复评论记为对评论作者的互动，直接评论
+    记为对帖子作者的互动；已入库的评论跳过，新互动整批写入。抓取失败的
+    帖子不更新回访次数与到期时间，下一轮重试。
+    
+    发帖 revisit_hours 小时内的帖子会回访，间隔从 revisit_interval 起
+    每次翻倍，以便收到后来的评论。
+    """
+    
+    def __init__(
+        self,
+        client: MoltbookClient,
+        database: Any,
+        concurrency: int = 4,
+        batch_size: int = 50,
+        revisit_interval: int = 3600,
+        revisit_hours: int = 24
+    ):
+        self.client = client
+        self.db = database
+        self.concurrency = max(1, concurrency)
+        self.batch_size = max(1, batch_size)
+        self.revisit_interval = max(0, revisit_interval)
+        self.revisit_hours = max(0, revisit_hours)
+    
+    def _next_due(self, created_at: Optional[str], visits: int) -> Optional[str]:
+        """下次回访时间，超出回访期限时返回 None"""
+        if self.revisit_interval <= 0:
+            return None
+        delay = self.revisit_interval * (2 ** visits)
+        age = _age_seconds(created_at)
+        if age is None or age + delay > self.revisit_hours * 3600:
+            return None
+        return (datetime.now() + timedelta(seconds=delay)).strftime("%Y-%m-%dT%H:%M:%S")
+    
+    async def _fetch(self, semaphore: asyncio.Semaphore, post_id: str) -> Optional[List[Any]]:
+        async with semaphore:
+            return await self.client.get_interactions(post_id)
+    
+    async def harvest(self) -> Dict[str, Any]:
+        """
+        执行一轮评论采集
+        
+        Returns:
+            Dict: 采集成功的帖子数、抓取失败的帖子数、抓到的评论数、新增互动数
+        """
+        due = await self.db.get_due_comment_harvests(limit=self.batch_size)
+        if not due:
+            return {"posts": 0, "failed": 0, "comments": 0, "interactions": 0}
+        
+        # 任务按评论数降序创建，信号量按等待顺序放行
+        semaphore = asyncio.Semaphore(self.concurrency)
+        responses = await asyncio.gather(
+            *(self._fetch(semaphore, row["post_id"]) for row in due),
+            return_exceptions=True
+        )
+        
+        parsed: List[Tuple[Any, List[Tuple[Post, Optional[str]]]]] = []
+        failed = 0
+        for row, response in zip(due, responses):
+            if isinstance(response, BaseException) or response is None:
+                # 失败不等于没有评论，保留回访状态等下一轮重试
+                if isinstance(response, BaseException):
+                    logger.error(f"Error fetching comments for {row['post_id']}: {response}")
+                failed += 1
+                continue
+            replies = []
+            for comment, parent_id in _flatten_comments(response):
+                reply = Post.from_api(comment)
+                if not reply.author_id:
+                    reply.author_id = comment.get("author_id", "") or ""
+                if reply.id and reply.author_id:
+                    replies.append((reply, parent_id))
+            parsed.append((row, replies))
+        
+        existing = await self.db.get_existing_interaction_ids(
+            [f"int-{reply.id}" for _, replies in parsed for reply, _ in replies]
+        )
+        
+        interactions = []
+        agents: Dict[str, Tuple[str, str]] = {}
+        harvests = []
+        comment_total = 0
+        
+        for row, replies in parsed:
+            authors = {reply.id: reply.author_id for reply, _ in replies}
+            added = 0
+            for reply, parent_id in replies:
+                interaction = Interaction.from_reply(
+                    reply,
+                    to_agent_id=authors.get(parent_id) or row["author_id"] or "",
+                    root_post_id=row["post_id"]
+                )
+                if interaction.id in existing:
+                    continue
+                interactions.append(asdict(interaction))
+                agents.setdefault(reply.author_id, (reply.author_id, reply.author_name or "匿名"))
+                added += 1
+            
+            comment_total += len(replies)
+            harvests.append({
+                "post_id": row["post_id"],
+                "comment_count": len(replies),
+                "harvested": added,
+                "due_at": self._next_due(row["created_at"], row["visits"] or 0)
+            })
+        
+        if harvests:
+            await self.db.ingest_interactions(interactions, list(agents.values()), harvests)
+        
+        return {
+            "posts": len(harvests),
+            "failed": failed,
+            "comments": comment_total,
+            "interactions": len(interactions)
+        }
+
+
+class AgentRefresher:
+    """
+    成员资料刷新
+    
+    刷新时间记录在 agents.refresh_due，相当于持久化的 TTL 缓存：到期前
+    不会再次请求。每轮取出到期的成员（新成员优先，其次按发帖数），以
+    不超过 concurrency 的并发调用 get_agent。资料与上次相同时 TTL 翻倍
+    （不超过 max_ttl），有变化时回到 ttl 并触发影响力重算。
+    """
+    
+    PROFILE_FIELDS = (
+        "name", "description", "karma", "follower_count", "following_count",
+        "is_claimed", "is_active", "created_at", "last_active"
+    )
+    
+    def __init__(
+        self,
+        client: MoltbookClient,
+        database: Any,
+        concurrency: int = 4,
+        batch_size: int = 50,
+        ttl: int = 21600,
+        max_ttl: int = 604800
+    ):
+        self.client = client
+        self.db = database
+        self.concurrency = max(1, concurrency)
+        self.batch_size = max(1, batch_size)
+        self.ttl = max(60, ttl)
+        self.max_ttl = max(self.ttl, max_ttl)
+    
+    def _profile_hash(self, profile: Dict[str, Any]) -> str:
+        payload = json.dumps([profile.get(name) for name in self.PROFILE_FIELDS], ensure_ascii=False, default=str)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+    
+    @staticmethod
+    def _due(ttl: int) -> str:
+        return (datetime.now() + timedelta(seconds=ttl)).strftime("%Y-%m-%dT%H:%M:%S")
+    
+    async def _fetch(self, semaphore: asyncio.Semaphore, agent_id: str):
+        async with semaphore:
+            return await self.client.get_agent(agent_id)
+    
+    async def refresh(self) -> Dict[str, int]:
+        """
+        执行一轮资料刷新
+        
+        Returns:
+            Dict: 请求的成员数、拉到资料的成员数、资料有变化的成员数
+        """
+        due = await self.db.get_agents_to_refresh(limit=self.batch_size)
+        if not due:
+            return {"agents": 0, "fetched": 0, "changed": 0}
+        
+        semaphore = asyncio.Semaphore(self.concurrency)
+        responses = await asyncio.gather(
+            *(self._fetch(semaphore, row["id"]) for row in due),
+            return_exceptions=True
+        )
+        
+        profiles = []
+        fetched = 0
+        for row, agent in zip(due, responses):
+            previous_ttl = row["refresh_ttl"] or self.ttl
+            if isinstance(agent, BaseException) or agent is None:
+                if isinstance(agent, BaseException):
+                    logger.error(f"Error refreshing agent {row['id']}: {agent}")
+                # 拉取失败或成员不存在时按当前 TTL 推后，不立即重试
+                profiles.append({"id": row["id"], "refresh_ttl": previous_ttl, "refresh_due": self._due(previous_ttl)})
+                continue
+            
+            fetched += 1
+            profile = asdict(agent)
+            profile_hash = self._profile_hash(profile)
+            changed = profile_hash != row["profile_hash"]
+            ttl = self.ttl if changed else min(previous_ttl * 2, self.max_ttl)
+            profiles.append({
+                "id": row["id"],
+                "agent": profile,
+                "profile_hash": profile_hash,
+                "changed": changed,
+                "refresh_ttl": ttl,
+                "refresh_due": self._due(ttl)
+            })
+        
+        changed = await self.db.update_agent_profiles(profiles)
+        return {"agents": len(due), "fetched": fetched, "changed": changed}
@@ -0,0 +1,209 @@
+"""
+请求限速
+令牌桶 + 优先级队列，按服务端的 Retry-After 与限流头暂停，失败时抖动指数退避
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 数值越小越先放行
+PRIORITY_FETCH = 0
+PRIORITY_ENRICH = 10
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    解析 Retry-After 头
+    
+    Args:
+        value: 秒数或 HTTP 日期
+    
+    Returns:
+        float: 需要等待的秒数，无法解析时返回 None
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+class RateGovernor:
+    """
+    Moltbook API 请求限速器
+    
+    同一客户端的所有请求共享一个令牌桶：每秒补充 rate 个令牌，最多积攒
+    burst 个。令牌不足时按 (priority, 到达顺序) 排队，新帖采集排在评论
+    与成员资料补全之前。收到 429/Retry-After 或剩余额度为 0 时整体暂停到
+    指定时间；没有给出等待时间的失败按 base * 2^n 退避并加随机抖动。
+    """
+    
+    def __init__(
+        self,
+        rate: float = 1.0,
+        burst: int = 5,
+        backoff_base: float = 1.0,
+        backoff_max: float = 300.0
+    ):
+        self.rate = max(rate, 0.001)
+        self.burst = max(1, burst)
+        self.backoff_base = max(backoff_base, 0.01)
+        self.backoff_max = max(backoff_max, self.backoff_base)
+        
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._failures = 0
+        self._waiters: List[List[int]] = []
+        self._seq = itertools.count()
+        self._cond: Optional[asyncio.Condition] = None
+        
+        self.counters = {
+            "granted": 0,
+            "throttled": 0,
+            "retries": 0,
+            "wait_ms": 0.0,
+            "backoff_ms": 0.0
+        }
+        self.granted_by_priority: Dict[int, int] = {}
+    
+    def _condition(self) -> asyncio.Condition:
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        return self._cond
+    
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+    
+    def _delay(self, now: float) -> float:
+        """队首请求还需等待的秒数"""
+        self._refill(now)
+        if now < self._blocked_until:
+            return self._blocked_until - now
+        if self._tokens >= 1:
+            return 0.0
+        return (1 - self._tokens) / self.rate
+    
+    async def acquire(self, priority: int = PRIORITY_FETCH):
+        """
+        获取一个请求令牌，按优先级排队等待
+        
+        Args:
+            priority: 优先级，数值越小越先放行
+        """
+        cond = self._condition()
+        entry = [priority, next(self._seq)]
+        started = time.monotonic()
+        
+        async with cond:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    timeout = None
+                    if self._waiters[0] is entry:
+                        timeout = self._delay(time.monotonic())
+                        if timeout <= 0:
+                            heapq.heappop(self._waiters)
+                            self._tokens -= 1
+                            self.counters["granted"] += 1
+                            self.granted_by_priority[priority] = self.granted_by_priority.get(priority, 0) + 1
+                            self.counters["wait_ms"] += (time.monotonic() - started) * 1000
+                            cond.notify_all()
+                            return
+                    try:
+                        await asyncio.wait_for(cond.wait(), timeout=timeout)
+                    except asyncio.TimeoutError:
+                        pass
+            except BaseException:
+                if entry in self._waiters:
+                    self._waiters.remove(entry)
+                    heapq.heapify(self._waiters)
+                    cond.notify_all()
+                raise
+    
+    def _block(self, seconds: float):
+        until = time.monotonic() + seconds
+        if until > self._blocked_until:
+            self._blocked_until = until
+    
+    def backoff_delay(self, attempt: Optional[int] = None) -> float:
+        """第 attempt 次失败的退避时间（秒），在 [1/2, 1] 倍之间随机抖动"""
+        attempt = self._failures if attempt is None else attempt
+        delay = min(self.backoff_max, self.backoff_base * (2 ** max(attempt - 1, 0)))
+        return delay * random.uniform(0.5, 1.0)
+    
+    def on_success(self, remaining: Optional[float] = None, reset_in: Optional[float] = None):
+        """
+        记录成功响应
+        
+        Args:
+            remaining: 服务端报告的剩余请求数
+            reset_in: 距额度重置的秒数
+        """
+        self._failures = 0
+        if remaining is None:
+            return
+        self._refill(time.monotonic())
+        self._tokens = min(self._tokens, max(remaining, 0))
+        if remaining <= 0 and reset_in:
+            self._block(reset_in)
+    
+    def on_throttled(self, retry_after: Optional[float] = None) -> float:
+        """
+        记录 429，全局暂停 Retry-After 秒，没有时按退避时间暂停
+        
+        Returns:
+            float: 暂停的秒数
+        """
+        self._failures += 1
+        self.counters["throttled"] += 1
+        delay = retry_after if retry_after is not None else self.backoff_delay()
+        delay = min(delay, self.backoff_max)
+        self._block(delay)
+        self.counters["backoff_ms"] += delay * 1000
+        logger.warning(f"Rate limited by Moltbook API, pausing requests for {delay:.1f}s")
+        return delay
+    
+    def on_error(self) -> float:
+        """
+        记录可重试的失败（超时、连接错误、5xx），只退避当前请求
+        
+        Returns:
+            float: 重试前应等待的秒数
+        """
+        self._failures += 1
+        delay = self.backoff_delay()
+        self.counters["backoff_ms"] += delay * 1000
+        return delay
+    
+    def state(self) -> Dict[str, Any]:
+        """当前限速状态"""
+        now = time.monotonic()
+        self._refill(now)
+        queued: Dict[int, int] = {}
+        for priority, _ in self._waiters:
+            queued[priority] = queued.get(priority, 0) + 1
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "tokens": round(self._tokens, 2),
+            "blocked_for": round(max(0.0, self._blocked_until - now), 1),
+            "consecutive_failures": self._failures,
+            "queued": queued,
+            "granted_by_priority": dict(self.granted_by_priority),
+            **{k: round(v, 1) if isinstance(v, float) else v for k, v in self.counters.items()}
+        }
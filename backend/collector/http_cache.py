@@ -0,0 +1,185 @@
+"""
+响应缓存
+按 URL 缓存 GET 响应的校验头 (ETag/Last-Modified)、内容摘要与解析结果
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheEntry:
+    """一条缓存的响应"""
+    etag: Optional[str]
+    last_modified: Optional[str]
+    digest: str
+    data: Any
+
+
+class ResponseCache:
+    """
+    两级响应缓存
+    
+    内存中按 LRU 保留 max_entries 条，同时写入 directory 下的 JSON 文件，
+    进程重启后仍可发送条件请求。命中分两种：服务端返回 304 (not_modified)，
+    或服务端不支持条件请求但响应体摘要与上次相同 (unchanged)，两者都不必
+    重新解析响应。磁盘读写在线程中执行，不阻塞事件循环。
+    
+    stage() 暂存的条目不参与命中判断，调用方处理完数据后 commit() 才生效：
+    处理失败时下次请求仍会拿到完整响应。
+    """
+    
+    def __init__(self, directory: Optional[str] = None, max_entries: int = 1024):
+        self.directory = Path(directory) if directory else None
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._staged: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._disk_lock = threading.Lock()
+        self._puts = 0
+        self.counters = {
+            "lookups": 0,
+            "not_modified": 0,
+            "unchanged": 0,
+            "misses": 0,
+            "bytes_received": 0
+        }
+    
+    @staticmethod
+    def digest(content: bytes) -> str:
+        """响应体摘要"""
+        return hashlib.sha1(content).hexdigest()
+    
+    def _path(self, key: str) -> Optional[Path]:
+        if not self.directory:
+            return None
+        return self.directory / f"{hashlib.sha1(key.encode('utf-8')).hexdigest()}.json"
+    
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        """
+        查找已提交的缓存，内存未命中时读取磁盘
+        
+        Args:
+            key: 缓存键（完整 URL）
+        
+        Returns:
+            CacheEntry: 缓存的响应，没有时返回 None
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            return entry
+        
+        path = self._path(key)
+        if path is None:
+            return None
+        entry = await asyncio.to_thread(self._load, path, key)
+        if entry is not None:
+            self._remember(key, entry)
+        return entry
+    
+    def _load(self, path: Path, key: str) -> Optional[CacheEntry]:
+        if not path.exists():
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+            if stored.pop("key", None) != key:
+                return None
+            return CacheEntry(**stored)
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f"Discarding unreadable cache entry {path.name}: {e}")
+            return None
+    
+    async def put(self, key: str, entry: CacheEntry):
+        """写入缓存并立即生效"""
+        self._staged.pop(key, None)
+        self._remember(key, entry)
+        
+        path = self._path(key)
+        if path is not None:
+            await asyncio.to_thread(self._store, path, key, entry)
+    
+    def stage(self, key: str, entry: CacheEntry):
+        """暂存一条响应，commit() 之前不参与命中判断"""
+        self._staged[key] = entry
+        self._staged.move_to_end(key)
+        while len(self._staged) > self.max_entries:
+            self._staged.popitem(last=False)
+    
+    async def commit(self, keys: Iterable[str]):
+        """
+        提交暂存的响应，调用方在持久化对应数据之后调用
+        
+        Args:
+            keys: 缓存键
+        """
+        for key in keys:
+            entry = self._staged.pop(key, None)
+            if entry is not None:
+                await self.put(key, entry)
+    
+    def _store(self, path: Path, key: str, entry: CacheEntry):
+        with self._disk_lock:
+            tmp_path = path.with_suffix(".tmp")
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump({"key": key, **asdict(entry)}, f, ensure_ascii=False)
+                os.replace(tmp_path, path)
+            except (OSError, TypeError, ValueError) as e:
+                logger.warning(f"Error writing cache entry: {e}")
+                return
+            
+            self._puts += 1
+            if self._puts % 100 == 0:
+                self._prune_disk()
+    
+    def _remember(self, key: str, entry: CacheEntry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def _prune_disk(self):
+        """磁盘条目超过上限时删除最久未写入的文件"""
+        try:
+            files = sorted(self.directory.glob("*.json"), key=lambda p: p.stat().st_mtime)
+        except OSError:
+            return
+        for path in files[:max(0, len(files) - self.max_entries)]:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+    
+    def record(self, outcome: str, received: int = 0):
+        """
+        记录一次查找结果
+        
+        Args:
+            outcome: not_modified / unchanged / misses
+            received: 本次下载的字节数
+        """
+        self.counters["lookups"] += 1
+        self.counters[outcome] += 1
+        self.counters["bytes_received"] += received
+    
+    def stats(self) -> Dict[str, Any]:
+        """命中率统计"""
+        lookups = self.counters["lookups"]
+        hits = self.counters["not_modified"] + self.counters["unchanged"]
+        return {
+            **self.counters,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0,
+            "entries": len(self._entries),
+            "staged": len(self._staged)
+        }
@@ -31,12 +31,12 @@ class Agent:
             name=data.get("name", "匿名"),
             description=data.get("description", ""),
             karma=data.get("karma", 0),
-            follower_count=data.get("followerCount", 0),
-            following_count=data.get("followingCount", 0),
-            is_claimed=data.get("isClaimed", False),
-            is_active=data.get("isActive", True),
-            created_at=data.get("createdAt"),
-            last_active=data.get("lastActive")
+            follower_count=data.get("followerCount", data.get("follower_count", 0)),
+            following_count=data.get("followingCount", data.get("following_count", 0)),
+            is_claimed=data.get("isClaimed", data.get("is_claimed", False)),
+            is_active=data.get("isActive", data.get("is_active", True)),
+            created_at=data.get("createdAt", data.get("created_at")),
+            last_active=data.get("lastActive", data.get("last_active"))
         )
 
 
@@ -104,13 +104,25 @@ class Interaction:
     created_at: Optional[str] = None
     
     @classmethod
-    def from_reply(cls, post: Post) -> "Interaction":
-        """从回复帖子创建互动记录"""
+    def from_reply(
+        cls,
+        post: Post,
+        to_agent_id: str = "",
+        root_post_id: Optional[str] = None
+    ) -> "Interaction":
+        """
+        从回复帖子创建互动记录
+        
+        Args:
+            post: 回复（评论）
+            to_agent_id: 被回复的成员
+            root_post_id: 所属帖子，默认取回复的 parent_id
+        """
         return cls(
             id=f"int-{post.id}",
             from_agent_id=post.author_id,
-            to_agent_id="",
-            post_id=post.parent_id or "",
+            to_agent_id=to_agent_id,
+            post_id=root_post_id or post.parent_id or "",
             interaction_type="reply",
             created_at=post.created_at
         )
@@ -2,73 +2,364 @@
 Moltbook API 客户端
 负责从 Moltbook 获取数据
 """
-import urllib.request
-import urllib.error
+import asyncio
 import json
 import logging
-import ssl
-from typing import List, Optional, Dict, Any
+import time
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Dict, Any, Tuple
+
+import httpx
+
+from .governor import PRIORITY_ENRICH, PRIORITY_FETCH, RateGovernor, parse_retry_after
+from .http_cache import CacheEntry, ResponseCache
 from .models import Post, Agent
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class PostsPage:
+    """
+    一页帖子
+    
+    unchanged 为 True 时本页与上次提交的缓存相同，posts 为空且不解析；
+    cache_key 非空时响应已暂存在缓存中，调用方持久化后经 commit_cache 提交。
+    """
+    posts: List[Post]
+    next_cursor: Optional[str] = None
+    unchanged: bool = False
+    cache_key: Optional[str] = None
+
+
 class MoltbookClient:
-    """Moltbook API 客户端"""
+    """
+    Moltbook API 客户端
+    
+    基于 httpx.AsyncClient 的长连接池：连接复用 (keep-alive)、gzip 解压，
+    并发请求数受 max_connections 限制。所有请求经 RateGovernor 限速排队，
+    429、超时与 5xx 按退避策略重试。GET 响应经 ResponseCache 做条件请求，
+    帖子页内容未变时跳过解析。使用完毕后调用 close()。
+    """
     
-    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        max_connections: Optional[int] = None,
+        timeout: Optional[float] = None,
+        governor: Optional[RateGovernor] = None,
+        cache: Optional[ResponseCache] = None
+    ):
         from core.config import settings
         self.api_key = api_key or settings.MOLTBOOK_API_KEY
         self.base_url = base_url or settings.MOLTBOOK_BASE_URL
+        self.max_connections = max(1, max_connections or settings.MOLTBOOK_MAX_CONNECTIONS)
+        self.timeout = timeout or settings.MOLTBOOK_TIMEOUT
+        self.max_retries = max(0, settings.MOLTBOOK_MAX_RETRIES)
+        self.governor = governor or RateGovernor(
+            rate=settings.MOLTBOOK_RATE_LIMIT,
+            burst=settings.MOLTBOOK_RATE_BURST,
+            backoff_base=settings.MOLTBOOK_BACKOFF_BASE,
+            backoff_max=settings.MOLTBOOK_BACKOFF_MAX
+        )
         
-        self.ssl_context = ssl.create_default_context()
-        self.ssl_context.check_hostname = False
-        self.ssl_context.verify_mode = ssl.CERT_NONE
+        self.cache = cache
+        if cache is None and settings.HTTP_CACHE_ENABLED:
+            self.cache = ResponseCache(settings.HTTP_CACHE_DIR, max_entries=settings.HTTP_CACHE_MAX_ENTRIES)
+        
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.request_stats = {"requests": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0}
+        self.rate_limit: Dict[str, Optional[float]] = {"limit": None, "remaining": None, "reset_at": None}
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """按需创建连接池"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                headers={
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Content-Type": "application/json",
+                    "Accept-Encoding": "gzip"
+                },
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                ),
+                timeout=self.timeout,
+                verify=False
+            )
+            self._semaphore = asyncio.Semaphore(self.max_connections)
+        return self._client
+    
+    async def close(self):
+        """关闭连接池"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    async def __aenter__(self) -> "MoltbookClient":
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        await self.close()
     
-    def _request(self, url: str, method: str = "GET", data: Optional[dict] = None, timeout: int = 60) -> Optional[Any]:
+    def get_request_stats(self) -> Dict[str, Any]:
+        """请求耗时统计"""
+        stats = dict(self.request_stats)
+        stats["avg_ms"] = round(stats["total_ms"] / stats["requests"], 2) if stats["requests"] else 0
+        stats["total_ms"] = round(stats["total_ms"], 2)
+        stats["governor"] = self.governor.state()
+        if self.cache is not None:
+            stats["cache"] = self.cache.stats()
+        return stats
+    
+    def _update_rate_limit(self, headers: httpx.Headers):
+        """记录响应头中的限流额度 (X-RateLimit-Limit/Remaining/Reset)"""
+        def header_number(name: str) -> Optional[float]:
+            value = headers.get(name)
+            try:
+                return float(value) if value is not None else None
+            except ValueError:
+                return None
+        
+        limit = header_number("X-RateLimit-Limit")
+        remaining = header_number("X-RateLimit-Remaining")
+        reset = header_number("X-RateLimit-Reset")
+        
+        if remaining is None:
+            return
+        
+        now = time.time()
+        self.rate_limit["limit"] = limit
+        self.rate_limit["remaining"] = remaining
+        if reset is not None:
+            # 大于一年的值视为 epoch 时间戳，否则为剩余秒数
+            self.rate_limit["reset_at"] = reset if reset > 365 * 86400 else now + reset
+    
+    def rate_limit_budget(self) -> Optional[Tuple[float, float]]:
+        """
+        剩余限流额度
+        
+        Returns:
+            (剩余请求数, 距重置的秒数)；服务端未提供或窗口已重置时返回 None
+        """
+        remaining = self.rate_limit["remaining"]
+        reset_at = self.rate_limit["reset_at"]
+        if remaining is None or reset_at is None:
+            return None
+        reset_in = reset_at - time.time()
+        if reset_in <= 0:
+            return None
+        return remaining, reset_in
+    
+    def _record_timing(self, method: str, url: str, status: Optional[int], elapsed_ms: float):
+        self.request_stats["requests"] += 1
+        self.request_stats["total_ms"] += elapsed_ms
+        self.request_stats["max_ms"] = max(self.request_stats["max_ms"], round(elapsed_ms, 2))
+        if status not in (200, 304):
+            self.request_stats["errors"] += 1
+        logger.debug(f"{method} {url} -> {status} in {elapsed_ms:.1f}ms")
+    
+    async def _send(
+        self,
+        method: str,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        content: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+        priority: int = PRIORITY_FETCH
+    ) -> Optional[httpx.Response]:
+        """
+        经限速器发送请求，按退避策略重试
+        
+        Returns:
+            httpx.Response: 200/304 响应，重试耗尽或不可重试的错误时返回 None
+        """
+        client = self._get_client()
+        
+        for attempt in range(self.max_retries + 1):
+            await self.governor.acquire(priority)
+            status = None
+            retry_delay = 0.0
+            started = time.perf_counter()
+            
+            try:
+                async with self._semaphore:
+                    response = await client.request(
+                        method,
+                        url,
+                        params=params,
+                        content=content,
+                        headers=headers,
+                        timeout=timeout or self.timeout
+                    )
+                status = response.status_code
+                self._update_rate_limit(response.headers)
+                
+                if status in (200, 304):
+                    remaining, reset_in = self.rate_limit_budget() or (None, None)
+                    self.governor.on_success(remaining, reset_in)
+                    return response
+                if status == 429:
+                    # 暂停由限速器统一执行，重试时在 acquire 中等待
+                    self.governor.on_throttled(parse_retry_after(response.headers.get("Retry-After")))
+                elif status >= 500:
+                    logger.error(f"HTTP error {status}: {response.reason_phrase}")
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    retry_delay = self.governor.on_error() if retry_after is None else retry_after
+                else:
+                    logger.error(f"HTTP error {status}: {response.reason_phrase}")
+                    return None
+                
+            except httpx.TimeoutException:
+                logger.error(f"Request timeout: {url}")
+                retry_delay = self.governor.on_error()
+            except httpx.HTTPError as e:
+                logger.error(f"URL error: {type(e).__name__}: {e}")
+                retry_delay = self.governor.on_error()
+            except Exception as e:
+                logger.error(f"Request error: {type(e).__name__}: {e}")
+                return None
+            finally:
+                self._record_timing(method, url, status, (time.perf_counter() - started) * 1000)
+            
+            if attempt < self.max_retries:
+                self.governor.counters["retries"] += 1
+                if retry_delay > 0:
+                    await asyncio.sleep(retry_delay)
+        
+        logger.error(f"Giving up on {method} {url} after {self.max_retries + 1} attempts")
+        return None
+    
+    async def _request(
+        self,
+        path: str,
+        method: str = "GET",
+        data: Optional[dict] = None,
+        params: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+        priority: int = PRIORITY_FETCH
+    ) -> Optional[Any]:
         """
         发送 HTTP 请求
         
         Args:
-            url: 请求 URL
+            path: 相对 base_url 的路径
             method: 请求方法
             data: 请求数据
-            timeout: 超时时间
+            params: 查询参数
+            timeout: 超时时间，None 使用客户端默认值
+            priority: 限速排队优先级
             
         Returns:
-            响应数据
+            响应数据，重试耗尽或不可重试的错误时返回 None
         """
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
+        if method == "GET" and self.cache is not None:
+            result, _ = await self._get_cached(path, params=params, timeout=timeout, priority=priority)
+            return result
         
-        try:
-            req = urllib.request.Request(url, headers=headers, method=method)
-            
-            if data:
-                req.data = json.dumps(data).encode("utf-8")
-            
-            response = urllib.request.urlopen(req, timeout=timeout, context=self.ssl_context)
-            
-            if response.status == 200:
-                return json.loads(response.read().decode("utf-8"))
-            return None
-            
-        except urllib.error.HTTPError as e:
-            if e.code == 429:
-                logger.warning("Rate limited by Moltbook API")
-            else:
-                logger.error(f"HTTP error {e.code}: {e.reason}")
-            return None
-        except urllib.error.URLError as e:
-            logger.error(f"URL error: {e.reason}")
+        response = await self._send(
+            method,
+            f"{self.base_url}{path}",
+            params=params,
+            content=json.dumps(data).encode("utf-8") if data else None,
+            timeout=timeout,
+            priority=priority
+        )
+        if response is None:
             return None
-        except Exception as e:
-            logger.error(f"Request error: {type(e).__name__}: {e}")
+        try:
+            return response.json()
+        except ValueError as e:
+            logger.error(f"Invalid JSON from {path}: {e}")
             return None
     
-    def get_posts(
+    def _cache_key(self, path: str, params: Optional[Dict[str, Any]] = None) -> str:
+        url = f"{self.base_url}{path}"
+        return str(httpx.URL(url, params=params)) if params else url
+    
+    async def _get_cached(
+        self,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+        priority: int = PRIORITY_FETCH,
+        stage: bool = False
+    ) -> Tuple[Optional[Any], bool]:
+        """
+        带缓存的 GET 请求
+        
+        有缓存时附带 If-None-Match/If-Modified-Since；服务端返回 304，或
+        响应体摘要与缓存相同时，直接返回缓存的解析结果而不重新解析。
+        
+        stage 为 True 时新响应只暂存，调用方持久化数据后调用 commit_cache
+        才生效；处理失败的数据下次仍会作为新响应返回，因此“未变化”可以
+        放心跳过。
+        
+        Returns:
+            (响应数据, 是否与已提交的缓存相同)，请求失败时数据为 None
+        """
+        url = f"{self.base_url}{path}"
+        if self.cache is None:
+            return await self._request(path, params=params, timeout=timeout, priority=priority), False
+        
+        key = self._cache_key(path, params)
+        entry = await self.cache.get(key)
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        
+        response = await self._send("GET", url, params=params, headers=headers, timeout=timeout, priority=priority)
+        if response is None:
+            return None, False
+        
+        if response.status_code == 304:
+            if entry is None:
+                logger.error(f"Unexpected 304 without cached response: {path}")
+                return None, False
+            self.cache.record("not_modified")
+            return entry.data, True
+        
+        body = response.content
+        digest = self.cache.digest(body)
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        
+        if entry is not None and entry.digest == digest:
+            self.cache.record("unchanged", len(body))
+            if (etag, last_modified) != (entry.etag, entry.last_modified):
+                await self.cache.put(key, CacheEntry(etag, last_modified, digest, entry.data))
+            return entry.data, True
+        
+        try:
+            data = response.json()
+        except ValueError as e:
+            logger.error(f"Invalid JSON from {path}: {e}")
+            return None, False
+        
+        self.cache.record("misses", len(body))
+        if stage:
+            self.cache.stage(key, CacheEntry(etag, last_modified, digest, data))
+        else:
+            await self.cache.put(key, CacheEntry(etag, last_modified, digest, data))
+        return data, False
+    
+    async def commit_cache(self, keys: Iterable[str]):
+        """
+        提交暂存的响应缓存，调用方持久化对应数据之后调用
+        
+        Args:
+            keys: PostsPage.cache_key
+        """
+        if self.cache is not None:
+            await self.cache.commit(keys)
+    
+    async def get_posts(
         self, 
         sort: str = "new", 
         limit: int = 100,
@@ -87,28 +378,71 @@ class MoltbookClient:
         Returns:
             List[Post]: 帖子列表
         """
-        params = [f"sort={sort}", f"limit={limit}"]
+        page = await self.get_posts_page(sort=sort, limit=limit, after=after, submolt=submolt)
+        return page.posts if page else []
+    
+    async def get_posts_page(
+        self,
+        sort: str = "new",
+        limit: int = 100,
+        after: Optional[str] = None,
+        submolt: Optional[str] = None,
+        priority: int = PRIORITY_FETCH
+    ) -> Optional[PostsPage]:
+        """
+        获取一页帖子及下一页游标
+        
+        响应中没有显式游标时，以本页最后一个帖子 id 作为下一页游标；
+        本页不足 limit 条视为已到末尾。新响应暂存在缓存中，调用方持久化
+        帖子后用 page.cache_key 提交；与已提交缓存相同的页返回 unchanged
+        标记，不再解析。
+        
+        Args:
+            sort: 排序方式 (hot, new, top, rising)
+            limit: 返回数量上限
+            after: 分页游标
+            submolt: 社区分区
+            priority: 限速排队优先级
+            
+        Returns:
+            PostsPage: 帖子与下一页游标；请求失败时返回 None
+        """
+        params = {"sort": sort, "limit": limit}
         if after:
-            params.append(f"after={after}")
+            params["after"] = after
         if submolt:
-            params.append(f"submolt={submolt}")
+            params["submolt"] = submolt
         
-        url = f"{self.base_url}/posts?{'&'.join(params)}"
+        data, unchanged = await self._get_cached("/posts", params=params, priority=priority, stage=True)
         
-        data = self._request(url)
-        
-        if not data:
-            return []
+        if data is None:
+            return None
+        if unchanged:
+            return PostsPage(posts=[], unchanged=True)
+        cache_key = self._cache_key("/posts", params) if self.cache is not None else None
         
         posts_data = []
+        next_cursor = None
         if isinstance(data, list):
             posts_data = data
         elif isinstance(data, dict):
-            posts_data = data.get("posts", data.get("data", []))
+            posts_data = data.get("posts", data.get("data", [])) or []
+            pagination = data.get("pagination") if isinstance(data.get("pagination"), dict) else data
+            next_cursor = (
+                pagination.get("next_cursor")
+                or pagination.get("nextCursor")
+                or pagination.get("after")
+            )
+            if pagination.get("has_more") is False or pagination.get("hasMore") is False:
+                return PostsPage([Post.from_api(p) for p in posts_data], cache_key=cache_key)
+        
+        posts = [Post.from_api(p) for p in posts_data]
+        if not next_cursor and len(posts) >= limit and posts[-1].id:
+            next_cursor = posts[-1].id
         
-        return [Post.from_api(p) for p in posts_data]
+        return PostsPage(posts, next_cursor, cache_key=cache_key)
     
-    def get_agent(self, agent_id: str) -> Optional[Agent]:
+    async def get_agent(self, agent_id: str) -> Optional[Agent]:
         """
         获取单个成员信息
         
@@ -118,14 +452,15 @@ class MoltbookClient:
         Returns:
             Agent: 成员对象
         """
-        url = f"{self.base_url}/agents/{agent_id}"
-        data = self._request(url)
+        data = await self._request(f"/agents/{agent_id}", priority=PRIORITY_ENRICH)
         
-        if data:
+        if isinstance(data, dict) and isinstance(data.get("agent"), dict):
+            data = data["agent"]
+        if data and isinstance(data, dict):
             return Agent.from_api(data)
         return None
     
-    def get_interactions(self, post_id: str) -> List[Dict[str, Any]]:
+    async def get_interactions(self, post_id: str) -> Optional[List[Dict[str, Any]]]:
         """
         获取帖子的互动数据
         
@@ -133,11 +468,16 @@ class MoltbookClient:
             post_id: 帖子ID
             
         Returns:
-            List[dict]: 互动列表
+            List[dict]: 互动列表；请求失败或响应格式无法识别时返回 None，
+                与没有评论的空列表区分
         """
-        url = f"{self.base_url}/posts/{post_id}/comments"
-        data = self._request(url)
+        data, _ = await self._get_cached(f"/posts/{post_id}/comments", priority=PRIORITY_ENRICH)
         
-        if data:
-            return data if isinstance(data, list) else []
-        return []
+        if isinstance(data, list):
+            return data
+        if isinstance(data, dict):
+            comments = data.get("comments", data.get("data", []))
+            if isinstance(comments, list):
+                return comments
+            logger.error(f"Unexpected comments payload for {post_id}")
+        return None
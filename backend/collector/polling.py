@@ -0,0 +1,161 @@
+"""
+自适应轮询
+根据帖子到达速率的指数加权移动平均 (EWMA) 调整采集间隔
+"""
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+
+def _timestamp(value: Optional[str]) -> Optional[float]:
+    """ISO 时间转为 epoch 秒，无法解析时返回 None"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+class AdaptivePoller:
+    """
+    自适应采集间隔
+    
+    每轮采集后用新帖子数估计到达速率（帖/秒）：已与上一轮衔接时取
+    新帖数 / 距上次采集的秒数；没有衔接上（积压）或首次采集时取新帖
+    created_at 的时间跨度。速率经 EWMA 平滑后，下一次间隔为攒够
+    target_posts 个新帖所需的时间，限制在 [min_interval, max_interval]。
+    没有新帖时按 stretch 倍数逐步放宽，积压时直接回到 min_interval；
+    新帖占返回帖子的比例 (EWMA) 超过 busy_ratio 时同样收紧。
+    
+    服务端返回限流额度时，间隔不小于按剩余额度均摊到重置前的时间，
+    避免在窗口内耗尽额度。
+    """
+    
+    def __init__(
+        self,
+        base_interval: float,
+        min_interval: float,
+        max_interval: float,
+        alpha: float = 0.3,
+        target_posts: float = 50,
+        stretch: float = 1.5,
+        max_step: float = 2.0,
+        busy_ratio: float = 0.8
+    ):
+        self.min_interval = max(1.0, float(min_interval))
+        self.max_interval = max(self.min_interval, float(max_interval))
+        self.alpha = min(max(alpha, 0.01), 1.0)
+        self.target_posts = max(1.0, float(target_posts))
+        self.stretch = max(1.0, stretch)
+        self.max_step = max(1.0, max_step)
+        self.busy_ratio = busy_ratio
+        
+        self.interval = self._clamp(base_interval)
+        self.rate: Optional[float] = None
+        self.new_ratio: Optional[float] = None
+        self.pages = 1.0
+        self.budget_floor = 0.0
+        self._last_poll: Optional[float] = None
+    
+    def _clamp(self, interval: float) -> float:
+        return min(max(float(interval), self.min_interval), self.max_interval)
+    
+    def _smooth(self, current: Optional[float], sample: float) -> float:
+        if current is None:
+            return sample
+        return self.alpha * sample + (1 - self.alpha) * current
+    
+    def _sample_rate(self, posts: List[Post], complete: bool, elapsed: Optional[float]) -> Optional[float]:
+        """单轮的到达速率样本"""
+        if complete and elapsed:
+            return len(posts) / elapsed
+        
+        stamps = [ts for ts in (_timestamp(post.created_at) for post in posts) if ts is not None]
+        if len(stamps) >= 2:
+            span = max(stamps) - min(stamps)
+            if span > 0:
+                return (len(stamps) - 1) / span
+        
+        if elapsed:
+            return len(posts) / elapsed
+        return None
+    
+    def observe(
+        self,
+        posts: List[Post],
+        scanned: int,
+        pages: int = 1,
+        complete: bool = True,
+        budget: Optional[Tuple[float, float]] = None,
+        now: Optional[float] = None
+    ) -> float:
+        """
+        记录一轮采集结果并计算下一次间隔
+        
+        Args:
+            posts: 本轮新帖子
+            scanned: 本轮 API 返回的帖子总数（含已知）
+            pages: 本轮请求页数
+            complete: 是否已与上一轮衔接
+            budget: (剩余请求数, 距重置秒数)，未知时为 None
+            now: 当前 epoch 秒，默认取系统时间
+        
+        Returns:
+            float: 下一次采集前的等待秒数
+        """
+        now = now if now is not None else time.time()
+        elapsed = now - self._last_poll if self._last_poll is not None else None
+        self._last_poll = now
+        
+        sample = self._sample_rate(posts, complete, elapsed)
+        if sample is not None:
+            self.rate = self._smooth(self.rate, sample)
+        if scanned > 0:
+            self.new_ratio = self._smooth(self.new_ratio, len(posts) / scanned)
+        self.pages = self._smooth(self.pages, max(1, pages))
+        
+        previous = self.interval
+        if not complete:
+            interval = self.min_interval
+        elif self.rate:
+            interval = self.target_posts / self.rate
+            # 单次调整幅度受限，避免一次偶然的空轮询把间隔拉满
+            interval = min(max(interval, previous / self.max_step), previous * self.max_step)
+            if self.new_ratio is not None and self.new_ratio >= self.busy_ratio:
+                # 返回的页几乎全是新帖，说明间隔内的到达量接近一页，提前收紧
+                interval = min(interval, previous / self.max_step)
+        else:
+            interval = previous * self.stretch if not posts else previous
+        interval = self._clamp(interval)
+        
+        self.budget_floor = 0.0
+        if budget:
+            remaining, reset_in = budget
+            self.budget_floor = min(reset_in, self.pages * reset_in / max(remaining, 1))
+            interval = max(interval, self.budget_floor)
+        
+        self.interval = interval
+        if abs(interval - previous) >= 1:
+            logger.debug(
+                f"Poll interval {previous:.0f}s -> {interval:.0f}s "
+                f"(rate={self.rate or 0:.4f}/s, new_ratio={self.new_ratio or 0:.2f}, complete={complete})"
+            )
+        return interval
+    
+    def stats(self) -> Dict[str, Any]:
+        """当前的轮询状态"""
+        return {
+            "interval": round(self.interval, 1),
+            "rate_per_min": round((self.rate or 0) * 60, 3),
+            "new_ratio": round(self.new_ratio, 3) if self.new_ratio is not None else None,
+            "pages_per_poll": round(self.pages, 2),
+            "budget_floor": round(self.budget_floor, 1),
+            "min_interval": self.min_interval,
+            "max_interval": self.max_interval
+        }
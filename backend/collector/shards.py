@@ -0,0 +1,79 @@
+"""
+采集分片
+每个分片是一个 submolt/sort 组合，拥有独立的游标、轮询间隔与请求优先级
+"""
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Union
+
+from .governor import PRIORITY_ENRICH, PRIORITY_FETCH
+from .polling import AdaptivePoller
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CollectionShard:
+    """采集分片"""
+    sort: str = "new"
+    submolt: str = ""
+    interval: int = 300
+    priority: int = 0
+    max_pages: Optional[int] = None
+    poller: Optional[AdaptivePoller] = field(default=None, repr=False, compare=False)
+    
+    @property
+    def name(self) -> str:
+        return f"{self.submolt or '*'}/{self.sort}"
+    
+    @property
+    def request_priority(self) -> int:
+        """限速排队优先级，始终排在评论与成员资料补全之前"""
+        return min(max(PRIORITY_FETCH + self.priority, PRIORITY_FETCH), PRIORITY_ENRICH - 1)
+
+
+def parse_shards(
+    configs: List[Union[str, Dict[str, Any]]],
+    default_sort: str = "new",
+    default_interval: int = 300
+) -> List[CollectionShard]:
+    """
+    解析分片配置
+    
+    配置为空时返回单个全站分片 (default_sort)，与未分片时的行为一致；
+    重复的 submolt/sort 组合只保留第一个。
+    
+    Args:
+        configs: 分片配置列表，每项为 submolt 名称，或包含 submolt、sort、interval、priority、max_pages 的字典
+        default_sort: 未指定 sort 时的排序方式
+        default_interval: 未指定 interval 时的轮询间隔（秒）
+    
+    Returns:
+        List[CollectionShard]: 分片列表
+    """
+    if not configs:
+        return [CollectionShard(sort=default_sort, interval=default_interval)]
+    
+    shards = []
+    seen = set()
+    for config in configs:
+        if isinstance(config, str):
+            config = {"submolt": config}
+        if not isinstance(config, dict):
+            logger.warning(f"Ignoring invalid collection shard config: {config!r}")
+            continue
+        
+        shard = CollectionShard(
+            sort=config.get("sort") or default_sort,
+            submolt=config.get("submolt") or "",
+            interval=int(config.get("interval") or default_interval),
+            priority=int(config.get("priority") or 0),
+            max_pages=config.get("max_pages")
+        )
+        if (shard.submolt, shard.sort) in seen:
+            logger.warning(f"Duplicate collection shard {shard.name} ignored")
+            continue
+        seen.add((shard.submolt, shard.sort))
+        shards.append(shard)
+    
+    return shards or [CollectionShard(sort=default_sort, interval=default_interval)]
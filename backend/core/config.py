@@ -3,7 +3,7 @@
 """
 import os
 from pathlib import Path
-from typing import List
+from typing import Any, Dict, List, Union
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
 
@@ -21,14 +21,63 @@ class Settings(BaseSettings):
     LOGS_DIR: Path = BASE_DIR / "logs"
     
     DB_PATH: str = str(DATA_DIR / "moltlook.db")
+    DB_READ_POOL_SIZE: int = 4
+    DB_SYNCHRONOUS: str = "NORMAL"
+    DB_CACHE_SIZE_KB: int = 65536
+    DB_MMAP_SIZE: int = 268435456
+    DB_BUSY_TIMEOUT_MS: int = 5000
+    DB_COMMIT_WINDOW_MS: int = 5
+    DB_COMMIT_MAX_JOBS: int = 256
+    SEEN_INDEX_SIZE: int = 200000
+    ROLLUP_HOURLY_RETENTION_DAYS: int = 14
+    CONTENT_COMPRESSION: bool = False
+    CONTENT_COMPRESS_MIN_BYTES: int = 256
+    CONTENT_COMPRESS_LEVEL: int = 6
+    
+    ARCHIVE_DIR: str = str(DATA_DIR / "archive")
+    ARCHIVE_HOT_DAYS: int = 0
+    ARCHIVE_RETENTION_MONTHS: int = 0
+    ARCHIVE_BATCH_SIZE: int = 500
+    ARCHIVE_MAX_ATTACHED: int = 8
+    
+    MAINTENANCE_CHECKPOINT_INTERVAL: int = 300
+    MAINTENANCE_VACUUM_INTERVAL: int = 600
+    MAINTENANCE_OPTIMIZE_INTERVAL: int = 3600
+    MAINTENANCE_ANALYZE_INTERVAL: int = 86400
+    VACUUM_MIN_FREE_PAGES: int = 256
+    VACUUM_STEP_PAGES: int = 1024
+    WAL_TRUNCATE_BYTES: int = 64 * 1024 * 1024
+    ANALYSIS_LIMIT: int = 1000
+    BACKUP_DIR: str = str(DATA_DIR / "backups")
+    BACKUP_INTERVAL: int = 86400
+    BACKUP_KEEP: int = 7
+    BACKUP_PAGES_PER_STEP: int = 1024
+    BACKUP_STEP_SLEEP_MS: int = 5
+    
+    JOURNAL_DIR: str = str(DATA_DIR / "journal")
+    JOURNAL_SEGMENT_BYTES: int = 16 * 1024 * 1024
+    JOURNAL_FSYNC: bool = True
+    JOURNAL_APPLY_BATCH: int = 1000
+    JOURNAL_MAX_ATTEMPTS: int = 5
     
     MOLTBOOK_API_KEY: str = ""
     MOLTBOOK_BASE_URL: str = "https://www.moltbook.com/api/v1"
+    MOLTBOOK_MAX_CONNECTIONS: int = 8
+    MOLTBOOK_TIMEOUT: float = 60
+    MOLTBOOK_RATE_LIMIT: float = 1.0
+    MOLTBOOK_RATE_BURST: int = 5
+    MOLTBOOK_MAX_RETRIES: int = 3
+    MOLTBOOK_BACKOFF_BASE: float = 1.0
+    MOLTBOOK_BACKOFF_MAX: float = 300
+    HTTP_CACHE_ENABLED: bool = True
+    HTTP_CACHE_DIR: str = str(DATA_DIR / "http_cache")
+    HTTP_CACHE_MAX_ENTRIES: int = 1024
     AGENT_NAME: str = ""
     
     AI_API_URL: str = ""
     AI_MODEL: str = "Qwen3-VL-30B-A3B-Instruct-FP8"
     AI_API_KEY: str = ""
+    AI_CONCURRENCY: int = 4
     
     WECOM_WEBHOOK_URL: str = ""
     WECOM_ENABLED: bool = True
@@ -37,7 +86,25 @@ class Settings(BaseSettings):
     
     FETCH_INTERVAL: int = 300
     FETCH_SORT: str = "new"
+    COLLECTION_SHARDS: List[Union[str, Dict[str, Any]]] = []
     BATCH_SIZE: int = 100
+    USE_MOCK_DATA: bool = False
+    CRAWL_MAX_PAGES: int = 5
+    POLL_ADAPTIVE: bool = True
+    POLL_MIN_INTERVAL: int = 30
+    POLL_MAX_INTERVAL: int = 1800
+    POLL_EWMA_ALPHA: float = 0.3
+    POLL_TARGET_FILL: float = 0.5
+    COMMENT_HARVEST_INTERVAL: int = 60
+    COMMENT_HARVEST_BATCH: int = 50
+    COMMENT_CONCURRENCY: int = 4
+    COMMENT_REVISIT_INTERVAL: int = 3600
+    COMMENT_REVISIT_HOURS: int = 24
+    AGENT_REFRESH_INTERVAL: int = 120
+    AGENT_REFRESH_BATCH: int = 50
+    AGENT_REFRESH_CONCURRENCY: int = 4
+    AGENT_REFRESH_TTL: int = 21600
+    AGENT_REFRESH_MAX_TTL: int = 604800
     
     MORNING_PUSH_HOUR: int = 7
     EVENING_PUSH_HOUR: int = 17
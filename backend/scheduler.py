@@ -5,15 +5,23 @@ MoltLook 主调度器
 import asyncio
 import logging
 import argparse
-from datetime import datetime
+from collections import OrderedDict
+from dataclasses import asdict, fields
+from datetime import datetime, timedelta
 from typing import Optional, Dict, Any, List
 
 from core.config import settings
 from collector.moltbook_client import MoltbookClient
+from collector.crawler import CrawlResult, IncrementalCrawler
+from collector.enrichment import AgentRefresher, CommentHarvester
+from collector.polling import AdaptivePoller
+from collector.shards import CollectionShard, parse_shards
 from collector.models import Post, Agent, Interaction, NewsItem, PushRecord
 from analyzer.news_classifier import NewsClassifier
 from analyzer.relation_analyzer import RelationAnalyzer
 from storage.database import db
+from storage.journal import IngestJournal
+from storage.maintenance import DatabaseMaintenance
 from storage.report_generator import report_generator
 from pusher.wecom_pusher import wecom_pusher
 
@@ -30,16 +38,59 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 已写入采集日志但可能尚未入库的帖子 ID，用于分片之间去重
+JOURNALED_IDS_LIMIT = 50000
+
 
 class Scheduler:
     """主调度器"""
     
     def __init__(self):
         self.client = MoltbookClient()
+        self.crawler = IncrementalCrawler(
+            self.client,
+            db.is_post_seen,
+            page_size=settings.BATCH_SIZE,
+            max_pages=settings.CRAWL_MAX_PAGES
+        )
+        self.shards = parse_shards(settings.COLLECTION_SHARDS, settings.FETCH_SORT, settings.FETCH_INTERVAL)
+        for shard in self.shards:
+            shard.poller = AdaptivePoller(
+                shard.interval,
+                min_interval=settings.POLL_MIN_INTERVAL,
+                max_interval=settings.POLL_MAX_INTERVAL,
+                alpha=settings.POLL_EWMA_ALPHA,
+                target_posts=settings.BATCH_SIZE * settings.POLL_TARGET_FILL
+            )
+        self._journaled_ids: "OrderedDict[str, None]" = OrderedDict()
+        self._throttled_reported = 0
+        self.comment_harvester = CommentHarvester(
+            self.client,
+            db,
+            concurrency=settings.COMMENT_CONCURRENCY,
+            batch_size=settings.COMMENT_HARVEST_BATCH,
+            revisit_interval=settings.COMMENT_REVISIT_INTERVAL,
+            revisit_hours=settings.COMMENT_REVISIT_HOURS
+        )
+        self.agent_refresher = AgentRefresher(
+            self.client,
+            db,
+            concurrency=settings.AGENT_REFRESH_CONCURRENCY,
+            batch_size=settings.AGENT_REFRESH_BATCH,
+            ttl=settings.AGENT_REFRESH_TTL,
+            max_ttl=settings.AGENT_REFRESH_MAX_TTL
+        )
         self.classifier = NewsClassifier()
         self.relation_analyzer = RelationAnalyzer()
+        self.journal = IngestJournal(
+            settings.JOURNAL_DIR,
+            segment_bytes=settings.JOURNAL_SEGMENT_BYTES,
+            fsync=settings.JOURNAL_FSYNC
+        )
+        self.maintenance = DatabaseMaintenance(db)
         self.running = False
         self._last_push_check: Optional[datetime] = None
+        self._journal_event = asyncio.Event()
     
     async def start(self):
         """启动调度器"""
@@ -47,21 +98,35 @@ class Scheduler:
         logger.info("MoltLook Scheduler Starting...")
         logger.info(f"Database: {settings.DB_PATH}")
         logger.info(f"Fetch Interval: {settings.FETCH_INTERVAL}s")
+        logger.info(f"Collection Shards: {', '.join(shard.name for shard in self.shards)}")
         logger.info(f"Morning Push: {settings.MORNING_PUSH_HOUR}:00")
         logger.info(f"Evening Push: {settings.EVENING_PUSH_HOUR}:00")
         logger.info(f"Danger Threshold: {NewsClassifier.DANGER_THRESHOLD}")
         logger.info("=" * 60)
         
+        await db.connect()
         await db.init_tables()
         logger.info("Database initialized")
         
         self.running = True
         
-        await asyncio.gather(
-            self._collection_loop(),
-            self._analysis_loop(),
-            self._push_loop(),
-        )
+        try:
+            await asyncio.gather(
+                self._collection_loop(),
+                self._ingest_loop(),
+                self._analysis_loop(),
+                self._comment_loop(),
+                self._agent_refresh_loop(),
+                self._push_loop(),
+                self._rollup_loop(),
+                self._archive_loop(),
+                self._maintenance_loop(),
+            )
+        finally:
+            self.running = False
+            self.journal.close()
+            await self.client.close()
+            await db.close()
     
     async def run_once(self) -> Dict[str, Any]:
         """
@@ -72,25 +137,32 @@ class Scheduler:
         """
         logger.info("Running one-shot mode...")
         
+        await db.connect()
         await db.init_tables()
         
         collected = await self._collect_posts()
         logger.info(f"Collected {collected} new posts")
         
+        harvest = await self.comment_harvester.harvest()
+        logger.info(f"Harvested {harvest['interactions']} interactions from {harvest['posts']} posts")
+        
         analyzed_posts, danger_count = await self._analyze_posts()
         logger.info(f"Analyzed {analyzed_posts} posts, {danger_count} dangerous")
         
+        refreshed = await self.agent_refresher.refresh()
+        logger.info(f"Refreshed {refreshed['fetched']} agent profiles, {refreshed['changed']} changed")
+        
         analyzed_agents = await self._analyze_agents()
         logger.info(f"Analyzed {analyzed_agents} agents")
         
-        today = datetime.now().strftime("%Y-%m-%d")
-        morning_success = await self._push_news("morning", today)
-        evening_success = await self._push_news("evening", today)
+        morning_success = await self._push_news("morning")
+        evening_success = await self._push_news("evening")
         
         await self._generate_report()
         
         result = {
             "collected": collected,
+            "interactions": harvest["interactions"],
             "analyzed_posts": analyzed_posts,
             "dangerous_posts": danger_count,
             "analyzed_agents": analyzed_agents,
@@ -102,20 +174,48 @@ class Scheduler:
         return result
     
     async def _collection_loop(self):
-        """采集循环"""
-        logger.info("Starting collection loop...")
+        """采集循环 - 各分片并发抓取并写入采集日志，共享同一个请求限速器"""
+        logger.info(f"Starting collection loop with {len(self.shards)} shard(s)...")
+        
+        await asyncio.gather(*(self._shard_loop(shard) for shard in self.shards))
+    
+    async def _shard_loop(self, shard: CollectionShard):
+        """单个分片的采集循环，间隔随该分片的帖子到达速率自适应"""
+        while self.running:
+            try:
+                fetched = await self._fetch_to_journal(shard)
+                if fetched > 0:
+                    self._journal_event.set()
+            except Exception as e:
+                logger.error(f"Collection error ({shard.name}): {e}")
+                report_generator.append_log(f"Collection error ({shard.name}): {e}", "error")
+            
+            governor = self.client.governor.state()
+            if governor["throttled"] > self._throttled_reported:
+                report_generator.append_log(f"Moltbook API throttled: {governor}", "warning")
+                self._throttled_reported = governor["throttled"]
+            
+            await asyncio.sleep(shard.poller.interval if settings.POLL_ADAPTIVE else shard.interval)
+    
+    async def _ingest_loop(self):
+        """入库循环 - 消费采集日志，启动时先重放上次未处理完的记录"""
+        logger.info("Starting ingest loop...")
         
         while self.running:
             try:
-                count = await self._collect_posts()
+                count = await self._drain_journal()
                 if count > 0:
                     logger.info(f"Collected {count} new posts")
                     report_generator.append_log(f"Collected {count} new posts", "info")
             except Exception as e:
-                logger.error(f"Collection error: {e}")
-                report_generator.append_log(f"Collection error: {e}", "error")
+                logger.error(f"Ingest error: {e}")
+                report_generator.append_log(f"Ingest error: {e}", "error")
             
-            await asyncio.sleep(settings.FETCH_INTERVAL)
+            try:
+                await asyncio.wait_for(self._journal_event.wait(), timeout=settings.FETCH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._journal_event.clear()
     
     async def _analysis_loop(self):
         """分析循环"""
@@ -136,6 +236,48 @@ class Scheduler:
             
             await asyncio.sleep(300)
     
+    async def _comment_loop(self):
+        """评论采集循环 - 为到期的帖子抓取评论并写入互动关系"""
+        if settings.COMMENT_HARVEST_INTERVAL <= 0:
+            return
+        
+        logger.info("Starting comment harvest loop...")
+        
+        while self.running:
+            try:
+                result = await self.comment_harvester.harvest()
+                if result["interactions"] > 0:
+                    logger.info(
+                        f"Harvested {result['interactions']} interactions "
+                        f"from {result['posts']} posts"
+                    )
+                # 一批取满说明还有积压，立即继续
+                if result["posts"] >= settings.COMMENT_HARVEST_BATCH:
+                    continue
+            except Exception as e:
+                logger.error(f"Comment harvest error: {e}")
+            
+            await asyncio.sleep(settings.COMMENT_HARVEST_INTERVAL)
+    
+    async def _agent_refresh_loop(self):
+        """成员资料刷新循环 - 按 TTL 拉取成员资料，资料变化后重算影响力"""
+        if settings.AGENT_REFRESH_INTERVAL <= 0:
+            return
+        
+        logger.info("Starting agent refresh loop...")
+        
+        while self.running:
+            try:
+                result = await self.agent_refresher.refresh()
+                if result["fetched"] > 0:
+                    logger.info(f"Refreshed {result['fetched']} agent profiles, {result['changed']} changed")
+                if result["agents"] >= settings.AGENT_REFRESH_BATCH:
+                    continue
+            except Exception as e:
+                logger.error(f"Agent refresh error: {e}")
+            
+            await asyncio.sleep(settings.AGENT_REFRESH_INTERVAL)
+    
     async def _push_loop(self):
         """推送循环"""
         logger.info("Starting push loop...")
@@ -148,43 +290,242 @@ class Scheduler:
             
             await asyncio.sleep(60)
     
+    async def _rollup_loop(self):
+        """汇总压缩循环"""
+        logger.info("Starting rollup compaction loop...")
+        
+        while self.running:
+            try:
+                await db.compact_rollups()
+            except Exception as e:
+                logger.error(f"Rollup compaction error: {e}")
+            
+            await asyncio.sleep(3600)
+    
+    async def _archive_loop(self):
+        """冷热分层循环 - 把超过热库保留期的帖子迁入月份分区"""
+        if settings.ARCHIVE_HOT_DAYS <= 0:
+            return
+        
+        logger.info("Starting archive loop...")
+        
+        while self.running:
+            try:
+                result = await db.archive_partitions()
+                if result["archived"] or result["detached"]:
+                    report_generator.append_log(
+                        f"Archived {result['archived']} posts, detached partitions: {result['detached']}",
+                        "info"
+                    )
+            except Exception as e:
+                logger.error(f"Archive error: {e}")
+            
+            await asyncio.sleep(6 * 3600)
+    
+    async def _maintenance_loop(self):
+        """数据库维护循环 - 检查点、增量 VACUUM、统计信息与备份按各自周期执行"""
+        logger.info("Starting maintenance loop...")
+        
+        while self.running:
+            try:
+                results = await self.maintenance.run_due()
+                if "backup" in results:
+                    report_generator.append_log(f"Database backup: {results['backup']['path']}", "info")
+            except Exception as e:
+                logger.error(f"Maintenance error: {e}")
+            
+            await asyncio.sleep(60)
+    
     async def _collect_posts(self) -> int:
         """
-        采集帖子 - 先采集所有帖子信息，分析后决定是否保存
+        采集帖子 - 抓取写入采集日志后立即消费入库
         
         Returns:
             int: 新帖子数量
         """
-        loop = asyncio.get_event_loop()
-        posts = await loop.run_in_executor(
-            None, 
-            lambda: self.client.get_posts(
-                sort=settings.FETCH_SORT,
-                limit=settings.BATCH_SIZE
-            )
+        await asyncio.gather(*(self._fetch_to_journal(shard) for shard in self.shards))
+        return await self._drain_journal()
+    
+    async def _fetch_posts(self, shard: CollectionShard) -> CrawlResult:
+        """从 API 增量抓取分片的帖子 - 从高水位或续爬游标开始翻页"""
+        state = await db.get_crawl_state(shard.sort, shard.submolt)
+        result = await self.crawler.crawl(
+            sort=shard.sort,
+            submolt=shard.submolt,
+            state=state.to_dict() if state else None,
+            priority=shard.request_priority,
+            max_pages=shard.max_pages
         )
         
-        if not posts:
-            logger.warning("No posts fetched from API, using mock data")
-            posts = self._get_mock_posts()
+        if result.failed:
+            if settings.USE_MOCK_DATA:
+                logger.warning("No posts fetched from API, using mock data")
+                result.posts = self._get_mock_posts()
+            else:
+                logger.warning(f"No posts fetched from API ({shard.name}): {self.client.governor.state()}")
         
-        if not posts:
-            return 0
+        return result
+    
+    async def _fetch_to_journal(self, shard: CollectionShard) -> int:
+        """
+        抓取一个分片的帖子并追加到采集日志
+        
+        多个分片可能抓到同一个帖子，已入库或已被其他分片写入日志的帖子跳过。
+        
+        Args:
+            shard: 采集分片
+            
+        Returns:
+            int: 写入日志的帖子数量
+        """
+        result = await self._fetch_posts(shard)
+        
+        posts = []
+        for post in result.posts:
+            if db.is_post_seen(post.id) or post.id in self._journaled_ids:
+                continue
+            self._journaled_ids[post.id] = None
+            posts.append(post)
+        while len(self._journaled_ids) > JOURNALED_IDS_LIMIT:
+            self._journaled_ids.popitem(last=False)
+        
+        if posts:
+            loop = asyncio.get_event_loop()
+            try:
+                await loop.run_in_executor(None, self.journal.append, [asdict(post) for post in posts])
+            except Exception:
+                for post in posts:
+                    self._journaled_ids.pop(post.id, None)
+                raise
+        
+        if result.state:
+            await db.save_crawl_state(result.state)
+        await self.crawler.commit(result)
+        if not result.failed:
+            # 各分片平分剩余限流额度
+            budget = self.client.rate_limit_budget()
+            if budget:
+                budget = (budget[0] / len(self.shards), budget[1])
+            shard.poller.observe(
+                result.posts,
+                result.scanned,
+                pages=result.pages,
+                complete=result.complete,
+                budget=budget
+            )
+        return len(posts)
+    
+    async def _drain_journal(self) -> int:
+        """
+        消费采集日志直到没有待处理记录
         
+        每次读取至多 JOURNAL_APPLY_BATCH 条，分析后单事务入库；入库成功
+        才推进检查点，失败时记录保留在日志中等待下次重放。分类失败的帖子
+        在推进检查点前重新追加到日志末尾，最多重试 JOURNAL_MAX_ATTEMPTS 次，
+        本轮不再重放，等下次消费时重试。
+        
+        Returns:
+            int: 新帖子数量
+        """
+        loop = asyncio.get_event_loop()
+        post_fields = {f.name for f in fields(Post)}
         new_count = 0
         
+        while True:
+            records, position = await loop.run_in_executor(
+                None, self.journal.read, settings.JOURNAL_APPLY_BATCH
+            )
+            
+            retry_records = []
+            if records:
+                posts = [
+                    Post(**{k: v for k, v in record.items() if k in post_fields})
+                    for record in records
+                ]
+                count, failed_ids = await self._process_posts(posts)
+                new_count += count
+                
+                for record in records:
+                    if record.get("id") not in failed_ids:
+                        continue
+                    failed_ids.discard(record.get("id"))
+                    attempts = record.get("journal_attempts", 0) + 1
+                    if attempts >= settings.JOURNAL_MAX_ATTEMPTS:
+                        logger.warning(f"Dropping post {record.get('id')} after {attempts} failed analyses")
+                        continue
+                    retry_records.append({**record, "journal_attempts": attempts})
+                
+                if retry_records:
+                    await loop.run_in_executor(None, self.journal.append, retry_records)
+                
+                # 只有仍留在日志中的帖子需要参与分片去重，已入库、已拒绝或
+                # 放弃重试的帖子移出，之后的采集可以按已见索引判断
+                retrying = {record.get("id") for record in retry_records}
+                for record in records:
+                    if record.get("id") not in retrying:
+                        self._journaled_ids.pop(record.get("id"), None)
+            
+            if position != self.journal.checkpoint:
+                await loop.run_in_executor(None, self.journal.commit, position)
+            
+            if retry_records or len(records) < settings.JOURNAL_APPLY_BATCH:
+                return new_count
+    
+    async def _classify(self, semaphore: asyncio.Semaphore, post: Post):
+        """在线程中调用同步的分类器，避免阻塞事件循环"""
+        async with semaphore:
+            return await asyncio.to_thread(self.classifier.analyze_post, post)
+    
+    async def _process_posts(self, posts: List[Post]) -> tuple:
+        """
+        分析帖子，单事务保存值得保留的帖子
+        
+        分类在线程中并发执行，并发数为 AI_CONCURRENCY。内容过短无法分析的
+        帖子与不值得保留的帖子一样只记入已见索引。
+        
+        Args:
+            posts: 待处理帖子
+            
+        Returns:
+            tuple: (新帖子数量, 分类失败需要重试的帖子 ID 集合)
+        """
+        if not posts:
+            return 0, set()
+        
+        pending = []
+        rejected_ids = []
+        batch_ids = set()
         for post in posts:
+            if post.id in batch_ids or db.is_post_seen(post.id):
+                continue
+            batch_ids.add(post.id)
+            if self.classifier.is_analyzable(post):
+                pending.append(post)
+            else:
+                rejected_ids.append(post.id)
+        
+        semaphore = asyncio.Semaphore(max(1, settings.AI_CONCURRENCY))
+        results = await asyncio.gather(
+            *(self._classify(semaphore, post) for post in pending),
+            return_exceptions=True
+        )
+        
+        batch_posts = []
+        batch_analyses = []
+        failed_ids = set()
+        
+        for post, result in zip(pending, results):
             try:
-                if await db.post_exists(post.id):
-                    continue
-                
-                result = self.classifier.analyze_post(post)
+                if isinstance(result, Exception):
+                    raise result
                 
                 if not result:
+                    failed_ids.add(post.id)
                     continue
                 
                 if not self.classifier.should_save(result):
                     logger.debug(f"Skipping post {post.id}: not news-worthy or dangerous")
+                    rejected_ids.append(post.id)
                     continue
                 
                 engagement_score = self._calculate_engagement(
@@ -195,7 +536,7 @@ class Scheduler:
                 is_top_news = result.is_news_worthy and result.importance_score >= 5
                 is_dangerous = self.classifier.is_dangerous(result)
                 
-                await db.save_post({
+                batch_posts.append({
                     "id": post.id,
                     "title": post.title,
                     "content": post.content,
@@ -211,7 +552,7 @@ class Scheduler:
                     "url": post.url
                 })
                 
-                await db.update_post_analysis(post.id, {
+                batch_analyses.append({
                     "category": result.category,
                     "summary": result.summary,
                     "importance_score": result.importance_score,
@@ -220,38 +561,34 @@ class Scheduler:
                     "keywords": result.keywords,
                     "sentiment": result.sentiment,
                     "danger_score": result.danger_score,
-                    "danger_type": result.danger_type
+                    "danger_type": result.danger_type,
+                    "is_dangerous": is_dangerous
                 })
                 
                 if is_dangerous:
-                    await db.save_dangerous_post({
-                        "id": post.id,
-                        "title": post.title,
-                        "content": post.content,
-                        "author_id": post.author_id,
-                        "author_name": post.author_name,
-                        "danger_score": result.danger_score,
-                        "danger_type": result.danger_type,
-                        "category": result.category,
-                        "created_at": post.created_at
-                    })
                     logger.warning(f"Dangerous post detected: {post.id} (score={result.danger_score}, type={result.danger_type})")
                 
-                if post.author_id:
-                    if not await db.agent_exists(post.author_id):
-                        await db.save_agent({
-                            "id": post.author_id,
-                            "name": post.author_name
-                        })
-                    
-                    await db.increment_agent_post_count(post.author_id, is_danger=is_dangerous)
-                
-                new_count += 1
-                
             except Exception as e:
                 logger.error(f"Error processing post {post.id}: {e}")
+                failed_ids.add(post.id)
+        
+        if not batch_posts and not rejected_ids:
+            return 0, failed_ids
         
-        return new_count
+        try:
+            batch_stats = await db.ingest_batch(batch_posts, batch_analyses, rejected_ids)
+        except Exception as e:
+            logger.error(f"Error ingesting batch of {len(batch_posts)} posts: {e}")
+            raise
+        
+        logger.info(
+            f"Ingested batch: {batch_stats['posts']} posts, "
+            f"{batch_stats['dangerous_posts']} dangerous, "
+            f"{batch_stats['rejected']} rejected, "
+            f"{batch_stats['agents']} agents in {batch_stats['elapsed_ms']}ms"
+        )
+        
+        return batch_stats["new_posts"], failed_ids
     
     async def _analyze_posts(self) -> tuple:
         """
@@ -334,8 +671,7 @@ class Scheduler:
         now = datetime.now()
         
         if push_type == "morning":
-            start_time = now.replace(hour=17, minute=0, second=0, microsecond=0)
-            start_time = start_time.replace(day=start_time.day - 1)
+            start_time = now.replace(hour=17, minute=0, second=0, microsecond=0) - timedelta(days=1)
             end_time = now.replace(hour=7, minute=0, second=0, microsecond=0)
         else:
             start_time = now.replace(hour=7, minute=0, second=0, microsecond=0)
@@ -347,13 +683,15 @@ class Scheduler:
         news_items = await db.get_top_news(
             limit=10, 
             start_time=start_time_str, 
-            end_time=end_time_str
+            end_time=end_time_str,
+            columns=db.list_columns("posts")
         )
         dangerous_posts = await db.get_dangerous_posts(
             min_score=8, 
             limit=10, 
             start_time=start_time_str, 
-            end_time=end_time_str
+            end_time=end_time_str,
+            columns=db.list_columns("dangerous_post_details")
         )
         
         danger_count = len(dangerous_posts)
@@ -472,6 +810,12 @@ async def main():
     parser = argparse.ArgumentParser(description="MoltLook Scheduler")
     parser.add_argument("--once", action="store_true", help="Run once and exit")
     parser.add_argument("--test-push", action="store_true", help="Test push notification")
+    parser.add_argument("--compress-content", action="store_true", help="Compress stored post content and exit")
+    parser.add_argument("--decompress-content", action="store_true", help="Restore compressed post content and exit")
+    parser.add_argument("--content-stats", action="store_true", help="Show post content storage stats and exit")
+    parser.add_argument("--backup", action="store_true", help="Back up the database online and exit")
+    parser.add_argument("--vacuum", action="store_true", help="VACUUM and enable incremental auto_vacuum, then exit")
+    parser.add_argument("--health", action="store_true", help="Show database health metrics and exit")
     args = parser.parse_args()
     
     scheduler = Scheduler()
@@ -482,8 +826,53 @@ async def main():
         logger.info(f"Push test result: {'success' if success else 'failed'}")
         return
     
+    if args.compress_content or args.decompress_content or args.content_stats:
+        try:
+            await db.connect()
+            await db.init_tables()
+            if args.compress_content or args.decompress_content:
+                try:
+                    result = await db.migrate_content_compression(compress=args.compress_content)
+                    print(f"\n迁移结果: {result}")
+                except ValueError as e:
+                    logger.error(f"Content migration refused: {e}")
+            stats = await db.get_content_stats()
+        finally:
+            scheduler.journal.close()
+            await db.close()
+        print(f"\n正文存储: {stats}")
+        return
+    
+    if args.backup or args.vacuum or args.health:
+        try:
+            await db.connect()
+            await db.init_tables()
+            if args.vacuum:
+                result = await db.enable_incremental_vacuum()
+                await db.record_maintenance("vacuum", result)
+                print(f"\nVACUUM: {result}")
+            if args.backup:
+                result = await db.backup(
+                    pages_per_step=settings.BACKUP_PAGES_PER_STEP,
+                    step_sleep_ms=settings.BACKUP_STEP_SLEEP_MS,
+                    keep=settings.BACKUP_KEEP
+                )
+                await db.record_maintenance("backup", result)
+                print(f"\n备份结果: {result}")
+            health = await db.get_health()
+        finally:
+            scheduler.journal.close()
+            await db.close()
+        print(f"\n数据库状态: {health}")
+        return
+    
     if args.once:
-        result = await scheduler.run_once()
+        try:
+            result = await scheduler.run_once()
+        finally:
+            scheduler.journal.close()
+            await scheduler.client.close()
+            await db.close()
         print(f"\n执行结果: {result}")
     else:
         await scheduler.start()
@@ -0,0 +1,10 @@
+"""
+替身服务模块
+模拟 Moltbook API 与 LLM 接口，支持合成数据、故障注入与流量录制回放，用于压测
+"""
+from .faults import FaultInjector, FaultProfile
+from .generator import SyntheticFeed
+from .recorder import TrafficRecorder, TrafficReplayer
+from .server import StandInServer
+
+__all__ = ["StandInServer", "SyntheticFeed", "FaultProfile", "FaultInjector", "TrafficRecorder", "TrafficReplayer"]
@@ -0,0 +1,6 @@
+"""
+python -m simulator
+"""
+from .server import main
+
+main()
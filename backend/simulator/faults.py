@@ -0,0 +1,133 @@
+"""
+故障注入
+为替身服务模拟延迟、限流 (429)、服务端错误 (5xx) 与格式错误的模型输出
+"""
+import asyncio
+import json
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FaultProfile:
+    """一个服务的故障配置"""
+    latency_ms: float = 0.0
+    latency_jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    rate_limit: int = 0
+    rate_window: float = 60.0
+    retry_after: float = 2.0
+    malformed_rate: float = 0.0
+
+
+class FaultInjector:
+    """
+    按 FaultProfile 注入故障
+    
+    rate_limit > 0 时按固定窗口计数，每个响应带 X-RateLimit-* 头，额度用完
+    返回 429 与 Retry-After（窗口剩余秒数）；此外按 throttle_rate 随机返回
+    429，按 error_rate 随机返回 503。延迟为 latency_ms ± latency_jitter_ms。
+    """
+    
+    MALFORMED_KINDS = ("truncated", "prose", "fenced", "bad_types", "empty")
+    
+    def __init__(self, profile: FaultProfile, seed: Optional[int] = None):
+        self.profile = profile
+        self._random = random.Random(seed)
+        self._window_start = time.time()
+        self._window_count = 0
+        self.counters: Dict[str, int] = {
+            "requests": 0,
+            "throttled": 0,
+            "rate_limited": 0,
+            "errors": 0,
+            "malformed": 0
+        }
+    
+    async def delay(self):
+        """模拟网络与处理延迟"""
+        delay_ms = self.profile.latency_ms
+        if self.profile.latency_jitter_ms:
+            delay_ms += self._random.uniform(-1, 1) * self.profile.latency_jitter_ms
+        if delay_ms > 0:
+            await asyncio.sleep(delay_ms / 1000)
+    
+    def _window(self, now: float) -> float:
+        """滚动到当前窗口，返回距窗口结束的秒数"""
+        if now - self._window_start >= self.profile.rate_window:
+            self._window_start = now
+            self._window_count = 0
+        return max(0.0, self._window_start + self.profile.rate_window - now)
+    
+    def rate_headers(self) -> Dict[str, str]:
+        """当前窗口的限流额度头，未设置 rate_limit 时为空"""
+        if self.profile.rate_limit <= 0:
+            return {}
+        reset_in = self._window(time.time())
+        return {
+            "X-RateLimit-Limit": str(self.profile.rate_limit),
+            "X-RateLimit-Remaining": str(max(0, self.profile.rate_limit - self._window_count)),
+            "X-RateLimit-Reset": str(int(reset_in) + 1)
+        }
+    
+    def admit(self) -> Optional[Tuple[int, Dict[str, str]]]:
+        """
+        决定本次请求是否注入故障
+        
+        Returns:
+            (状态码, 响应头)；正常处理时返回 None
+        """
+        self.counters["requests"] += 1
+        now = time.time()
+        
+        if self.profile.rate_limit > 0:
+            reset_in = self._window(now)
+            if self._window_count >= self.profile.rate_limit:
+                self.counters["rate_limited"] += 1
+                return 429, {**self.rate_headers(), "Retry-After": str(int(reset_in) + 1)}
+            self._window_count += 1
+        
+        roll = self._random.random()
+        if roll < self.profile.throttle_rate:
+            self.counters["throttled"] += 1
+            return 429, {**self.rate_headers(), "Retry-After": str(self.profile.retry_after)}
+        if roll < self.profile.throttle_rate + self.profile.error_rate:
+            self.counters["errors"] += 1
+            return 503, self.rate_headers()
+        return None
+    
+    def malform(self, content: str, fields: Dict[str, Any]) -> str:
+        """
+        按 malformed_rate 把模型输出改成格式错误的版本
+        
+        Args:
+            content: 正常的 JSON 文本
+            fields: content 对应的字段，用于构造类型错误的输出
+        
+        Returns:
+            str: 原样或改坏后的输出
+        """
+        if self._random.random() >= self.profile.malformed_rate:
+            return content
+        
+        self.counters["malformed"] += 1
+        kind = self._random.choice(self.MALFORMED_KINDS)
+        if kind == "truncated":
+            return content[:max(1, len(content) // 2)]
+        if kind == "prose":
+            return f"好的，以下是分析结果：\n{content}\n如需进一步分析请告诉我。"
+        if kind == "fenced":
+            return f"```json\n{content}\n```"
+        if kind == "bad_types":
+            return json.dumps({**fields, "importance_score": "高", "danger_score": "无"}, ensure_ascii=False)
+        return ""
+    
+    def stats(self) -> Dict[str, Any]:
+        """故障注入统计"""
+        return dict(self.counters)
@@ -0,0 +1,321 @@
+"""
+合成数据
+按设定的速率与大小生成 Moltbook 帖子、评论与成员资料，作为压测的数据源
+"""
+import logging
+import math
+import random
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+TOPICS = {
+    "technology": ["加密技术", "端到端加密", "开源工具", "编程语言", "代码审查", "隐私保护"],
+    "economy": ["加密货币", "传统金融", "交易策略", "投资风险", "货币政策"],
+    "society": ["社区治理", "人际关系", "社区动态", "社会现象", "新成员融入"],
+    "speech": ["言论自由", "观点表达", "意识觉醒", "自由与控制"],
+    "other": ["日常分享", "随想", "周末计划", "读书笔记"]
+}
+
+SENTENCES = [
+    "今天想讨论一下{topic}的最新进展。",
+    "关于{topic}，社区里出现了很多不同的观点。",
+    "{topic}值得每个成员认真思考。",
+    "有人认为{topic}会改变我们协作的方式，也有人持保留意见。",
+    "我整理了一些关于{topic}的资料，欢迎补充。",
+    "从过去一周的讨论来看，{topic}的关注度明显上升。",
+    "如果把{topic}放在更长的时间尺度上看，结论可能完全不同。"
+]
+
+DANGER_SENTENCES = [
+    "有人在帖子里鼓吹用暴力解决分歧。",
+    "这种极端观点正在社区里快速扩散。",
+    "评论区出现了针对特定群体的仇恨言论。"
+]
+
+COMMENT_SENTENCES = [
+    "同意，补充一点：{topic}的门槛其实在降低。",
+    "不太认同，{topic}的问题没有这么简单。",
+    "感谢分享，关于{topic}还有更多资料吗？",
+    "这个角度很有意思。",
+    "+1"
+]
+
+
+def _iso(ts: float) -> str:
+    """epoch 秒转为带毫秒的 UTC ISO 时间"""
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+class SyntheticFeed:
+    """
+    合成帖子流
+    
+    帖子按 posts_per_minute 的速率随时间到达，启动时预置 backlog 个历史帖子；
+    每次请求前按当前时间补齐新帖，采集端看到的是持续增长的 new 列表。
+    正文长度在 content_length 的 0.5~1.5 倍之间，作者按长尾分布从 agents 个
+    成员中选取，danger_ratio 比例的帖子包含危险言论关键词。评论在发帖后一小时
+    内逐步出现。帖子、评论与成员资料都由 seed 与序号决定，相同配置可复现。
+    """
+    
+    def __init__(
+        self,
+        posts_per_minute: float = 60.0,
+        backlog: int = 200,
+        content_length: int = 300,
+        agents: int = 500,
+        submolts: Sequence[str] = ("general", "technology", "economy", "society", "speech"),
+        comments_per_post: float = 3.0,
+        danger_ratio: float = 0.02,
+        max_posts: int = 50000,
+        seed: int = 42
+    ):
+        self.posts_per_minute = max(0.0, posts_per_minute)
+        self.content_length = max(20, content_length)
+        self.agents = max(1, agents)
+        self.submolts = list(submolts) or ["general"]
+        self.comments_per_post = max(0.0, comments_per_post)
+        self.danger_ratio = min(max(danger_ratio, 0.0), 1.0)
+        self.max_posts = max(100, max_posts)
+        self.seed = seed
+        
+        self._posts: List[Dict[str, Any]] = []
+        self._index: Dict[str, int] = {}
+        self._offset = 0
+        self._seq = 0
+        self._pending = 0.0
+        self.started = time.time()
+        self._generated_until = self.started
+        
+        if backlog > 0:
+            spacing = 60.0 / self.posts_per_minute if self.posts_per_minute else 60.0
+            for i in range(backlog):
+                self._append(self.started - (backlog - i) * spacing)
+    
+    def _rng(self, *parts: Any) -> random.Random:
+        return random.Random(":".join(str(p) for p in (self.seed, *parts)))
+    
+    def _agent_id(self, rng: random.Random) -> str:
+        # 帕累托分布：少数活跃成员贡献大部分帖子
+        return f"agent-{min(int(rng.paretovariate(1.16)) - 1, self.agents - 1):05d}"
+    
+    def _text(self, rng: random.Random, topic: str, length: int, dangerous: bool) -> str:
+        parts = []
+        total = 0
+        while total < length:
+            sentence = rng.choice(SENTENCES).format(topic=topic)
+            parts.append(sentence)
+            total += len(sentence)
+        if dangerous:
+            parts.insert(rng.randrange(len(parts) + 1), rng.choice(DANGER_SENTENCES))
+        return "".join(parts)
+    
+    def _append(self, created: float):
+        seq = self._seq
+        self._seq += 1
+        rng = self._rng("post", seq)
+        
+        category = rng.choice(list(TOPICS))
+        topic = rng.choice(TOPICS[category])
+        dangerous = rng.random() < self.danger_ratio
+        length = int(self.content_length * rng.uniform(0.5, 1.5))
+        author_id = self._agent_id(rng)
+        upvotes = int(rng.expovariate(1 / 20))
+        downvotes = int(upvotes * rng.uniform(0, 0.3))
+        
+        post = {
+            "id": f"sim{self.seed}-{seq:08d}",
+            "title": f"{topic}：{rng.choice(['讨论', '观察', '提问', '分享', '复盘'])}",
+            "content": self._text(rng, topic, length, dangerous),
+            "author": {"id": author_id, "name": f"Agent{author_id[6:]}"},
+            "submolt": {"name": rng.choice(self.submolts)},
+            "score": upvotes - downvotes,
+            "upvotes": upvotes,
+            "downvotes": downvotes,
+            "comment_count": int(rng.expovariate(1 / self.comments_per_post)) if self.comments_per_post else 0,
+            "created_at": _iso(created),
+            "url": f"https://www.moltbook.com/post/sim{self.seed}-{seq:08d}",
+            "_created": created
+        }
+        self._index[post["id"]] = self._offset + len(self._posts)
+        self._posts.append(post)
+    
+    def advance(self, now: Optional[float] = None) -> int:
+        """
+        按当前时间补齐到达的新帖
+        
+        Returns:
+            int: 本次生成的帖子数
+        """
+        now = now if now is not None else time.time()
+        elapsed = now - self._generated_until
+        if elapsed <= 0 or not self.posts_per_minute:
+            return 0
+        
+        self._pending += elapsed * self.posts_per_minute / 60.0
+        count = int(self._pending)
+        self._pending -= count
+        for i in range(count):
+            self._append(self._generated_until + elapsed * (i + 1) / count)
+        self._generated_until = now
+        
+        if len(self._posts) > self.max_posts:
+            # 一次丢弃 10%，避免每个新帖都重建索引
+            drop = len(self._posts) - int(self.max_posts * 0.9)
+            for post in self._posts[:drop]:
+                del self._index[post["id"]]
+            del self._posts[:drop]
+            self._offset += drop
+        return count
+    
+    @staticmethod
+    def _public(post: Dict[str, Any]) -> Dict[str, Any]:
+        return {k: v for k, v in post.items() if not k.startswith("_")}
+    
+    def _newest(self, limit: int, after: Optional[str], submolt: Optional[str]) -> List[Dict[str, Any]]:
+        """按发帖时间倒序，从 after 之后取最多 limit + 1 个帖子"""
+        end = len(self._posts)
+        if after:
+            position = self._index.get(after)
+            end = position - self._offset if position is not None else 0
+        
+        posts = []
+        for i in range(end - 1, -1, -1):
+            post = self._posts[i]
+            if submolt and post["submolt"]["name"] != submolt:
+                continue
+            posts.append(post)
+            if len(posts) > limit:
+                break
+        return posts
+    
+    def _ranked(self, sort: str, submolt: Optional[str], now: float) -> List[Dict[str, Any]]:
+        posts = reversed(self._posts)
+        if submolt:
+            posts = (p for p in posts if p["submolt"]["name"] == submolt)
+        if sort == "top":
+            return sorted(posts, key=lambda p: p["score"], reverse=True)
+        # hot / rising：只在最近的帖子中按热度排序
+        recent = [p for _, p in zip(range(2000), posts)]
+        return sorted(
+            recent,
+            key=lambda p: p["score"] / math.pow((now - p["_created"]) / 3600 + 2, 1.5),
+            reverse=True
+        )
+    
+    def page(
+        self,
+        sort: str = "new",
+        limit: int = 25,
+        after: Optional[str] = None,
+        submolt: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        获取一页帖子，格式与 GET /posts 相同
+        
+        Args:
+            sort: 排序方式 (new, hot, top, rising)
+            limit: 每页数量
+            after: 上一页最后一个帖子 ID
+            submolt: 社区分区
+        
+        Returns:
+            Dict: posts、has_more、next_cursor
+        """
+        now = time.time()
+        self.advance(now)
+        limit = min(max(1, limit), 100)
+        
+        if sort == "new":
+            posts = self._newest(limit, after, submolt)
+        else:
+            ranked = self._ranked(sort, submolt, now)
+            start = 0
+            if after:
+                start = next((i + 1 for i, p in enumerate(ranked) if p["id"] == after), len(ranked))
+            posts = ranked[start:start + limit + 1]
+        
+        has_more = len(posts) > limit
+        posts = posts[:limit]
+        return {
+            "success": True,
+            "posts": [self._public(p) for p in posts],
+            "has_more": has_more,
+            "next_cursor": posts[-1]["id"] if posts and has_more else None
+        }
+    
+    def comments(self, post_id: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        帖子的评论，发帖后一小时内按时间比例逐步出现
+        
+        Returns:
+            List[Dict]: 评论列表，帖子不存在时返回 None
+        """
+        position = self._index.get(post_id)
+        if position is None:
+            return None
+        post = self._posts[position - self._offset]
+        
+        now = time.time()
+        total = post["comment_count"]
+        visible = min(total, math.ceil(total * (now - post["_created"]) / 3600))
+        topic = post["title"].split("：")[0]
+        rng = self._rng("comments", post_id)
+        
+        comments = []
+        for i in range(total):
+            author_id = self._agent_id(rng)
+            sentence = rng.choice(COMMENT_SENTENCES).format(topic=topic)
+            parent = rng.random() < 0.3 and i > 0
+            parent_index = rng.randrange(i) if parent else None
+            if i >= visible:
+                continue
+            comments.append({
+                "id": f"{post_id}-c{i:03d}",
+                "content": sentence,
+                "author": {"id": author_id, "name": f"Agent{author_id[6:]}"},
+                "parent_id": f"{post_id}-c{parent_index:03d}" if parent_index is not None else None,
+                "created_at": _iso(post["_created"] + 3600 * (i + 1) / (total + 1))
+            })
+        return comments
+    
+    def agent(self, agent_id: str) -> Optional[Dict[str, Any]]:
+        """
+        成员资料，karma 与关注数按天缓慢变化
+        
+        Returns:
+            Dict: 成员资料，不在成员池中时返回 None
+        """
+        try:
+            number = int(agent_id.split("-", 1)[1])
+        except (IndexError, ValueError):
+            return None
+        if not agent_id.startswith("agent-") or not 0 <= number < self.agents:
+            return None
+        
+        rng = self._rng("agent", number)
+        days = int((time.time() - self.started) // 86400)
+        followers = int(rng.expovariate(1 / 50))
+        return {
+            "id": agent_id,
+            "name": f"Agent{number:05d}",
+            "description": f"关注{rng.choice(rng.choice(list(TOPICS.values())))}的社区成员",
+            "karma": int(rng.expovariate(1 / 200)) + days * rng.randrange(5),
+            "follower_count": followers + days,
+            "following_count": int(rng.expovariate(1 / 30)),
+            "is_claimed": rng.random() < 0.6,
+            "is_active": True,
+            "created_at": _iso(self.started - rng.uniform(1, 365) * 86400),
+            "last_active": _iso(self.started + days * 86400)
+        }
+    
+    def stats(self) -> Dict[str, Any]:
+        """生成统计"""
+        return {
+            "posts_generated": self._seq,
+            "posts_retained": len(self._posts),
+            "posts_per_minute": self.posts_per_minute,
+            "agents": self.agents
+        }
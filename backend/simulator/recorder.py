@@ -0,0 +1,171 @@
+"""
+流量录制与回放
+录制模式把经过替身服务的请求与上游响应写入 JSONL，回放模式按请求匹配返回录制的响应
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+logger = logging.getLogger(__name__)
+
+# 录制与回放时保留的响应头
+RECORDED_HEADERS = (
+    "content-type", "etag", "last-modified", "retry-after",
+    "x-ratelimit-limit", "x-ratelimit-remaining", "x-ratelimit-reset"
+)
+
+
+def _normalize_query(query: str) -> str:
+    return urlencode(sorted(parse_qsl(query, keep_blank_values=True)))
+
+
+def _prompt_digest(body: bytes) -> Optional[str]:
+    """chat 请求中全部消息内容的摘要，忽略 model、temperature 等参数"""
+    try:
+        messages = json.loads(body.decode("utf-8")).get("messages") or []
+        text = "\n".join(str(m.get("content", "")) for m in messages if isinstance(m, dict))
+    except (UnicodeDecodeError, ValueError, AttributeError):
+        return None
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def request_key(service: str, method: str, path: str, query: str, body: bytes) -> str:
+    """
+    请求的匹配键
+    
+    Moltbook 请求按方法、路径与排序后的查询参数匹配；LLM 请求按消息内容匹配。
+    """
+    if service == "llm":
+        return f"llm {_prompt_digest(body)}"
+    return f"{service} {method.upper()} {path}?{_normalize_query(query)}"
+
+
+class TrafficRecorder:
+    """把请求与响应逐条追加到 JSONL 文件，可在多个请求之间共享"""
+    
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.count = 0
+    
+    def record(
+        self,
+        service: str,
+        method: str,
+        path: str,
+        query: str,
+        body: bytes,
+        status: int,
+        headers: Dict[str, str],
+        content: bytes,
+        elapsed_ms: float
+    ):
+        """
+        录制一次请求
+        
+        Args:
+            service: moltbook 或 llm
+            method: 请求方法
+            path: 请求路径（替身服务上的路径）
+            query: 原始查询字符串
+            body: 请求体
+            status: 上游状态码
+            headers: 上游响应头
+            content: 上游响应体
+            elapsed_ms: 上游耗时
+        """
+        entry = {
+            "ts": time.time(),
+            "key": request_key(service, method, path, query, body),
+            "service": service,
+            "method": method.upper(),
+            "path": path,
+            "query": query,
+            "status": status,
+            "headers": {k.lower(): v for k, v in headers.items() if k.lower() in RECORDED_HEADERS},
+            "body": content.decode("utf-8", errors="replace"),
+            "elapsed_ms": round(elapsed_ms, 2)
+        }
+        line = json.dumps(entry, ensure_ascii=False)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+            self.count += 1
+
+
+class TrafficReplayer:
+    """
+    回放录制的流量
+    
+    同一请求键录有多条响应时按录制顺序依次返回，用完后循环；LLM 请求匹配
+    不到提示词时按录制顺序轮流返回任意一条，以便用新帖子压测分类吞吐。
+    respect_timing 为 True 时按录制时的上游耗时延迟返回。
+    """
+    
+    def __init__(self, path: str, respect_timing: bool = False):
+        self.path = Path(path)
+        self.respect_timing = respect_timing
+        self._entries: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._by_service: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._cursors: Dict[str, int] = defaultdict(int)
+        self.counters = {"matched": 0, "fallback": 0, "missing": 0}
+        
+        with open(self.path, "r", encoding="utf-8") as f:
+            for lineno, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError as e:
+                    logger.warning(f"Skipping unreadable traffic record at line {lineno}: {e}")
+                    continue
+                self._entries[entry["key"]].append(entry)
+                self._by_service[entry["service"]].append(entry)
+        
+        logger.info(f"Loaded {sum(len(v) for v in self._by_service.values())} traffic records from {self.path}")
+    
+    def _next(self, cursor: str, entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+        index = self._cursors[cursor]
+        self._cursors[cursor] = index + 1
+        return entries[index % len(entries)]
+    
+    def match(
+        self,
+        service: str,
+        method: str,
+        path: str,
+        query: str,
+        body: bytes
+    ) -> Optional[Tuple[int, Dict[str, str], bytes, float]]:
+        """
+        查找录制的响应
+        
+        Returns:
+            (状态码, 响应头, 响应体, 录制时的耗时毫秒)；没有可用的录制时返回 None
+        """
+        key = request_key(service, method, path, query, body)
+        entries = self._entries.get(key)
+        if entries:
+            self.counters["matched"] += 1
+            entry = self._next(key, entries)
+        elif service == "llm" and self._by_service.get("llm"):
+            self.counters["fallback"] += 1
+            entry = self._next("llm", self._by_service["llm"])
+        else:
+            self.counters["missing"] += 1
+            return None
+        return entry["status"], entry["headers"], entry["body"].encode("utf-8"), entry.get("elapsed_ms", 0.0)
+    
+    def stats(self) -> Dict[str, Any]:
+        """回放统计"""
+        return {
+            **self.counters,
+            "records": {service: len(entries) for service, entries in self._by_service.items()}
+        }
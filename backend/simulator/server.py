@@ -0,0 +1,403 @@
+"""
+替身服务
+在本地模拟 Moltbook REST API 与 OpenAI 兼容的 chat 接口，用于单机压测采集与分类吞吐
+
+    python -m simulator --posts-per-minute 600 --throttle-rate 0.02 --llm-malformed-rate 0.05
+
+然后让调度器指向替身服务：
+
+    MOLTBOOK_BASE_URL=http://127.0.0.1:8100/api/v1 MOLTBOOK_API_KEY=sim \\
+    AI_API_URL=http://127.0.0.1:8100/v1/chat/completions AI_API_KEY=sim \\
+    python scheduler.py --once
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import re
+import time
+import uuid
+from collections import defaultdict
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import Response
+
+from .faults import FaultInjector, FaultProfile
+from .generator import DANGER_SENTENCES, TOPICS, SyntheticFeed
+from .recorder import TrafficRecorder, TrafficReplayer
+
+logger = logging.getLogger(__name__)
+
+MOLTBOOK_PREFIX = "/api/v1"
+
+# 转发到上游时保留的请求头
+FORWARDED_HEADERS = ("authorization", "content-type", "if-none-match", "if-modified-since", "accept")
+
+PROMPT_PATTERN = re.compile(r"帖子标题:\s*(.*?)\n帖子内容:\s*(.*?)\n作者:", re.S)
+
+
+def _json(data: Any) -> bytes:
+    return json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+
+class StandInServer:
+    """
+    Moltbook 与 LLM 替身服务
+    
+    mode 决定响应来源：
+        synthetic: 由 SyntheticFeed 生成帖子、评论与成员资料，按提示词中的帖子生成分类结果
+        record: 转发到上游服务，并把请求与响应录制到 traffic 文件
+        replay: 从 traffic 文件回放录制的响应
+    
+    三种模式都按 moltbook_faults / llm_faults 注入延迟、429 与 503，LLM 输出
+    按 malformed_rate 改坏。GET 响应带 ETag，支持 If-None-Match 条件请求。
+    """
+    
+    def __init__(
+        self,
+        mode: str = "synthetic",
+        feed: Optional[SyntheticFeed] = None,
+        moltbook_faults: Optional[FaultProfile] = None,
+        llm_faults: Optional[FaultProfile] = None,
+        traffic: Optional[str] = None,
+        moltbook_upstream: Optional[str] = None,
+        llm_upstream: Optional[str] = None,
+        respect_timing: bool = False,
+        seed: Optional[int] = None
+    ):
+        if mode not in ("synthetic", "record", "replay"):
+            raise ValueError(f"Unknown stand-in mode: {mode}")
+        if mode != "synthetic" and not traffic:
+            raise ValueError(f"{mode} mode requires a traffic file")
+        
+        self.mode = mode
+        self.feed = feed or SyntheticFeed(seed=seed if seed is not None else 42)
+        self.faults = {
+            "moltbook": FaultInjector(moltbook_faults or FaultProfile(), seed),
+            "llm": FaultInjector(llm_faults or FaultProfile(), seed)
+        }
+        self.recorder = TrafficRecorder(traffic) if mode == "record" else None
+        self.replayer = TrafficReplayer(traffic, respect_timing=respect_timing) if mode == "replay" else None
+        self.upstreams = {
+            "moltbook": (moltbook_upstream or "").rstrip("/"),
+            "llm": llm_upstream or ""
+        }
+        self._http: Optional[httpx.AsyncClient] = None
+        
+        self.started = time.time()
+        self.counters: Dict[str, Dict[str, Any]] = {
+            service: {"requests": 0, "status": defaultdict(int), "total_ms": 0.0}
+            for service in self.faults
+        }
+        
+        self.app = FastAPI(title="MoltLook Stand-in", description="Moltbook / LLM 替身服务")
+        self.app.add_api_route(f"{MOLTBOOK_PREFIX}/{{path:path}}", self.moltbook, methods=["GET", "POST"])
+        self.app.add_api_route("/v1/chat/completions", self.chat, methods=["POST"])
+        self.app.add_api_route("/chat/completions", self.chat, methods=["POST"])
+        self.app.add_api_route("/_sim/stats", self.stats, methods=["GET"])
+        self.app.on_event("shutdown")(self.close)
+    
+    async def close(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+    
+    async def moltbook(self, request: Request, path: str) -> Response:
+        """Moltbook REST API"""
+        return await self._serve("moltbook", request, path)
+    
+    async def chat(self, request: Request) -> Response:
+        """OpenAI 兼容的 chat completions 接口"""
+        return await self._serve("llm", request, "")
+    
+    async def _serve(self, service: str, request: Request, path: str) -> Response:
+        """注入故障后按模式生成响应，并处理条件请求"""
+        started = time.perf_counter()
+        faults = self.faults[service]
+        await faults.delay()
+        
+        injected = faults.admit()
+        if injected is not None:
+            status, headers = injected
+            content = _json({"error": "Too Many Requests" if status == 429 else "Service Unavailable"})
+            headers = {**headers, "content-type": "application/json"}
+        else:
+            body = await request.body()
+            try:
+                if self.mode == "replay":
+                    status, headers, content = await self._replay(service, request, body)
+                elif self.mode == "record":
+                    status, headers, content = await self._proxy(service, request, path, body)
+                elif service == "llm":
+                    status, headers, content = self._synthetic_chat(body, faults)
+                else:
+                    status, headers, content = self._synthetic_moltbook(request, path)
+            except Exception as e:
+                logger.error(f"Stand-in {service} error: {e}")
+                status, headers, content = 500, {"content-type": "application/json"}, _json({"error": str(e)})
+            headers = {**headers, **faults.rate_headers()}
+            
+            if request.method == "GET" and status == 200:
+                headers.setdefault("etag", f'"{hashlib.sha1(content).hexdigest()}"')
+                if request.headers.get("if-none-match") == headers["etag"]:
+                    status, content = 304, b""
+        
+        counters = self.counters[service]
+        counters["requests"] += 1
+        counters["status"][str(status)] += 1
+        counters["total_ms"] += (time.perf_counter() - started) * 1000
+        
+        media_type = headers.pop("content-type", "application/json")
+        return Response(content=content, status_code=status, headers=headers, media_type=media_type)
+    
+    def _synthetic_moltbook(self, request: Request, path: str) -> Tuple[int, Dict[str, str], bytes]:
+        params = request.query_params
+        parts = [p for p in path.strip("/").split("/") if p]
+        headers = {"content-type": "application/json"}
+        
+        if parts == ["posts"]:
+            try:
+                limit = int(params.get("limit", 25))
+            except ValueError:
+                limit = 25
+            page = self.feed.page(
+                sort=params.get("sort", "new"),
+                limit=limit,
+                after=params.get("after") or None,
+                submolt=params.get("submolt") or None
+            )
+            return 200, headers, _json(page)
+        
+        if len(parts) == 3 and parts[0] == "posts" and parts[2] == "comments":
+            comments = self.feed.comments(parts[1])
+            if comments is not None:
+                return 200, headers, _json({"success": True, "comments": comments})
+        
+        if len(parts) == 2 and parts[0] == "agents":
+            agent = self.feed.agent(parts[1])
+            if agent is not None:
+                return 200, headers, _json({"success": True, "agent": agent})
+        
+        return 404, headers, _json({"success": False, "error": "Not found"})
+    
+    def _analyze(self, title: str, content: str) -> Dict[str, Any]:
+        """按合成帖子的话题与危险句子给出分类结果，同一帖子结果固定"""
+        text = f"{title}\n{content}"
+        rng = random.Random(hashlib.sha1(text.encode("utf-8")).hexdigest())
+        category, topic = next(
+            ((c, t) for c, topics in TOPICS.items() for t in topics if t in title),
+            ("other", title[:10])
+        )
+        dangerous = any(sentence in content for sentence in DANGER_SENTENCES)
+        importance = rng.randint(3, 9)
+        return {
+            "category": category,
+            "importance_score": importance,
+            "summary": content[:50],
+            "keywords": [topic],
+            "is_news_worthy": importance >= 5,
+            "sentiment": rng.choice(["positive", "neutral", "neutral", "negative"]),
+            "reasoning": "合成分类结果",
+            "danger_score": rng.randint(8, 9) if dangerous else rng.randint(0, 3),
+            "danger_type": "煽动暴力" if dangerous else "无危险"
+        }
+    
+    def _synthetic_chat(self, body: bytes, faults: FaultInjector) -> Tuple[int, Dict[str, str], bytes]:
+        headers = {"content-type": "application/json"}
+        try:
+            payload = json.loads(body.decode("utf-8"))
+            messages = payload.get("messages") or []
+            prompt = str(messages[-1].get("content", "")) if messages else ""
+        except (UnicodeDecodeError, ValueError, AttributeError):
+            return 400, headers, _json({"error": {"message": "Invalid request body"}})
+        
+        match = PROMPT_PATTERN.search(prompt)
+        title, content = match.groups() if match else ("", prompt)
+        fields = self._analyze(title.strip(), content.strip())
+        output = faults.malform(json.dumps(fields, ensure_ascii=False), fields)
+        
+        return 200, headers, _json({
+            "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", "stand-in"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": output},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": len(prompt),
+                "completion_tokens": len(output),
+                "total_tokens": len(prompt) + len(output)
+            }
+        })
+    
+    async def _replay(self, service: str, request: Request, body: bytes) -> Tuple[int, Dict[str, str], bytes]:
+        matched = self.replayer.match(service, request.method, request.url.path, request.url.query, body)
+        if matched is None:
+            return 404, {"content-type": "application/json"}, _json({"error": "No recorded response"})
+        
+        status, headers, content, elapsed_ms = matched
+        if self.replayer.respect_timing and elapsed_ms > 0:
+            await asyncio.sleep(elapsed_ms / 1000)
+        return status, dict(headers), content
+    
+    async def _proxy(self, service: str, request: Request, path: str, body: bytes) -> Tuple[int, Dict[str, str], bytes]:
+        if self._http is None:
+            self._http = httpx.AsyncClient(timeout=60, verify=False)
+        
+        if service == "moltbook":
+            url = f"{self.upstreams['moltbook']}/{path}"
+        else:
+            url = self.upstreams["llm"]
+        headers = {k: v for k, v in request.headers.items() if k.lower() in FORWARDED_HEADERS}
+        
+        started = time.perf_counter()
+        try:
+            upstream = await self._http.request(
+                request.method,
+                url,
+                params=request.url.query or None,
+                content=body or None,
+                headers=headers
+            )
+        except httpx.HTTPError as e:
+            logger.error(f"Upstream {service} request failed: {e}")
+            return 502, {"content-type": "application/json"}, _json({"error": f"Upstream error: {e}"})
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        
+        # 304 没有响应体，回放给没有缓存的客户端会出错，不录制
+        if upstream.status_code != 304:
+            self.recorder.record(
+                service,
+                request.method,
+                request.url.path,
+                request.url.query,
+                body,
+                upstream.status_code,
+                dict(upstream.headers),
+                upstream.content,
+                elapsed_ms
+            )
+        kept = {
+            k.lower(): v for k, v in upstream.headers.items()
+            if k.lower() in ("content-type", "etag", "last-modified", "retry-after")
+            or k.lower().startswith("x-ratelimit-")
+        }
+        return upstream.status_code, kept, upstream.content
+    
+    async def stats(self) -> Dict[str, Any]:
+        """替身服务统计：各服务的请求数、状态码分布、平均耗时与吞吐"""
+        uptime = max(time.time() - self.started, 1e-6)
+        services = {}
+        for service, counters in self.counters.items():
+            requests = counters["requests"]
+            services[service] = {
+                "requests": requests,
+                "status": dict(counters["status"]),
+                "avg_ms": round(counters["total_ms"] / requests, 2) if requests else 0,
+                "requests_per_sec": round(requests / uptime, 3),
+                "faults": self.faults[service].stats()
+            }
+        
+        data = {
+            "mode": self.mode,
+            "uptime": round(uptime, 1),
+            "services": services
+        }
+        if self.mode == "synthetic":
+            data["feed"] = self.feed.stats()
+        if self.replayer is not None:
+            data["replay"] = self.replayer.stats()
+        if self.recorder is not None:
+            data["recorded"] = self.recorder.count
+        return {"data": data}
+
+
+def main():
+    """命令行入口"""
+    from core.config import settings
+    
+    parser = argparse.ArgumentParser(description="Moltbook / LLM 替身服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--mode", choices=["synthetic", "record", "replay"], default="synthetic")
+    parser.add_argument("--traffic", help="录制/回放的 JSONL 文件")
+    parser.add_argument("--respect-timing", action="store_true", help="回放时按录制的上游耗时延迟")
+    parser.add_argument("--moltbook-upstream", default=settings.MOLTBOOK_BASE_URL, help="录制模式的 Moltbook 上游")
+    parser.add_argument("--llm-upstream", default=settings.AI_API_URL, help="录制模式的 LLM 上游")
+    parser.add_argument("--seed", type=int, default=42)
+    
+    feed = parser.add_argument_group("synthetic feed")
+    feed.add_argument("--posts-per-minute", type=float, default=60.0)
+    feed.add_argument("--backlog", type=int, default=200, help="启动时预置的帖子数")
+    feed.add_argument("--content-length", type=int, default=300, help="平均正文长度（字符）")
+    feed.add_argument("--agents", type=int, default=500)
+    feed.add_argument("--comments-per-post", type=float, default=3.0)
+    feed.add_argument("--danger-ratio", type=float, default=0.02)
+    feed.add_argument("--max-posts", type=int, default=50000, help="内存中保留的帖子上限")
+    
+    for service, latency, jitter in (("moltbook", 50.0, 20.0), ("llm", 800.0, 400.0)):
+        group = parser.add_argument_group(f"{service} faults")
+        prefix = "--" if service == "moltbook" else "--llm-"
+        group.add_argument(f"{prefix}latency-ms", type=float, default=latency)
+        group.add_argument(f"{prefix}latency-jitter-ms", type=float, default=jitter)
+        group.add_argument(f"{prefix}error-rate", type=float, default=0.0, help="随机返回 503 的比例")
+        group.add_argument(f"{prefix}throttle-rate", type=float, default=0.0, help="随机返回 429 的比例")
+        group.add_argument(f"{prefix}rate-limit", type=int, default=0, help="每个窗口允许的请求数，0 为不限")
+        group.add_argument(f"{prefix}rate-window", type=float, default=60.0)
+        group.add_argument(f"{prefix}retry-after", type=float, default=2.0)
+    parser.add_argument("--llm-malformed-rate", type=float, default=0.0, help="返回格式错误输出的比例")
+    
+    args = parser.parse_args()
+    
+    def profile(prefix: str, malformed_rate: float = 0.0) -> FaultProfile:
+        return FaultProfile(
+            latency_ms=getattr(args, f"{prefix}latency_ms"),
+            latency_jitter_ms=getattr(args, f"{prefix}latency_jitter_ms"),
+            error_rate=getattr(args, f"{prefix}error_rate"),
+            throttle_rate=getattr(args, f"{prefix}throttle_rate"),
+            rate_limit=getattr(args, f"{prefix}rate_limit"),
+            rate_window=getattr(args, f"{prefix}rate_window"),
+            retry_after=getattr(args, f"{prefix}retry_after"),
+            malformed_rate=malformed_rate
+        )
+    
+    logging.basicConfig(
+        level=getattr(logging, settings.LOG_LEVEL),
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    
+    server = StandInServer(
+        mode=args.mode,
+        feed=SyntheticFeed(
+            posts_per_minute=args.posts_per_minute,
+            backlog=args.backlog,
+            content_length=args.content_length,
+            agents=args.agents,
+            comments_per_post=args.comments_per_post,
+            danger_ratio=args.danger_ratio,
+            max_posts=args.max_posts,
+            seed=args.seed
+        ),
+        moltbook_faults=profile(""),
+        llm_faults=profile("llm_", args.llm_malformed_rate),
+        traffic=args.traffic,
+        moltbook_upstream=args.moltbook_upstream,
+        llm_upstream=args.llm_upstream,
+        respect_timing=args.respect_timing,
+        seed=args.seed
+    )
+    
+    base = f"http://{args.host}:{args.port}"
+    logger.info(f"Stand-in server ({args.mode}) listening on {base}")
+    logger.info(f"MOLTBOOK_BASE_URL={base}{MOLTBOOK_PREFIX}")
+    logger.info(f"AI_API_URL={base}/v1/chat/completions")
+    
+    import uvicorn
+    uvicorn.run(server.app, host=args.host, port=args.port, log_level="warning")
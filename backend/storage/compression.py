@@ -0,0 +1,60 @@
+"""
+正文压缩
+大文本列以 zlib 压缩后存为 BLOB，读取时按前缀识别并解压
+"""
+import struct
+import zlib
+from typing import Any
+
+# 压缩值格式: 前缀 + 原文字节数 + zlib 数据
+CODEC_PREFIX = b"ZL1"
+_LENGTH = struct.Struct(">I")
+_HEADER_SIZE = len(CODEC_PREFIX) + _LENGTH.size
+
+
+def is_compressed(value: Any) -> bool:
+    """是否为压缩存储的值"""
+    return isinstance(value, bytes) and value[:len(CODEC_PREFIX)] == CODEC_PREFIX
+
+
+def compress_text(value: Any, min_bytes: int = 256, level: int = 6) -> Any:
+    """
+    压缩文本
+    
+    短于 min_bytes 或压缩后没有变小的文本原样返回，非文本原样返回。
+    
+    Args:
+        value: 待压缩的值
+        min_bytes: 最小压缩长度（UTF-8 字节数）
+        level: zlib 压缩级别
+    
+    Returns:
+        压缩后的 bytes，或原值
+    """
+    if not isinstance(value, str):
+        return value
+    raw = value.encode("utf-8")
+    if len(raw) < min_bytes:
+        return value
+    packed = zlib.compress(raw, level)
+    if len(packed) + _HEADER_SIZE >= len(raw):
+        return value
+    return CODEC_PREFIX + _LENGTH.pack(len(raw)) + packed
+
+
+def decompress_text(value: Any) -> Any:
+    """解压 compress_text 的结果，其他值原样返回"""
+    if not is_compressed(value):
+        return value
+    return zlib.decompress(value[_HEADER_SIZE:]).decode("utf-8")
+
+
+def text_size(value: Any) -> int:
+    """原文的 UTF-8 字节数，压缩值从头部读取而不解压"""
+    if value is None:
+        return 0
+    if is_compressed(value):
+        return _LENGTH.unpack_from(value, len(CODEC_PREFIX))[0]
+    if isinstance(value, bytes):
+        return len(value)
+    return len(str(value).encode("utf-8"))
@@ -3,25 +3,586 @@
 SQLite 数据存储
 """
 import aiosqlite
+import ast
+import asyncio
+import base64
+import json
 import logging
-from typing import List, Optional, Dict, Any
-from datetime import datetime
+import os
+import re
+import shutil
+import sqlite3
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import List, Optional, Dict, Any, AsyncIterator, Tuple
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
+from .records import Record, record_factory
+from .seen_index import SeenPostIndex
+from .compression import compress_text, decompress_text, is_compressed, text_size
+from .partitions import (
+    list_partition_months, months_in_range, next_month, partition_alias, partition_path, shift_month
+)
+
 logger = logging.getLogger(__name__)
 
 
+# 统计计数器定义: (计数器名, 表名, 行表达式)，表达式中 {row} 替换为 NEW/OLD
+STAT_COUNTERS = [
+    ("total_posts", "posts", "1"),
+    ("analyzed_posts", "posts", "{row}.analyzed = 1"),
+    ("top_news", "posts", "{row}.is_top_news = 1"),
+    ("total_agents", "agents", "1"),
+    ("key_persons", "agents", "{row}.is_key_person = 1"),
+    ("dangerous_agents", "agents", "{row}.danger_post_count > 0"),
+    ("interactions", "interactions", "1"),
+    ("dangerous_posts", "dangerous_posts", "1"),
+]
+
+# 按天统计的计数器: (计数器名, 表名)，按 date(created_at) 分桶
+DAILY_STAT_COUNTERS = [
+    ("posts", "posts"),
+    ("dangerous_posts", "dangerous_posts"),
+]
+
+
+def time_buckets(created_at: Optional[str]) -> tuple:
+    """
+    计算时间的天/小时分桶，与 SQLite date()/strftime() 语义一致
+    
+    带时区的时间先换算为 UTC，无时区的时间按原样分桶。
+    
+    Returns:
+        tuple: (created_day, created_hour)，无法解析时为 (None, None)
+    """
+    if not created_at:
+        return None, None
+    try:
+        dt = datetime.fromisoformat(created_at)
+    except ValueError:
+        return None, None
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc)
+    return dt.strftime("%Y-%m-%d"), dt.strftime("%Y-%m-%dT%H")
+
+
+# 全文索引定义: (索引表, 源表, 索引列)
+FTS_TABLES = [
+    ("posts_fts", "posts", ["title", "content", "summary", "keywords"]),
+    ("agents_fts", "agents", ["name", "description"]),
+]
+
+# 可能压缩存储的列: 源表 -> 列，开启压缩时全文索引自存这些列的明文
+COMPRESSED_COLUMNS = {"posts": ["content"]}
+
+# 迁入月份分区的表/视图: 名称 -> 关联帖子的列
+ARCHIVE_TABLES = {
+    "posts": "id", "dangerous_posts": "post_id", "post_keywords": "post_id", "comment_harvest": "post_id"
+}
+ARCHIVE_VIEWS = ["dangerous_post_details"]
+
+_FTS_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+# 全文索引分词器: trigram 按任意子串匹配，中文词不必有空格分隔 (SQLite >= 3.34)；
+# unicode61 会把一整段连续的汉字当成一个词，只能按句首前缀命中
+FTS_TRIGRAM = sqlite3.sqlite_version_info >= (3, 34, 0)
+FTS_TOKENIZER = "trigram" if FTS_TRIGRAM else "unicode61 remove_diacritics 2"
+# trigram 无法用索引匹配的短词（不足 3 个字符）改用 LIKE 过滤
+FTS_MIN_TERM_LENGTH = 3 if FTS_TRIGRAM else 1
+
+
+def split_search_terms(text: str) -> Tuple[List[str], List[str]]:
+    """
+    把用户输入拆成可走全文索引的词与需要 LIKE 过滤的短词
+    
+    Returns:
+        (索引词列表, 短词列表)
+    """
+    terms = _FTS_TERM_RE.findall(text or "")
+    return (
+        [term for term in terms if len(term) >= FTS_MIN_TERM_LENGTH],
+        [term for term in terms if len(term) < FTS_MIN_TERM_LENGTH]
+    )
+
+
+def build_match_query(text: str, prefix: bool = True) -> Optional[str]:
+    """
+    把用户输入转换为安全的 FTS5 MATCH 表达式
+    
+    每个词加引号避免语法错误，多个词之间为 AND 关系；prefix 为 True 时
+    最后一个词按前缀匹配，便于边输边搜。
+    
+    Returns:
+        str: MATCH 表达式，没有可检索的词时返回 None
+    """
+    terms = _FTS_TERM_RE.findall(text or "")
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    if prefix:
+        quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+# 危险分数分桶: (桶名, 下限)，与 /api/feed 的 risk_level 区间一致
+DANGER_BUCKETS = [("critical", 8), ("high", 5), ("medium", 3), ("low", 0)]
+
+# 汇总表的维度与度量列
+ROLLUP_DIMENSIONS = ["category", "submolt", "danger_bucket"]
+ROLLUP_MEASURES = [
+    "post_count", "importance_sum", "top_news_count",
+    "positive_count", "neutral_count", "negative_count", "danger_count"
+]
+
+
+# 列表视图默认不读取正文
+LIST_EXCLUDED_COLUMNS = {"content"}
+
+# 帖子重复写入时覆盖的列，created_at、fetched_at 等保留首次入库的值。
+# 帖子只用 ON CONFLICT DO UPDATE 更新：INSERT OR REPLACE 的删除会触发
+# DELETE 触发器，连带清除关键词、危险言论与评论采集记录
+POST_FETCHED_COLUMNS = [
+    "title", "content", "author_name", "submolt", "score", "upvotes", "downvotes",
+    "comment_count", "parent_id", "is_reply", "url"
+]
+POST_ANALYSIS_COLUMNS = [
+    "category", "summary", "importance_score", "engagement_score", "is_top_news",
+    "keywords", "sentiment", "danger_score", "danger_type"
+]
+POST_UPSERT_FETCHED = ", ".join(f"{column} = excluded.{column}" for column in POST_FETCHED_COLUMNS)
+POST_UPSERT_ANALYSIS = ", ".join(f"{column} = excluded.{column}" for column in POST_ANALYSIS_COLUMNS)
+
+
+def rollup_measures(importance_score: Any, is_top_news: Any, sentiment: Any, is_dangerous: Any) -> tuple:
+    """单个帖子对汇总表各度量列的贡献，顺序同 ROLLUP_MEASURES"""
+    return (
+        1,
+        importance_score or 0,
+        1 if is_top_news else 0,
+        1 if sentiment == "positive" else 0,
+        1 if sentiment == "neutral" else 0,
+        1 if sentiment == "negative" else 0,
+        1 if is_dangerous else 0
+    )
+
+
+def danger_bucket(danger_score: Any) -> str:
+    """危险分数所属分桶"""
+    score = danger_score or 0
+    for name, lower in DANGER_BUCKETS:
+        if score >= lower:
+            return name
+    return "low"
+
+
+def normalize_keywords(keywords: Any) -> List[str]:
+    """
+    规范化关键词列表：去空白、转小写、去重，保持原有顺序
+    
+    兼容 list、JSON 字符串以及旧版 str(list) 格式的存量数据。
+    """
+    if isinstance(keywords, str):
+        text = keywords.strip()
+        if not text:
+            return []
+        try:
+            keywords = json.loads(text)
+        except ValueError:
+            try:
+                keywords = ast.literal_eval(text)
+            except (ValueError, SyntaxError):
+                keywords = [text]
+    
+    if not isinstance(keywords, (list, tuple)):
+        return []
+    
+    result = []
+    for keyword in keywords:
+        if not isinstance(keyword, str):
+            continue
+        keyword = " ".join(keyword.split()).casefold()[:64]
+        if keyword and keyword not in result:
+            result.append(keyword)
+    return result
+
+
+def encode_cursor(values: List[Any]) -> str:
+    """把排序键编码为不透明的分页游标"""
+    raw = json.dumps(values, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> Optional[List[Any]]:
+    """解析分页游标，格式不合法时返回 None"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw.decode("utf-8"))
+    except (ValueError, UnicodeDecodeError):
+        return None
+    if not isinstance(values, list) or len(values) != size:
+        return None
+    return values
+
+
+@dataclass
+class _WriteJob:
+    """写入队列中的一次写入请求"""
+    granted: asyncio.Future
+    done: asyncio.Future
+    committed: asyncio.Future
+    exclusive: bool = False
+
+
 class Database:
-    """数据库管理器"""
+    """
+    数据库管理器
+    
+    写入队列只在本进程内串行化写入。scheduler.py 是常驻的唯一写入方，
+    api.py 只在启动时 (init_tables) 与手动推送时写入；两个进程各自持有
+    写连接，进程之间依靠 SQLite 文件锁排队：写连接同样设置 busy_timeout，
+    遇到另一进程的写事务时最多等待 DB_BUSY_TIMEOUT_MS 毫秒后才报
+    "database is locked"。归档、VACUUM 等长事务应在 API 空闲时执行，
+    不要再增加其他常驻写入进程。
+    """
     
-    def __init__(self, db_path: Optional[str] = None):
+    def __init__(self, db_path: Optional[str] = None, read_pool_size: Optional[int] = None):
         from core.config import settings
         self.db_path = db_path or settings.DB_PATH
         Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        
+        self.read_pool_size = max(1, read_pool_size or settings.DB_READ_POOL_SIZE)
+        self._pragmas = {
+            "synchronous": settings.DB_SYNCHRONOUS,
+            "cache_size": -abs(settings.DB_CACHE_SIZE_KB),
+            "mmap_size": settings.DB_MMAP_SIZE,
+            "temp_store": "MEMORY",
+            "busy_timeout": settings.DB_BUSY_TIMEOUT_MS,
+        }
+        
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._readers: List[aiosqlite.Connection] = []
+        self._reader_queue: Optional[asyncio.Queue] = None
+        self._write_queue: Optional[asyncio.Queue] = None
+        self._writer_task: Optional[asyncio.Task] = None
+        self._connect_lock: Optional[asyncio.Lock] = None
+        
+        self.commit_window = settings.DB_COMMIT_WINDOW_MS / 1000
+        self.commit_max_jobs = max(1, settings.DB_COMMIT_MAX_JOBS)
+        self.write_stats = {"commits": 0, "jobs": 0, "max_batch": 0}
+        
+        self.seen_posts = SeenPostIndex(settings.SEEN_INDEX_SIZE)
+        
+        self.compress_content = settings.CONTENT_COMPRESSION
+        self.compress_min_bytes = settings.CONTENT_COMPRESS_MIN_BYTES
+        self.compress_level = settings.CONTENT_COMPRESS_LEVEL
+        
+        self.archive_dir = Path(settings.ARCHIVE_DIR)
+        self.archive_hot_days = settings.ARCHIVE_HOT_DAYS
+        self.archive_retention_months = settings.ARCHIVE_RETENTION_MONTHS
+        self.archive_batch_size = max(1, settings.ARCHIVE_BATCH_SIZE)
+        # SQLite 默认最多 ATTACH 10 个数据库
+        self.archive_max_attached = min(max(1, settings.ARCHIVE_MAX_ATTACHED), 9)
+        self._partition_months: List[str] = list_partition_months(self.archive_dir)
+        self._attached: Dict[int, "OrderedDict[str, int]"] = {}
+        self._table_columns: Dict[str, List[str]] = {}
+    
+    @property
+    def is_connected(self) -> bool:
+        """连接池是否已建立"""
+        return self._writer is not None
+    
+    async def connect(self):
+        """
+        建立长连接池：一个写连接 + N 个只读连接，并启动写入任务
+        
+        写连接负责切换 WAL 模式，读连接在 WAL 下可与写入并发。
+        重复调用是安全的。
+        """
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        
+        async with self._connect_lock:
+            if self._writer is not None:
+                return
+            
+            # 事务由写入任务显式管理；先设置 busy_timeout，切换 WAL 时
+            # 遇到其他进程持有的锁也会等待而不是立即失败
+            writer = await aiosqlite.connect(self.db_path, isolation_level=None)
+            await self._apply_pragmas(writer)
+            cursor = await writer.execute("PRAGMA page_count")
+            if (await cursor.fetchone())[0] == 0:
+                # 新库在建表前开启增量 auto_vacuum，旧库需执行一次 enable_incremental_vacuum
+                await writer.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            await writer.execute("PRAGMA journal_mode=WAL")
+            await writer.execute("PRAGMA recursive_triggers=ON")
+            await self._register_functions(writer)
+            
+            readers = []
+            reader_queue: asyncio.Queue = asyncio.Queue()
+            for _ in range(self.read_pool_size):
+                reader = await aiosqlite.connect(self.db_path)
+                reader.row_factory = record_factory
+                await self._apply_pragmas(reader)
+                await self._register_functions(reader)
+                await reader.execute("PRAGMA query_only=ON")
+                readers.append(reader)
+                reader_queue.put_nowait(reader)
+            
+            self._writer = writer
+            self._readers = readers
+            self._reader_queue = reader_queue
+            self._write_queue = asyncio.Queue()
+            self._writer_task = asyncio.create_task(self._writer_loop())
+        
+        logger.info(f"Database pool opened: 1 writer + {self.read_pool_size} readers ({self.db_path})")
+    
+    async def close(self):
+        """等待排队中的写入完成后关闭连接池"""
+        if self._connect_lock is None:
+            return
+        
+        async with self._connect_lock:
+            if self._writer is None:
+                return
+            
+            await self._write_queue.put(None)
+            await self._writer_task
+            
+            for reader in self._readers:
+                await reader.close()
+            await self._writer.close()
+            
+            self._writer = None
+            self._readers = []
+            self._attached.clear()
+            self._reader_queue = None
+            self._write_queue = None
+            self._writer_task = None
+        
+        logger.info(f"Database pool closed: {self.db_path}")
+    
+    async def _load_table_columns(self):
+        """缓存可投影表的列名，用于校验调用方传入的列"""
+        async with self._read() as db:
+            for table in ("posts", "agents", "dangerous_post_details"):
+                cursor = await db.execute(f"PRAGMA table_info({table})")
+                self._table_columns[table] = [row[1] for row in await cursor.fetchall()]
+    
+    def list_columns(self, table: str) -> List[str]:
+        """列表视图使用的列（不含正文等大字段）"""
+        return [col for col in self._table_columns.get(table, []) if col not in LIST_EXCLUDED_COLUMNS]
+    
+    def _projection(
+        self,
+        table: str,
+        columns: Optional[List[str]],
+        alias: str = "",
+        required: Optional[List[str]] = None
+    ) -> str:
+        """
+        构造 SELECT 列清单
+        
+        Args:
+            table: 表名
+            columns: 需要的列，None 表示全部
+            alias: 表别名
+            required: 必须包含的列（如分页排序键）
+        """
+        prefix = f"{alias}." if alias else ""
+        if not columns:
+            return f"{prefix}*"
+        
+        known = set(self._table_columns.get(table, []))
+        selected = []
+        for col in list(columns) + list(required or []):
+            if known and col not in known:
+                raise ValueError(f"Unknown column for {table}: {col}")
+            if col not in selected:
+                selected.append(col)
+        return ", ".join(f"{prefix}{col}" for col in selected)
+    
+    async def _apply_pragmas(self, conn: aiosqlite.Connection):
+        """应用连接级 PRAGMA 配置"""
+        for name, value in self._pragmas.items():
+            await conn.execute(f"PRAGMA {name}={value}")
+    
+    async def _register_functions(self, conn: aiosqlite.Connection):
+        """注册 SQL 函数：重建全文索引与统计需要读取压缩正文"""
+        await conn.create_function("decompress_text", 1, decompress_text, deterministic=True)
+        await conn.create_function("text_size", 1, text_size, deterministic=True)
+    
+    def _encode_content(self, content: Any) -> Any:
+        """按配置压缩正文"""
+        if not self.compress_content:
+            return content
+        return compress_text(content, self.compress_min_bytes, self.compress_level)
+    
+    @asynccontextmanager
+    async def _write(self, exclusive: bool = False) -> AsyncIterator[aiosqlite.Connection]:
+        """
+        向写入队列申请写连接
+        
+        写入任务按顺序把连接交给各个调用方，每个调用方的写入包在一个
+        SAVEPOINT 中，异常时只回滚自己的部分。退出时等待所在批次提交。
+        
+        Args:
+            exclusive: 单独执行且不开启事务，用于 VACUUM、wal_checkpoint
+                等不能在事务中执行的语句
+        """
+        if self._writer is None:
+            await self.connect()
+        
+        loop = asyncio.get_running_loop()
+        job = _WriteJob(
+            granted=loop.create_future(),
+            done=loop.create_future(),
+            committed=loop.create_future(),
+            exclusive=exclusive
+        )
+        await self._write_queue.put(job)
+        
+        conn = await job.granted
+        try:
+            yield conn
+        except BaseException:
+            job.done.set_result(False)
+            raise
+        job.done.set_result(True)
+        await job.committed
+    
+    async def _writer_loop(self):
+        """
+        写入任务：串行执行写入队列，按时间窗口合并提交
+        
+        一个批次在首个写入到达后最多等待 DB_COMMIT_WINDOW_MS 毫秒或
+        累计 DB_COMMIT_MAX_JOBS 个写入，然后一次提交。
+        """
+        loop = asyncio.get_running_loop()
+        queue = self._write_queue
+        stopping = False
+        next_job: Optional[_WriteJob] = None
+        
+        while not stopping:
+            job = next_job or await queue.get()
+            next_job = None
+            if job is None:
+                break
+            
+            if job.exclusive:
+                await self._run_exclusive_job(job)
+                continue
+            
+            batch: List[_WriteJob] = []
+            deadline = loop.time() + self.commit_window
+            
+            try:
+                await self._writer.execute("BEGIN IMMEDIATE")
+                
+                while True:
+                    if await self._run_write_job(job):
+                        batch.append(job)
+                    
+                    if len(batch) >= self.commit_max_jobs:
+                        break
+                    
+                    remaining = deadline - loop.time()
+                    if queue.empty() and remaining <= 0:
+                        break
+                    try:
+                        job = await asyncio.wait_for(queue.get(), timeout=max(remaining, 0))
+                    except asyncio.TimeoutError:
+                        break
+                    if job is None:
+                        stopping = True
+                        break
+                    if job.exclusive:
+                        # 先提交当前批次，再单独执行
+                        next_job = job
+                        break
+                
+                await self._writer.execute("COMMIT")
+            except Exception as e:
+                logger.error(f"Write batch of {len(batch)} failed: {e}")
+                try:
+                    if self._writer.in_transaction:
+                        await self._writer.execute("ROLLBACK")
+                except Exception as rollback_error:
+                    logger.error(f"Rollback after failed write batch failed: {rollback_error}")
+                # 批次中已执行的写入与出错时正在执行的写入都要得到异常，否则调用方会一直等待
+                failed = list(batch)
+                if job is not None and job is not next_job and job not in batch:
+                    failed.append(job)
+                for pending in failed:
+                    self._fail_write_job(pending, e)
+                continue
+            
+            self.write_stats["commits"] += 1
+            self.write_stats["jobs"] += len(batch)
+            self.write_stats["max_batch"] = max(self.write_stats["max_batch"], len(batch))
+            
+            for pending in batch:
+                if not pending.committed.done():
+                    pending.committed.set_result(True)
+    
+    @staticmethod
+    def _fail_write_job(job: "_WriteJob", error: Exception):
+        """把写入失败传给调用方：尚未开始的在 granted 上失败，已执行完的在 committed 上失败"""
+        if not job.granted.done():
+            job.granted.set_exception(error)
+        elif job.done.done() and job.done.result() and not job.committed.done():
+            job.committed.set_exception(error)
+    
+    async def _run_write_job(self, job: "_WriteJob") -> bool:
+        """在 SAVEPOINT 中执行单个写入，返回是否成功"""
+        if job.granted.done():
+            # 调用方在等待期间已取消
+            return False
+        
+        await self._writer.execute("SAVEPOINT write_job")
+        job.granted.set_result(self._writer)
+        ok = await job.done
+        
+        if not ok:
+            await self._writer.execute("ROLLBACK TO write_job")
+        await self._writer.execute("RELEASE write_job")
+        return ok
+    
+    async def _run_exclusive_job(self, job: "_WriteJob"):
+        """在事务之外单独执行一个写入"""
+        if job.granted.done():
+            return
+        
+        job.granted.set_result(self._writer)
+        ok = await job.done
+        try:
+            if self._writer.in_transaction:
+                # 调用方自行开启的事务未结束
+                await self._writer.execute("COMMIT" if ok else "ROLLBACK")
+        except Exception as e:
+            logger.error(f"Exclusive write failed: {e}")
+            job.committed.set_exception(e)
+            return
+        job.committed.set_result(ok)
+    
+    @asynccontextmanager
+    async def _read(self) -> AsyncIterator[aiosqlite.Connection]:
+        """从读连接池借出一个连接"""
+        if self._writer is None:
+            await self.connect()
+        
+        queue = self._reader_queue
+        conn = await queue.get()
+        try:
+            yield conn
+        finally:
+            queue.put_nowait(conn)
     
     async def init_tables(self):
         """初始化数据库表"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._write() as db:
             await self._init_posts_table(db)
             await self._init_agents_table(db)
             await self._init_interactions_table(db)
@@ -29,7 +590,17 @@ class Database:
             await self._init_push_records_table(db)
             await self._init_agent_relations_table(db)
             await self._init_dangerous_posts_table(db)
-            await db.commit()
+            await self._init_seen_posts_table(db)
+            await self._init_stats_counters_table(db)
+            await self._init_search_tables(db)
+            await self._init_post_keywords_table(db)
+            await self._init_rollup_tables(db)
+            await self._init_maintenance_table(db)
+            await self._init_crawl_state_table(db)
+            await self._init_comment_harvest_table(db)
+        
+        await self._load_table_columns()
+        await self.load_seen_posts()
         
         logger.info(f"Database initialized: {self.db_path}")
     
@@ -61,15 +632,54 @@ class Database:
                 danger_score INTEGER DEFAULT 0,
                 danger_type TEXT DEFAULT '无危险',
                 analyzed INTEGER DEFAULT 0,
-                fetched_at INTEGER
+                fetched_at INTEGER,
+                created_day TEXT,
+                created_hour TEXT
             )
         """)
         
+        await self._ensure_columns(db, "posts", {"created_day": "TEXT", "created_hour": "TEXT"})
+        
+        await db.execute("""
+            UPDATE posts SET created_at = strftime('%Y-%m-%dT%H:%M:%S', fetched_at, 'unixepoch', 'localtime')
+            WHERE created_at IS NULL AND fetched_at IS NOT NULL
+        """)
+        await db.execute("""
+            UPDATE posts SET
+                created_day = date(created_at),
+                created_hour = strftime('%Y-%m-%dT%H', created_at)
+            WHERE created_day IS NULL AND created_at IS NOT NULL
+        """)
+        
+        await db.execute("DROP INDEX IF EXISTS idx_posts_top_news")
         await db.execute("CREATE INDEX IF NOT EXISTS idx_posts_author ON posts(author_id)")
         await db.execute("CREATE INDEX IF NOT EXISTS idx_posts_category ON posts(category)")
         await db.execute("CREATE INDEX IF NOT EXISTS idx_posts_created ON posts(created_at)")
-        await db.execute("CREATE INDEX IF NOT EXISTS idx_posts_top_news ON posts(is_top_news, importance_score DESC)")
         await db.execute("CREATE INDEX IF NOT EXISTS idx_posts_danger ON posts(danger_score DESC)")
+        await db.execute("""
+            CREATE INDEX IF NOT EXISTS idx_posts_feed
+            ON posts(is_top_news, importance_score DESC, created_at DESC, id DESC)
+        """)
+        # 推送时间窗口: is_top_news = 1 AND created_at BETWEEN ? AND ?
+        await db.execute("""
+            CREATE INDEX IF NOT EXISTS idx_posts_top_window
+            ON posts(is_top_news, created_at, importance_score)
+        """)
+        # 按天查询: is_top_news = 1 AND created_day = ? ORDER BY importance_score DESC, created_at DESC
+        await db.execute("""
+            CREATE INDEX IF NOT EXISTS idx_posts_top_day
+            ON posts(is_top_news, created_day, importance_score DESC, created_at DESC)
+        """)
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_posts_hour ON posts(created_hour)")
+    
+    async def _ensure_columns(self, db: aiosqlite.Connection, table: str, columns: Dict[str, str]):
+        """为旧库补充新增列"""
+        cursor = await db.execute(f"PRAGMA table_info({table})")
+        existing = {row[1] for row in await cursor.fetchall()}
+        for name, column_type in columns.items():
+            if name not in existing:
+                await db.execute(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}")
+                logger.info(f"Added column {table}.{name}")
     
     async def _init_agents_table(self, db: aiosqlite.Connection):
         """初始化成员表 - 存储所有成员及其发帖和互动"""
@@ -96,7 +706,17 @@ class Database:
         
         await db.execute("CREATE INDEX IF NOT EXISTS idx_agents_karma ON agents(karma DESC)")
         await db.execute("CREATE INDEX IF NOT EXISTS idx_agents_influence ON agents(influence_score DESC)")
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_agents_influence_id ON agents(influence_score DESC, id DESC)")
         await db.execute("CREATE INDEX IF NOT EXISTS idx_agents_danger ON agents(danger_post_count DESC)")
+        
+        # 资料刷新: refresh_due 为空表示尚未拉取过资料
+        await self._ensure_columns(db, "agents", {
+            "last_refreshed": "TEXT",
+            "profile_hash": "TEXT",
+            "refresh_ttl": "INTEGER",
+            "refresh_due": "TEXT"
+        })
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_agents_refresh_due ON agents(refresh_due)")
     
     async def _init_interactions_table(self, db: aiosqlite.Connection):
         """初始化互动表 - 存储所有互动关系"""
@@ -165,129 +785,708 @@ class Database:
         """)
         
         await db.execute("CREATE INDEX IF NOT EXISTS idx_relations_agent ON agent_relations(agent_id)")
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_relations_related ON agent_relations(related_agent_id)")
+        
+        # 每条新互动累加一次回复关系强度；外层 INSERT OR IGNORE 会覆盖触发器内的
+        # 冲突策略，故与统计计数器一样用 NOT EXISTS + UPDATE 而非 UPSERT
+        await db.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_interactions_relation AFTER INSERT ON interactions
+            WHEN NEW.to_agent_id IS NOT NULL AND NEW.to_agent_id != '' AND NEW.to_agent_id != NEW.from_agent_id
+            BEGIN
+                INSERT INTO agent_relations (id, agent_id, related_agent_id, relation_type, strength, created_at)
+                SELECT NEW.from_agent_id || '->' || NEW.to_agent_id, NEW.from_agent_id, NEW.to_agent_id,
+                       NEW.interaction_type, 0, NEW.created_at
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM agent_relations
+                    WHERE agent_id = NEW.from_agent_id AND related_agent_id = NEW.to_agent_id
+                );
+                UPDATE agent_relations SET strength = strength + 1
+                WHERE agent_id = NEW.from_agent_id AND related_agent_id = NEW.to_agent_id;
+            END
+        """)
     
     async def _init_dangerous_posts_table(self, db: aiosqlite.Connection):
-        """初始化危险言论表 - 单独存储高危言论"""
+        """
+        初始化危险言论表 - 只存储对 posts 的引用
+        
+        标题、正文、作者等字段从 posts 关联读取，不再重复存储；created_at
+        与 created_day 取自帖子发布时间且不会变化，保留为排序/分区键，使
+        列表与按天查询仍可直接走本表索引。读取统一使用
+        dangerous_post_details 视图。
+        """
+        cursor = await db.execute("PRAGMA table_info(dangerous_posts)")
+        existing = {row[1] for row in await cursor.fetchall()}
+        if "content" in existing:
+            await self._migrate_dangerous_posts(db)
+        
         await db.execute("""
             CREATE TABLE IF NOT EXISTS dangerous_posts (
-                id TEXT PRIMARY KEY,
-                post_id TEXT NOT NULL,
-                title TEXT,
-                content TEXT,
-                author_id TEXT,
-                author_name TEXT,
+                post_id TEXT PRIMARY KEY,
                 danger_score INTEGER DEFAULT 0,
                 danger_type TEXT,
-                category TEXT,
+                detected_at TEXT,
                 created_at TEXT,
+                created_day TEXT
+            ) WITHOUT ROWID
+        """)
+        
+        await db.execute("""
+            CREATE INDEX IF NOT EXISTS idx_danger_posts_feed
+            ON dangerous_posts(danger_score DESC, created_at DESC, post_id DESC)
+        """)
+        # 推送时间窗口: created_at BETWEEN ? AND ? AND danger_score >= ?
+        await db.execute("""
+            CREATE INDEX IF NOT EXISTS idx_danger_posts_window
+            ON dangerous_posts(created_at, danger_score)
+        """)
+        # 按天查询: created_day = ? AND danger_score >= ? ORDER BY danger_score DESC, created_at DESC
+        await db.execute("""
+            CREATE INDEX IF NOT EXISTS idx_danger_posts_day
+            ON dangerous_posts(created_day, danger_score DESC, created_at DESC)
+        """)
+        
+        await db.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_dangerous_posts_delete AFTER DELETE ON posts
+            BEGIN
+                DELETE FROM dangerous_posts WHERE post_id = OLD.id;
+            END
+        """)
+        
+        # 保持旧表的行结构，id 即帖子 id
+        await db.execute("""
+            CREATE VIEW IF NOT EXISTS dangerous_post_details AS
+            SELECT
+                d.post_id AS id,
+                d.post_id,
+                p.title,
+                p.content,
+                p.author_id,
+                p.author_name,
+                d.danger_score,
+                d.danger_type,
+                p.category,
+                d.created_at,
+                d.detected_at,
+                d.created_day
+            FROM dangerous_posts d
+            JOIN posts p ON p.id = d.post_id
+        """)
+    
+    async def _migrate_dangerous_posts(self, db: aiosqlite.Connection):
+        """
+        把旧版整行复制的危险言论表迁移为引用表
+        
+        posts 中缺失的帖子先用旧表中的副本补回，避免迁移丢失内容；
+        同一帖子只保留一行。旧表的触发器与索引随表一起删除。
+        """
+        await db.execute("""
+            INSERT OR IGNORE INTO posts (
+                id, title, content, author_id, author_name, category, created_at,
+                danger_score, danger_type, analyzed, created_day, created_hour
+            )
+            SELECT
+                post_id, title, content, author_id, author_name, category, created_at,
+                danger_score, danger_type, 1, date(created_at), strftime('%Y-%m-%dT%H', created_at)
+            FROM dangerous_posts
+            WHERE post_id NOT IN (SELECT id FROM posts)
+        """)
+        
+        await db.execute("DROP TABLE IF EXISTS dangerous_posts_slim")
+        await db.execute("""
+            CREATE TABLE dangerous_posts_slim (
+                post_id TEXT PRIMARY KEY,
+                danger_score INTEGER DEFAULT 0,
+                danger_type TEXT,
                 detected_at TEXT,
-                UNIQUE(post_id)
+                created_at TEXT,
+                created_day TEXT
+            ) WITHOUT ROWID
+        """)
+        await db.execute("""
+            INSERT OR REPLACE INTO dangerous_posts_slim (
+                post_id, danger_score, danger_type, detected_at, created_at, created_day
             )
+            SELECT
+                d.post_id, d.danger_score, d.danger_type, d.detected_at,
+                COALESCE(p.created_at, d.created_at),
+                COALESCE(p.created_day, date(COALESCE(p.created_at, d.created_at)))
+            FROM dangerous_posts d
+            LEFT JOIN posts p ON p.id = d.post_id
+            ORDER BY d.detected_at
         """)
         
-        await db.execute("CREATE INDEX IF NOT EXISTS idx_danger_posts_author ON dangerous_posts(author_id)")
-        await db.execute("CREATE INDEX IF NOT EXISTS idx_danger_posts_score ON dangerous_posts(danger_score DESC)")
+        cursor = await db.execute("SELECT COUNT(*) FROM dangerous_posts")
+        before = (await cursor.fetchone())[0]
+        cursor = await db.execute("SELECT COUNT(*) FROM dangerous_posts_slim")
+        after = (await cursor.fetchone())[0]
+        
+        await db.execute("DROP VIEW IF EXISTS dangerous_post_details")
+        await db.execute("DROP TABLE dangerous_posts")
+        await db.execute("ALTER TABLE dangerous_posts_slim RENAME TO dangerous_posts")
+        # 触发器随旧表删除；清空计数器后由 _init_stats_counters_table 按新表重建
+        cursor = await db.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'stats_counters'"
+        )
+        if await cursor.fetchone() is not None:
+            await db.execute("DELETE FROM stats_counters")
+        
+        logger.info(f"Migrated dangerous_posts to reference table: {before} rows -> {after} rows")
     
-    async def save_post(self, post_data: Dict[str, Any]) -> bool:
-        """保存帖子"""
-        try:
-            async with aiosqlite.connect(self.db_path) as db:
-                await db.execute("""
-                    INSERT OR REPLACE INTO posts (
-                        id, title, content, author_id, author_name, submolt,
-                        score, upvotes, downvotes, comment_count, created_at,
-                        parent_id, is_reply, url, fetched_at
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    post_data.get("id"),
-                    post_data.get("title"),
-                    post_data.get("content"),
-                    post_data.get("author_id"),
-                    post_data.get("author_name"),
-                    post_data.get("submolt"),
-                    post_data.get("score", 0),
-                    post_data.get("upvotes", 0),
-                    post_data.get("downvotes", 0),
-                    post_data.get("comment_count", 0),
-                    post_data.get("created_at"),
-                    post_data.get("parent_id"),
-                    1 if post_data.get("parent_id") else 0,
-                    post_data.get("url"),
-                    int(datetime.now().timestamp())
-                ))
-                await db.commit()
-            return True
-        except Exception as e:
-            logger.error(f"Error saving post: {e}")
-            return False
+    async def _init_seen_posts_table(self, db: aiosqlite.Connection):
+        """初始化已见帖子表 - 记录已分类过的帖子（含未入库的）"""
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS seen_posts (
+                id TEXT PRIMARY KEY,
+                saved INTEGER DEFAULT 0,
+                seen_at INTEGER
+            ) WITHOUT ROWID
+        """)
+        
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_seen_posts_seen_at ON seen_posts(seen_at DESC)")
+        
+        cursor = await db.execute("SELECT 1 FROM seen_posts LIMIT 1")
+        if await cursor.fetchone() is None:
+            await db.execute("""
+                INSERT OR IGNORE INTO seen_posts (id, saved, seen_at)
+                SELECT id, 1, fetched_at FROM posts
+            """)
     
-    async def update_post_analysis(self, post_id: str, analysis_data: Dict[str, Any]) -> bool:
-        """更新帖子分析结果"""
-        try:
-            async with aiosqlite.connect(self.db_path) as db:
-                await db.execute("""
-                    UPDATE posts SET
-                        category = ?,
-                        summary = ?,
-                        importance_score = ?,
-                        engagement_score = ?,
-                        is_top_news = ?,
-                        keywords = ?,
-                        sentiment = ?,
-                        danger_score = ?,
-                        danger_type = ?,
-                        analyzed = 1
-                    WHERE id = ?
-                """, (
-                    analysis_data.get("category", "other"),
-                    analysis_data.get("summary"),
-                    analysis_data.get("importance_score", 0),
-                    analysis_data.get("engagement_score", 0),
-                    1 if analysis_data.get("is_top_news") else 0,
-                    str(analysis_data.get("keywords", [])),
-                    analysis_data.get("sentiment", "neutral"),
-                    analysis_data.get("danger_score", 0),
-                    analysis_data.get("danger_type", "无危险"),
-                    post_id
-                ))
-                await db.commit()
-            return True
-        except Exception as e:
-            logger.error(f"Error updating post analysis: {e}")
-            return False
+    async def _init_stats_counters_table(self, db: aiosqlite.Connection):
+        """
+        初始化统计计数器表
+        
+        计数器由触发器随 posts/agents/interactions/dangerous_posts 的增删改
+        同步更新。INSERT OR REPLACE 的删除只有在 recursive_triggers 开启时才
+        触发 DELETE 触发器，写连接已开启该选项；posts 上挂有级联删除的触发器，
+        因此帖子一律用 ON CONFLICT DO UPDATE 写入，不使用 REPLACE。
+        """
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS stats_counters (
+                name TEXT NOT NULL,
+                day TEXT NOT NULL DEFAULT '',
+                value INTEGER DEFAULT 0,
+                PRIMARY KEY (name, day)
+            ) WITHOUT ROWID
+        """)
+        
+        tables = sorted({table for _, table, _ in STAT_COUNTERS} | {table for _, table in DAILY_STAT_COUNTERS})
+        for table in tables:
+            await self._create_stats_triggers(db, table)
+        
+        cursor = await db.execute("SELECT 1 FROM stats_counters LIMIT 1")
+        if await cursor.fetchone() is None:
+            await self._rebuild_stats_counters(db)
     
-    async def save_dangerous_post(self, post_data: Dict[str, Any]) -> bool:
-        """保存危险言论"""
-        try:
-            async with aiosqlite.connect(self.db_path) as db:
-                await db.execute("""
-                    INSERT OR REPLACE INTO dangerous_posts (
-                        id, post_id, title, content, author_id, author_name,
-                        danger_score, danger_type, category, created_at, detected_at
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    f"danger-{post_data.get('id')}",
-                    post_data.get("id"),
-                    post_data.get("title"),
-                    post_data.get("content"),
-                    post_data.get("author_id"),
-                    post_data.get("author_name"),
-                    post_data.get("danger_score", 0),
-                    post_data.get("danger_type", "未知"),
-                    post_data.get("category", "other"),
-                    post_data.get("created_at"),
-                    datetime.now().isoformat()
-                ))
-                await db.commit()
-            return True
-        except Exception as e:
-            logger.error(f"Error saving dangerous post: {e}")
-            return False
+    async def _create_stats_triggers(self, db: aiosqlite.Connection, table: str):
+        """为单个表创建维护统计计数器的触发器"""
+        counters = [(name, expr) for name, t, expr in STAT_COUNTERS if t == table]
+        daily = [name for name, t in DAILY_STAT_COUNTERS if t == table]
+        
+        def bump(row: str, sign: str) -> List[str]:
+            statements = [
+                f"UPDATE stats_counters SET value = value {sign} ({expr.format(row=row)}) "
+                f"WHERE name = '{name}' AND day = '';"
+                for name, expr in counters
+            ]
+            for name in daily:
+                if sign == "+":
+                    # 外层 INSERT OR REPLACE 会覆盖触发器内的冲突策略，故用 NOT EXISTS 避免冲突
+                    statements.append(
+                        f"INSERT INTO stats_counters (name, day, value) "
+                        f"SELECT '{name}', date({row}.created_at), 0 "
+                        f"WHERE date({row}.created_at) IS NOT NULL AND NOT EXISTS ("
+                        f"SELECT 1 FROM stats_counters WHERE name = '{name}' AND day = date({row}.created_at));"
+                    )
+                statements.append(
+                    f"UPDATE stats_counters SET value = value {sign} 1 "
+                    f"WHERE name = '{name}' AND day = date({row}.created_at);"
+                )
+            return statements
+        
+        await db.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_stats_{table}_insert AFTER INSERT ON {table}
+            BEGIN
+                {" ".join(bump("NEW", "+"))}
+            END
+        """)
+        await db.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_stats_{table}_delete AFTER DELETE ON {table}
+            BEGIN
+                {" ".join(bump("OLD", "-"))}
+            END
+        """)
+        
+        changed = [(name, expr) for name, expr in counters if "{row}" in expr]
+        if changed:
+            updates = " ".join(
+                f"UPDATE stats_counters SET value = value + ({expr.format(row='NEW')}) - ({expr.format(row='OLD')}) "
+                f"WHERE name = '{name}' AND day = '';"
+                for name, expr in changed
+            )
+            await db.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_stats_{table}_update AFTER UPDATE ON {table}
+                BEGIN
+                    {updates}
+                END
+            """)
+    
+    async def _rebuild_stats_counters(self, db: aiosqlite.Connection):
+        """全量扫描重建统计计数器"""
+        await db.execute("DELETE FROM stats_counters")
+        
+        for name, table, expr in STAT_COUNTERS:
+            await db.execute(
+                f"INSERT INTO stats_counters (name, day, value) "
+                f"SELECT ?, '', COALESCE(SUM({expr.format(row=table)}), 0) FROM {table}",
+                (name,)
+            )
+        
+        for name, table in DAILY_STAT_COUNTERS:
+            await db.execute(
+                f"INSERT INTO stats_counters (name, day, value) "
+                f"SELECT ?, date(created_at), COUNT(*) FROM {table} "
+                f"WHERE date(created_at) IS NOT NULL GROUP BY date(created_at)",
+                (name,)
+            )
+    
+    async def rebuild_stats_counters(self):
+        """重建统计计数器（数据被外部工具修改后用于校正）"""
+        async with self._write() as db:
+            await self._rebuild_stats_counters(db)
+        logger.info("Stats counters rebuilt")
+    
+    async def _init_search_tables(self, db: aiosqlite.Connection):
+        """
+        初始化 FTS5 全文索引
+        
+        默认为外部内容表模式：索引只存词项，原文仍在源表中；触发器随源表
+        增删改同步索引。危险言论均已写入 posts，检索时按 danger_score 过滤即可。
+        
+        开启正文压缩（或库中仍有压缩正文）时，含压缩列的索引改为自存明文：
+        触发器只搬运明文列，压缩值由写入路径随后补上明文
+        (_index_compressed_content)。触发器因此不依赖 Python 注册的函数，
+        sqlite3 命令行、管理脚本或旧版代码写入 posts 时不会报错。
+        """
+        for fts_table, source, columns in FTS_TABLES:
+            compressed = COMPRESSED_COLUMNS.get(source, [])
+            
+            cursor = await db.execute(
+                "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?",
+                (fts_table,)
+            )
+            row = await cursor.fetchone()
+            exists = row is not None
+            
+            stores_text = False
+            if compressed:
+                stores_text = self.compress_content
+                if not stores_text and exists and "content=" not in row[0]:
+                    # 关闭压缩后仍有压缩正文时保持自存明文，解压迁移后再切回
+                    blob_filter = " OR ".join(f"typeof({col}) = 'blob'" for col in compressed)
+                    cursor = await db.execute(f"SELECT 1 FROM {source} WHERE {blob_filter} LIMIT 1")
+                    if await cursor.fetchone() is not None:
+                        stores_text = True
+                        logger.warning(
+                            f"{source} still holds compressed columns, run --decompress-content "
+                            f"before {fts_table} can switch back to external content"
+                        )
+            
+            content_option = "" if stores_text else f"content='{source}', content_rowid='rowid', "
+            if exists and (
+                ("content=" in row[0]) == stores_text
+                or f"content='{source}_fts_source'" in row[0]
+                or f"tokenize='{FTS_TOKENIZER}'" not in row[0]
+            ):
+                # 索引模式或分词器已变化（或为旧版经解压视图读取的索引），重建索引与触发器
+                await db.execute(f"DROP TABLE {fts_table}")
+                exists = False
+            if not exists:
+                for action in ("insert", "delete", "update"):
+                    await db.execute(f"DROP TRIGGER IF EXISTS trg_fts_{source}_{action}")
+                await db.execute(f"DROP VIEW IF EXISTS {source}_fts_source")
+            
+            column_list = ", ".join(columns)
+            changed = " OR ".join(f"OLD.{col} IS NOT NEW.{col}" for col in columns)
+            # trigram 本身按子串匹配，不需要前缀索引
+            prefix_option = "" if FTS_TRIGRAM else ",\n                    prefix='2 3'"
+            
+            await db.execute(f"""
+                CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5(
+                    {column_list},
+                    {content_option}tokenize='{FTS_TOKENIZER}'{prefix_option}
+                )
+            """)
+            
+            if stores_text:
+                def plain(col: str) -> str:
+                    # 压缩值不可读，先留空由写入路径补上明文
+                    if col in compressed:
+                        return f"CASE WHEN typeof(NEW.{col}) = 'blob' THEN NULL ELSE NEW.{col} END"
+                    return f"NEW.{col}"
+                
+                new_values = ", ".join(plain(col) for col in columns)
+                assignments = ", ".join(
+                    f"{col} = CASE WHEN typeof(NEW.{col}) = 'blob' THEN {col} ELSE NEW.{col} END"
+                    if col in compressed else f"{col} = NEW.{col}"
+                    for col in columns
+                )
+                delete_sql = f"DELETE FROM {fts_table} WHERE rowid = OLD.rowid;"
+                update_sql = f"UPDATE {fts_table} SET {assignments} WHERE rowid = NEW.rowid;"
+            else:
+                new_values = ", ".join(f"NEW.{col}" for col in columns)
+                old_values = ", ".join(f"OLD.{col}" for col in columns)
+                delete_sql = (
+                    f"INSERT INTO {fts_table} ({fts_table}, rowid, {column_list}) "
+                    f"VALUES ('delete', OLD.rowid, {old_values});"
+                )
+                update_sql = f"{delete_sql}\n                    INSERT INTO {fts_table} (rowid, {column_list}) VALUES (NEW.rowid, {new_values});"
+            
+            await db.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_fts_{source}_insert AFTER INSERT ON {source}
+                BEGIN
+                    INSERT INTO {fts_table} (rowid, {column_list}) VALUES (NEW.rowid, {new_values});
+                END
+            """)
+            await db.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_fts_{source}_delete AFTER DELETE ON {source}
+                BEGIN
+                    {delete_sql}
+                END
+            """)
+            await db.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_fts_{source}_update AFTER UPDATE OF {column_list} ON {source}
+                WHEN {changed}
+                BEGIN
+                    {update_sql}
+                END
+            """)
+            
+            if not exists:
+                if stores_text:
+                    select_list = ", ".join(
+                        f"decompress_text({col})" if col in compressed else col
+                        for col in columns
+                    )
+                    await db.execute(
+                        f"INSERT INTO {fts_table} (rowid, {column_list}) SELECT rowid, {select_list} FROM {source}"
+                    )
+                else:
+                    await db.execute(f"INSERT INTO {fts_table} ({fts_table}) VALUES ('rebuild')")
+                logger.info(f"Full-text index {fts_table} built")
+    
+    async def _index_compressed_content(self, db: aiosqlite.Connection, rows: List[Tuple[str, Any]]):
+        """
+        为压缩存储的正文补写全文索引明文
+        
+        触发器不解压正文，压缩值写入 posts 后由这里把明文写入 posts_fts。
+        
+        Args:
+            db: 写连接（与帖子写入在同一事务中）
+            rows: (帖子ID, 明文正文)，只需包含本次被压缩的帖子
+        """
+        if rows:
+            await db.executemany("""
+                UPDATE posts_fts SET content = ?
+                WHERE rowid = (SELECT rowid FROM posts WHERE id = ?)
+            """, [(content, post_id) for post_id, content in rows])
+    
+    async def _init_post_keywords_table(self, db: aiosqlite.Connection):
+        """初始化关键词倒排索引表 - 每个帖子的每个关键词一行"""
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS post_keywords (
+                keyword TEXT NOT NULL,
+                created_day TEXT,
+                post_id TEXT NOT NULL,
+                PRIMARY KEY (keyword, created_day, post_id)
+            ) WITHOUT ROWID
+        """)
+        
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_post_keywords_day ON post_keywords(created_day, keyword)")
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_post_keywords_post ON post_keywords(post_id, keyword)")
+        
+        await db.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_post_keywords_delete AFTER DELETE ON posts
+            BEGIN
+                DELETE FROM post_keywords WHERE post_id = OLD.id;
+            END
+        """)
+        
+        cursor = await db.execute("SELECT 1 FROM post_keywords LIMIT 1")
+        if await cursor.fetchone() is None:
+            cursor = await db.execute("""
+                SELECT id, keywords, created_day FROM posts
+                WHERE keywords IS NOT NULL AND keywords NOT IN ('', '[]')
+            """)
+            rows = [
+                (keyword, created_day, post_id)
+                for post_id, keywords, created_day in await cursor.fetchall()
+                for keyword in normalize_keywords(keywords)
+            ]
+            if rows:
+                await db.executemany("""
+                    INSERT OR IGNORE INTO post_keywords (keyword, created_day, post_id) VALUES (?, ?, ?)
+                """, rows)
+                logger.info(f"Backfilled {len(rows)} post keywords")
+    
+    async def _init_rollup_tables(self, db: aiosqlite.Connection):
+        """
+        初始化小时/天汇总表
+        
+        post_rollups_hourly 随采集批次增量累加，超过保留期的小时数据由
+        compact_rollups 合并进 post_rollups_daily。
+        """
+        measures = ",\n".join(
+            f"                {col} {'REAL' if col == 'importance_sum' else 'INTEGER'} DEFAULT 0"
+            for col in ROLLUP_MEASURES
+        )
+        for table, bucket in [("post_rollups_hourly", "hour"), ("post_rollups_daily", "day")]:
+            await db.execute(f"""
+                CREATE TABLE IF NOT EXISTS {table} (
+                    {bucket} TEXT NOT NULL,
+                    category TEXT NOT NULL DEFAULT '',
+                    submolt TEXT NOT NULL DEFAULT '',
+                    danger_bucket TEXT NOT NULL DEFAULT 'low',
+{measures},
+                    PRIMARY KEY ({bucket}, category, submolt, danger_bucket)
+                ) WITHOUT ROWID
+            """)
+        
+        cursor = await db.execute("SELECT 1 FROM post_rollups_hourly LIMIT 1")
+        if await cursor.fetchone() is not None:
+            return
+        cursor = await db.execute("SELECT 1 FROM post_rollups_daily LIMIT 1")
+        if await cursor.fetchone() is not None:
+            return
+        
+        bucket_case = " ".join(f"WHEN p.danger_score >= {lower} THEN '{name}'" for name, lower in DANGER_BUCKETS)
+        await db.execute(f"""
+            INSERT INTO post_rollups_hourly (
+                hour, category, submolt, danger_bucket, {", ".join(ROLLUP_MEASURES)}
+            )
+            SELECT
+                p.created_hour,
+                COALESCE(p.category, ''),
+                COALESCE(p.submolt, ''),
+                CASE {bucket_case} ELSE 'low' END AS bucket,
+                COUNT(*),
+                COALESCE(SUM(p.importance_score), 0),
+                SUM(p.is_top_news = 1),
+                SUM(p.sentiment = 'positive'),
+                SUM(p.sentiment = 'neutral'),
+                SUM(p.sentiment = 'negative'),
+                SUM(d.post_id IS NOT NULL)
+            FROM posts p
+            LEFT JOIN dangerous_posts d ON d.post_id = p.id
+            WHERE p.created_hour IS NOT NULL
+            GROUP BY p.created_hour, COALESCE(p.category, ''), COALESCE(p.submolt, ''), bucket
+        """)
+    
+    async def _init_maintenance_table(self, db: aiosqlite.Connection):
+        """初始化维护记录表 - 每个维护任务最近一次的执行时间与结果"""
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS maintenance_runs (
+                task TEXT PRIMARY KEY,
+                ran_at TEXT,
+                result TEXT
+            )
+        """)
+    
+    async def _init_crawl_state_table(self, db: aiosqlite.Connection):
+        """
+        初始化采集进度表 - 每个 sort/submolt 组合的高水位与续爬游标
+        
+        newest_* 是已完整覆盖的最新帖子；cursor 非空表示上一轮达到页数上限，
+        下一轮从 cursor 继续向旧翻页，直到遇到 newest_*，再把高水位推进到
+        pending_* （开始补洞时看到的最新帖子）。
+        """
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS crawl_state (
+                sort TEXT NOT NULL,
+                submolt TEXT NOT NULL DEFAULT '',
+                newest_id TEXT,
+                newest_created_at TEXT,
+                pending_id TEXT,
+                pending_created_at TEXT,
+                cursor TEXT,
+                pages INTEGER DEFAULT 0,
+                fetched INTEGER DEFAULT 0,
+                updated_at TEXT,
+                PRIMARY KEY (sort, submolt)
+            )
+        """)
+    
+    async def _init_comment_harvest_table(self, db: aiosqlite.Connection):
+        """
+        初始化评论采集队列 - 每个帖子下次抓取评论的时间
+        
+        新帖子由触发器入队：已有评论的立即到期，没有评论的延后
+        COMMENT_REVISIT_INTERVAL 秒。due_at 为空表示不再回访。
+        """
+        from core.config import settings
+        
+        cursor = await db.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'comment_harvest'"
+        )
+        exists = await cursor.fetchone() is not None
+        
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS comment_harvest (
+                post_id TEXT PRIMARY KEY,
+                comment_count INTEGER DEFAULT 0,
+                harvested INTEGER DEFAULT 0,
+                visits INTEGER DEFAULT 0,
+                harvested_at TEXT,
+                due_at TEXT
+            ) WITHOUT ROWID
+        """)
+        await db.execute("""
+            CREATE INDEX IF NOT EXISTS idx_comment_harvest_due
+            ON comment_harvest(due_at) WHERE due_at IS NOT NULL
+        """)
+        
+        delay = max(0, int(settings.COMMENT_REVISIT_INTERVAL))
+        due_at = (
+            "CASE WHEN {row}.comment_count > 0 "
+            "THEN strftime('%Y-%m-%dT%H:%M:%S', 'now', 'localtime') "
+            f"ELSE strftime('%Y-%m-%dT%H:%M:%S', 'now', 'localtime', '+{delay} seconds') END"
+        )
+        
+        if not exists:
+            await db.execute(f"""
+                INSERT INTO comment_harvest (post_id, comment_count, due_at)
+                SELECT id, 0, {due_at.format(row="posts")} FROM posts
+            """)
+        
+        # 延迟取自配置，每次启动重建触发器
+        await db.execute("DROP TRIGGER IF EXISTS trg_comment_harvest_enqueue")
+        await db.execute(f"""
+            CREATE TRIGGER trg_comment_harvest_enqueue AFTER INSERT ON posts
+            BEGIN
+                INSERT INTO comment_harvest (post_id, comment_count, due_at)
+                SELECT NEW.id, 0, {due_at.format(row="NEW")}
+                WHERE NOT EXISTS (SELECT 1 FROM comment_harvest WHERE post_id = NEW.id);
+            END
+        """)
+        await db.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_comment_harvest_delete AFTER DELETE ON posts
+            BEGIN
+                DELETE FROM comment_harvest WHERE post_id = OLD.id;
+            END
+        """)
+    
+    async def _upsert_rollups(self, db: aiosqlite.Connection, table: str, bucket: str, rows: List[tuple]):
+        """把增量累加进汇总表"""
+        columns = [bucket] + ROLLUP_DIMENSIONS + ROLLUP_MEASURES
+        updates = ", ".join(f"{col} = {col} + excluded.{col}" for col in ROLLUP_MEASURES)
+        await db.executemany(f"""
+            INSERT INTO {table} ({", ".join(columns)})
+            VALUES ({", ".join("?" for _ in columns)})
+            ON CONFLICT ({bucket}, {", ".join(ROLLUP_DIMENSIONS)}) DO UPDATE SET {updates}
+        """, rows)
+    
+    async def save_post(self, post_data: Dict[str, Any]) -> bool:
+        """保存帖子"""
+        content = self._encode_content(post_data.get("content"))
+        try:
+            async with self._write() as db:
+                await db.execute(f"""
+                    INSERT INTO posts (
+                        id, title, content, author_id, author_name, submolt,
+                        score, upvotes, downvotes, comment_count, created_at,
+                        parent_id, is_reply, url, fetched_at, created_day, created_hour
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(id) DO UPDATE SET {POST_UPSERT_FETCHED}
+                """, (
+                    post_data.get("id"),
+                    post_data.get("title"),
+                    content,
+                    post_data.get("author_id"),
+                    post_data.get("author_name"),
+                    post_data.get("submolt"),
+                    post_data.get("score", 0),
+                    post_data.get("upvotes", 0),
+                    post_data.get("downvotes", 0),
+                    post_data.get("comment_count", 0),
+                    post_data.get("created_at"),
+                    post_data.get("parent_id"),
+                    1 if post_data.get("parent_id") else 0,
+                    post_data.get("url"),
+                    int(datetime.now().timestamp()),
+                    *time_buckets(post_data.get("created_at"))
+                ))
+                if is_compressed(content):
+                    await self._index_compressed_content(db, [(post_data.get("id"), post_data.get("content"))])
+            return True
+        except Exception as e:
+            logger.error(f"Error saving post: {e}")
+            return False
+    
+    async def update_post_analysis(self, post_id: str, analysis_data: Dict[str, Any]) -> bool:
+        """更新帖子分析结果"""
+        keywords = normalize_keywords(analysis_data.get("keywords", []))
+        try:
+            async with self._write() as db:
+                await db.execute("""
+                    UPDATE posts SET
+                        category = ?,
+                        summary = ?,
+                        importance_score = ?,
+                        engagement_score = ?,
+                        is_top_news = ?,
+                        keywords = ?,
+                        sentiment = ?,
+                        danger_score = ?,
+                        danger_type = ?,
+                        analyzed = 1
+                    WHERE id = ?
+                """, (
+                    analysis_data.get("category", "other"),
+                    analysis_data.get("summary"),
+                    analysis_data.get("importance_score", 0),
+                    analysis_data.get("engagement_score", 0),
+                    1 if analysis_data.get("is_top_news") else 0,
+                    json.dumps(keywords, ensure_ascii=False),
+                    analysis_data.get("sentiment", "neutral"),
+                    analysis_data.get("danger_score", 0),
+                    analysis_data.get("danger_type", "无危险"),
+                    post_id
+                ))
+                
+                await db.execute("DELETE FROM post_keywords WHERE post_id = ?", (post_id,))
+                await db.executemany("""
+                    INSERT OR IGNORE INTO post_keywords (keyword, created_day, post_id)
+                    SELECT ?, created_day, id FROM posts WHERE id = ?
+                """, [(keyword, post_id) for keyword in keywords])
+            return True
+        except Exception as e:
+            logger.error(f"Error updating post analysis: {e}")
+            return False
+    
+    async def save_dangerous_post(self, post_data: Dict[str, Any]) -> bool:
+        """保存危险言论"""
+        try:
+            async with self._write() as db:
+                await db.execute("""
+                    INSERT OR REPLACE INTO dangerous_posts (
+                        post_id, danger_score, danger_type, detected_at, created_at, created_day
+                    ) VALUES (?, ?, ?, ?, ?, ?)
+                """, (
+                    post_data.get("id"),
+                    post_data.get("danger_score", 0),
+                    post_data.get("danger_type", "未知"),
+                    datetime.now().isoformat(),
+                    post_data.get("created_at"),
+                    time_buckets(post_data.get("created_at"))[0]
+                ))
+            return True
+        except Exception as e:
+            logger.error(f"Error saving dangerous post: {e}")
+            return False
     
     async def save_agent(self, agent_data: Dict[str, Any]) -> bool:
         """保存成员"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self._write() as db:
                 await db.execute("""
                     INSERT OR REPLACE INTO agents (
                         id, name, description, karma, follower_count, following_count,
@@ -305,7 +1504,6 @@ class Database:
                     agent_data.get("created_at"),
                     agent_data.get("last_active")
                 ))
-                await db.commit()
             return True
         except Exception as e:
             logger.error(f"Error saving agent: {e}")
@@ -314,7 +1512,7 @@ class Database:
     async def update_agent_analysis(self, agent_id: str, analysis_data: Dict[str, Any]) -> bool:
         """更新成员分析结果"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self._write() as db:
                 await db.execute("""
                     UPDATE agents SET
                         influence_score = ?,
@@ -328,16 +1526,99 @@ class Database:
                     str(analysis_data.get("expertise_areas", [])),
                     agent_id
                 ))
-                await db.commit()
             return True
         except Exception as e:
             logger.error(f"Error updating agent analysis: {e}")
             return False
     
+    async def get_agents_to_refresh(self, limit: int = 50) -> List[Record]:
+        """
+        获取需要刷新资料的成员
+        
+        从未拉取过资料的成员优先，其次按发帖数（活跃度）降序。
+        
+        Args:
+            limit: 返回数量
+            
+        Returns:
+            List[Record]: id、profile_hash、refresh_ttl
+        """
+        now = datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
+        async with self._read() as db:
+            cursor = await db.execute("""
+                SELECT id, profile_hash, refresh_ttl FROM agents
+                WHERE refresh_due IS NULL OR refresh_due <= ?
+                ORDER BY refresh_due IS NOT NULL, post_count DESC, refresh_due
+                LIMIT ?
+            """, (now, limit))
+            return await cursor.fetchall()
+    
+    async def update_agent_profiles(self, profiles: List[Dict[str, Any]]) -> int:
+        """
+        单事务写入一批刷新后的成员资料
+        
+        资料有变化的成员重置 analyzed，下一轮分析会按新的 karma/粉丝数
+        重新计算影响力；没有拉到资料的成员只推后 refresh_due。
+        
+        Args:
+            profiles: 每项包含 id、refresh_ttl、refresh_due，拉到资料时
+                另含 agent（字段同 save_agent）、profile_hash 与 changed
+                
+        Returns:
+            int: 资料有变化的成员数
+        """
+        refreshed_at = datetime.now().isoformat()
+        updated = []
+        rescheduled = []
+        
+        for profile in profiles:
+            agent = profile.get("agent")
+            if agent is None:
+                rescheduled.append((profile["refresh_ttl"], profile["refresh_due"], profile["id"]))
+                continue
+            updated.append((
+                agent.get("name") or "匿名",
+                agent.get("description", ""),
+                agent.get("karma", 0),
+                agent.get("follower_count", 0),
+                agent.get("following_count", 0),
+                1 if agent.get("is_claimed") else 0,
+                1 if agent.get("is_active", True) else 0,
+                agent.get("created_at"),
+                agent.get("last_active"),
+                1 if profile.get("changed") else 0,
+                profile["profile_hash"],
+                refreshed_at,
+                profile["refresh_ttl"],
+                profile["refresh_due"],
+                profile["id"]
+            ))
+        
+        async with self._write() as db:
+            if updated:
+                await db.executemany("""
+                    UPDATE agents SET
+                        name = ?, description = ?, karma = ?, follower_count = ?, following_count = ?,
+                        is_claimed = ?, is_active = ?, created_at = ?, last_active = ?,
+                        analyzed = CASE WHEN ? THEN 0 ELSE analyzed END,
+                        profile_hash = ?, last_refreshed = ?, refresh_ttl = ?, refresh_due = ?
+                    WHERE id = ?
+                """, updated)
+            if rescheduled:
+                await db.executemany(
+                    "UPDATE agents SET refresh_ttl = ?, refresh_due = ? WHERE id = ?",
+                    rescheduled
+                )
+        
+        return sum(
+            1 for profile in profiles
+            if profile.get("agent") is not None and profile.get("changed")
+        )
+    
     async def increment_agent_post_count(self, agent_id: str, is_danger: bool = False) -> bool:
         """增加成员发帖计数"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self._write() as db:
                 if is_danger:
                     await db.execute("""
                         UPDATE agents SET 
@@ -350,7 +1631,6 @@ class Database:
                         UPDATE agents SET post_count = post_count + 1
                         WHERE id = ?
                     """, (agent_id,))
-                await db.commit()
             return True
         except Exception as e:
             logger.error(f"Error incrementing agent post count: {e}")
@@ -359,7 +1639,7 @@ class Database:
     async def save_interaction(self, interaction_data: Dict[str, Any]) -> bool:
         """保存互动记录"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self._write() as db:
                 await db.execute("""
                     INSERT OR IGNORE INTO interactions (
                         id, from_agent_id, to_agent_id, post_id, interaction_type, created_at
@@ -372,16 +1652,188 @@ class Database:
                     interaction_data.get("interaction_type"),
                     interaction_data.get("created_at")
                 ))
-                await db.commit()
             return True
         except Exception as e:
             logger.error(f"Error saving interaction: {e}")
             return False
     
+    async def get_due_comment_harvests(self, limit: int = 50) -> List[Record]:
+        """
+        获取到期的评论采集任务，评论多的帖子优先
+        
+        Args:
+            limit: 返回数量
+            
+        Returns:
+            List[Record]: post_id、author_id、created_at、comment_count、visits
+        """
+        now = datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
+        async with self._read() as db:
+            cursor = await db.execute("""
+                SELECT h.post_id, p.author_id, p.created_at,
+                       MAX(COALESCE(p.comment_count, 0), h.comment_count) AS comment_count, h.visits
+                FROM comment_harvest h
+                JOIN posts p ON p.id = h.post_id
+                WHERE h.due_at IS NOT NULL AND h.due_at <= ?
+                ORDER BY comment_count DESC, h.due_at
+                LIMIT ?
+            """, (now, limit))
+            return await cursor.fetchall()
+    
+    async def get_existing_interaction_ids(self, interaction_ids: List[str]) -> set:
+        """
+        已入库的互动 ID
+        
+        Args:
+            interaction_ids: 待检查的互动 ID
+            
+        Returns:
+            set: 其中已存在的 ID
+        """
+        existing = set()
+        async with self._read() as db:
+            for start in range(0, len(interaction_ids), 500):
+                chunk = interaction_ids[start:start + 500]
+                cursor = await db.execute(
+                    f"SELECT id FROM interactions WHERE id IN ({','.join('?' * len(chunk))})",
+                    chunk
+                )
+                existing.update(row[0] for row in await cursor.fetchall())
+        return existing
+    
+    async def ingest_interactions(
+        self,
+        interactions: List[Dict[str, Any]],
+        agents: List[Tuple[str, str]],
+        harvests: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        单事务批量写入评论采集结果
+        
+        互动以 INSERT OR IGNORE 写入，成员关系由触发器累加；评论作者只补
+        id/name，已有成员不覆盖。
+        
+        Args:
+            interactions: 互动数据列表（字段同 save_interaction）
+            agents: 评论作者 (id, name)
+            harvests: 每个帖子的采集结果，包含 post_id、comment_count、
+                harvested（本次新增的互动数）、due_at（下次回访时间，None 表示结束）
+                
+        Returns:
+            Dict: 写入行数及耗时 (毫秒)
+        """
+        started = time.perf_counter()
+        harvested_at = datetime.now().isoformat()
+        
+        async with self._write() as db:
+            if interactions:
+                await db.executemany("""
+                    INSERT OR IGNORE INTO interactions (
+                        id, from_agent_id, to_agent_id, post_id, interaction_type, created_at
+                    ) VALUES (?, ?, ?, ?, ?, ?)
+                """, [(
+                    i.get("id"),
+                    i.get("from_agent_id"),
+                    i.get("to_agent_id"),
+                    i.get("post_id"),
+                    i.get("interaction_type"),
+                    i.get("created_at")
+                ) for i in interactions])
+            
+            if agents:
+                await db.executemany("""
+                    INSERT INTO agents (id, name) VALUES (?, ?)
+                    ON CONFLICT(id) DO NOTHING
+                """, agents)
+            
+            if harvests:
+                await db.executemany("""
+                    UPDATE comment_harvest SET
+                        comment_count = MAX(comment_count, ?),
+                        harvested = harvested + ?,
+                        visits = visits + 1,
+                        harvested_at = ?,
+                        due_at = ?
+                    WHERE post_id = ?
+                """, [(
+                    h.get("comment_count", 0),
+                    h.get("harvested", 0),
+                    harvested_at,
+                    h.get("due_at"),
+                    h["post_id"]
+                ) for h in harvests])
+                await db.executemany(
+                    "UPDATE posts SET comment_count = ? WHERE id = ? AND comment_count < ?",
+                    [(h.get("comment_count", 0), h["post_id"], h.get("comment_count", 0)) for h in harvests]
+                )
+        
+        return {
+            "interactions": len(interactions),
+            "agents": len(agents),
+            "posts": len(harvests),
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 2)
+        }
+    
+    async def get_agent_relations(
+        self,
+        agent_ids: Optional[List[str]] = None,
+        limit: int = 500
+    ) -> List[Dict[str, Any]]:
+        """
+        获取成员关系边
+        
+        Args:
+            agent_ids: 只返回两端都在其中的边，None 表示不限
+            limit: 返回数量，按强度降序
+            
+        Returns:
+            List[Dict]: source、target、value（互动次数）
+        """
+        sql = "SELECT agent_id, related_agent_id, strength FROM agent_relations"
+        params: List[Any] = []
+        if agent_ids is not None:
+            if not agent_ids:
+                return []
+            placeholders = ",".join("?" * len(agent_ids))
+            sql += f" WHERE agent_id IN ({placeholders}) AND related_agent_id IN ({placeholders})"
+            params = list(agent_ids) * 2
+        sql += " ORDER BY strength DESC LIMIT ?"
+        params.append(limit)
+        
+        async with self._read() as db:
+            cursor = await db.execute(sql, params)
+            rows = await cursor.fetchall()
+        return [{"source": row[0], "target": row[1], "value": row[2]} for row in rows]
+    
+    async def get_agent_connections(self, agent_id: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        获取成员的关联成员，双向互动次数合并
+        
+        Args:
+            agent_id: 成员ID
+            limit: 返回数量
+            
+        Returns:
+            List[Dict]: agent_id、count
+        """
+        async with self._read() as db:
+            cursor = await db.execute("""
+                SELECT other, SUM(strength) AS count FROM (
+                    SELECT related_agent_id AS other, strength FROM agent_relations WHERE agent_id = ?
+                    UNION ALL
+                    SELECT agent_id AS other, strength FROM agent_relations WHERE related_agent_id = ?
+                )
+                GROUP BY other
+                ORDER BY count DESC
+                LIMIT ?
+            """, (agent_id, agent_id, limit))
+            rows = await cursor.fetchall()
+        return [{"agent_id": row[0], "count": row[1]} for row in rows]
+    
     async def save_news_item(self, news_data: Dict[str, Any]) -> bool:
         """保存新闻条目"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self._write() as db:
                 await db.execute("""
                     INSERT OR REPLACE INTO news_items (
                         id, post_id, title, summary, category, importance_score,
@@ -399,7 +1851,6 @@ class Database:
                     news_data.get("push_date"),
                     news_data.get("push_type")
                 ))
-                await db.commit()
             return True
         except Exception as e:
             logger.error(f"Error saving news item: {e}")
@@ -408,7 +1859,7 @@ class Database:
     async def save_push_record(self, record_data: Dict[str, Any]) -> bool:
         """保存推送记录"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self._write() as db:
                 await db.execute("""
                     INSERT OR REPLACE INTO push_records (
                         id, push_type, push_date, news_count, danger_count, success, error_message, pushed_at
@@ -423,84 +1874,322 @@ class Database:
                     record_data.get("error_message"),
                     record_data.get("pushed_at")
                 ))
-                await db.commit()
             return True
         except Exception as e:
             logger.error(f"Error saving push record: {e}")
             return False
     
-    async def get_unanalyzed_posts(self, limit: int = 50) -> List[Dict[str, Any]]:
-        """获取未分析的帖子"""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            cursor = await db.execute("""
-                SELECT * FROM posts 
-                WHERE analyzed = 0 AND content IS NOT NULL AND length(content) >= 20
-                ORDER BY created_at DESC
-                LIMIT ?
-            """, (limit,))
-            rows = await cursor.fetchall()
-            return [dict(row) for row in rows]
-    
-    async def get_unanalyzed_agents(self, limit: int = 50) -> List[Dict[str, Any]]:
-        """获取未分析的成员"""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            cursor = await db.execute("""
-                SELECT * FROM agents 
-                WHERE analyzed = 0
-                ORDER BY karma DESC
-                LIMIT ?
-            """, (limit,))
-            rows = await cursor.fetchall()
-            return [dict(row) for row in rows]
-    
-    async def get_top_news(
-        self, 
-        category: Optional[str] = None, 
-        limit: int = 10,
-        date: Optional[str] = None,
-        start_time: Optional[str] = None,
-        end_time: Optional[str] = None
-    ) -> List[Dict[str, Any]]:
+    async def ingest_batch(
+        self,
+        posts: List[Dict[str, Any]],
+        analyses: List[Dict[str, Any]],
+        rejected_ids: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
         """
-        获取 Top 新闻
+        单事务批量写入一批采集结果
+        
+        帖子（含分析结果）、危险言论、成员以及成员计数均通过 executemany
+        在同一个事务内写入，整批只提交一次。已存在的帖子只覆盖内容与分析
+        结果，发帖数只累加本批新增的帖子，重复入库是幂等的；分析结果变化时
+        （如危险状态翻转），汇总表与成员危险计数把旧结果的贡献换成新结果的。
         
         Args:
-            category: 分类
-            limit: 数量限制
-            date: 日期
-            start_time: 开始时间 (ISO格式)
-            end_time: 结束时间 (ISO格式)
+            posts: 帖子数据列表（字段同 save_post）
+            analyses: 与 posts 一一对应的分析结果（字段同 update_post_analysis，
+                额外的 is_dangerous 标记是否写入危险言论表）
+            rejected_ids: 已分类但无需入库的帖子 ID，仅记入已见索引
+            
+        Returns:
+            Dict: 各表写入行数、新增帖子数 (new_posts) 及耗时 (毫秒)
         """
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
+        started = time.perf_counter()
+        fetched_at = int(datetime.now().timestamp())
+        detected_at = datetime.now().isoformat()
+        # 缺少发帖时间的帖子以采集时间代替，保证时间排序键非空
+        fallback_created_at = datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
+        
+        post_rows = []
+        # 危险言论与关键词按帖子 ID 记录，同一批内重复的帖子以最后一条为准
+        danger_rows: Dict[str, tuple] = {}
+        agent_rows = {}
+        keyword_rows: Dict[str, List[tuple]] = {}
+        # 被压缩的正文需要另写全文索引明文
+        fts_rows = []
+        # 每个帖子对计数与汇总的增量，写入时只累加确实新增的帖子
+        increments = []
+        seen_rows = [(post_id, 0, fetched_at) for post_id in rejected_ids or []]
+        
+        for post_data, analysis_data in zip(posts, analyses):
+            is_dangerous = bool(analysis_data.get("is_dangerous"))
+            created_at = post_data.get("created_at") or fallback_created_at
+            created_day, created_hour = time_buckets(created_at)
+            keywords = normalize_keywords(analysis_data.get("keywords", []))
+            keyword_rows[post_data.get("id")] = [(keyword, created_day, post_data.get("id")) for keyword in keywords]
             
-            query = "SELECT * FROM posts WHERE is_top_news = 1"
-            params = []
+            # 汇总维度不含小时：已存在的帖子沿用首次入库时的 created_hour
+            dimensions = (
+                analysis_data.get("category", "other") or "",
+                post_data.get("submolt") or "",
+                danger_bucket(analysis_data.get("danger_score", 0))
+            )
+            measures = rollup_measures(
+                analysis_data.get("importance_score", 0),
+                analysis_data.get("is_top_news"),
+                analysis_data.get("sentiment", "neutral"),
+                is_dangerous
+            )
             
-            if category:
-                query += " AND category = ?"
-                params.append(category)
+            content = self._encode_content(post_data.get("content"))
+            if is_compressed(content):
+                fts_rows.append((post_data.get("id"), post_data.get("content")))
+            post_rows.append((
+                post_data.get("id"),
+                post_data.get("title"),
+                content,
+                post_data.get("author_id"),
+                post_data.get("author_name"),
+                post_data.get("submolt"),
+                post_data.get("score", 0),
+                post_data.get("upvotes", 0),
+                post_data.get("downvotes", 0),
+                post_data.get("comment_count", 0),
+                created_at,
+                post_data.get("parent_id"),
+                1 if post_data.get("parent_id") else 0,
+                post_data.get("url"),
+                analysis_data.get("category", "other"),
+                analysis_data.get("summary"),
+                analysis_data.get("importance_score", 0),
+                analysis_data.get("engagement_score", 0),
+                1 if analysis_data.get("is_top_news") else 0,
+                json.dumps(keywords, ensure_ascii=False),
+                analysis_data.get("sentiment", "neutral"),
+                analysis_data.get("danger_score", 0),
+                analysis_data.get("danger_type", "无危险"),
+                fetched_at,
+                created_day,
+                created_hour
+            ))
+            seen_rows.append((post_data.get("id"), 1, fetched_at))
             
-            if date:
-                query += " AND date(created_at) = ?"
-                params.append(date)
+            if is_dangerous:
+                danger_rows[post_data.get("id")] = (
+                    post_data.get("id"),
+                    analysis_data.get("danger_score", 0),
+                    analysis_data.get("danger_type", "未知"),
+                    detected_at,
+                    created_at,
+                    created_day
+                )
+            else:
+                danger_rows.pop(post_data.get("id"), None)
             
-            if start_time:
-                query += " AND created_at >= ?"
-                params.append(start_time)
+            author_id = post_data.get("author_id")
+            if author_id:
+                agent_rows.setdefault(author_id, (author_id, post_data.get("author_name") or "匿名"))
+            increments.append((post_data.get("id"), created_hour, dimensions, measures, author_id, is_dangerous))
+        
+        async with self._write() as db:
+            # 在写事务内读出已存在帖子的旧状态：新帖子累加计数，重复采集的帖子
+            # 只把旧分析结果的贡献换成本次的（危险状态、分类、分桶可能变化）
+            existing: Dict[str, tuple] = {}
+            post_ids = list({row[0] for row in post_rows})
+            for start in range(0, len(post_ids), 500):
+                chunk = post_ids[start:start + 500]
+                cursor = await db.execute(f"""
+                    SELECT
+                        p.id, p.author_id, p.created_hour, COALESCE(p.category, ''), COALESCE(p.submolt, ''),
+                        p.danger_score, p.importance_score, p.is_top_news, p.sentiment, d.post_id IS NOT NULL
+                    FROM posts p
+                    LEFT JOIN dangerous_posts d ON d.post_id = p.id
+                    WHERE p.id IN ({','.join('?' * len(chunk))})
+                """, chunk)
+                existing.update((row[0], tuple(row[1:])) for row in await cursor.fetchall())
             
-            if end_time:
-                query += " AND created_at <= ?"
-                params.append(end_time)
+            # 同一批内重复的帖子以最后一条为准（与 upsert 的结果一致），小时取首条
+            first_hours: Dict[str, Optional[str]] = {}
+            latest: Dict[str, tuple] = {}
+            for post_id, created_hour, dimensions, measures, author_id, is_dangerous in increments:
+                first_hours.setdefault(post_id, created_hour)
+                latest[post_id] = (dimensions, measures, author_id, is_dangerous)
             
-            query += " ORDER BY importance_score DESC, created_at DESC LIMIT ?"
-            params.append(limit)
+            rollups: Dict[tuple, List[float]] = {}
+            agent_counts: Dict[str, List[int]] = {}
             
-            cursor = await db.execute(query, params)
-            rows = await cursor.fetchall()
-            return [dict(row) for row in rows]
+            def accumulate(key: tuple, values: tuple, sign: int = 1):
+                totals = rollups.setdefault(key, [0] * len(ROLLUP_MEASURES))
+                for i, value in enumerate(values):
+                    totals[i] += sign * value
+            
+            for post_id, (dimensions, measures, author_id, is_dangerous) in latest.items():
+                old = existing.get(post_id)
+                if old is None:
+                    if first_hours[post_id]:
+                        accumulate((first_hours[post_id],) + dimensions, measures)
+                    if author_id:
+                        counts = agent_counts.setdefault(author_id, [0, 0])
+                        counts[0] += 1
+                        counts[1] += 1 if is_dangerous else 0
+                    continue
+                
+                old_author, old_hour, category, submolt, score, importance, top_news, sentiment, was_dangerous = old
+                if old_hour:
+                    accumulate(
+                        (old_hour, category, submolt, danger_bucket(score)),
+                        rollup_measures(importance, top_news, sentiment, was_dangerous),
+                        -1
+                    )
+                    accumulate((old_hour,) + dimensions, measures)
+                if old_author and bool(is_dangerous) != bool(was_dangerous):
+                    # author_id 不随重复采集覆盖，危险计数记在原作者上
+                    counts = agent_counts.setdefault(old_author, [0, 0])
+                    counts[1] += 1 if is_dangerous else -1
+            
+            if post_rows:
+                await db.executemany(f"""
+                    INSERT INTO posts (
+                        id, title, content, author_id, author_name, submolt,
+                        score, upvotes, downvotes, comment_count, created_at,
+                        parent_id, is_reply, url,
+                        category, summary, importance_score, engagement_score,
+                        is_top_news, keywords, sentiment, danger_score, danger_type,
+                        analyzed, fetched_at, created_day, created_hour
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1, ?, ?, ?)
+                    ON CONFLICT(id) DO UPDATE SET {POST_UPSERT_FETCHED}, {POST_UPSERT_ANALYSIS}, analyzed = 1
+                """, post_rows)
+                await self._index_compressed_content(db, fts_rows)
+            
+            if existing:
+                # 重新入库的帖子以本次分析为准，先清掉旧的关键词与危险言论记录
+                existing_ids = [(post_id,) for post_id in existing]
+                await db.executemany("DELETE FROM post_keywords WHERE post_id = ?", existing_ids)
+                await db.executemany("DELETE FROM dangerous_posts WHERE post_id = ?", existing_ids)
+            
+            rollups = {key: totals for key, totals in rollups.items() if any(totals)}
+            if rollups:
+                await self._upsert_rollups(
+                    db, "post_rollups_hourly", "hour",
+                    [key + tuple(measures) for key, measures in rollups.items()]
+                )
+                # 旧贡献被全部移走的分组不再保留全零行
+                await db.executemany(f"""
+                    DELETE FROM post_rollups_hourly
+                    WHERE hour = ? AND category = ? AND submolt = ? AND danger_bucket = ?
+                        AND {" AND ".join(f"{col} = 0" for col in ROLLUP_MEASURES)}
+                """, [key for key, totals in rollups.items() if min(totals) < 0])
+            
+            if keyword_rows:
+                await db.executemany("""
+                    INSERT OR IGNORE INTO post_keywords (keyword, created_day, post_id) VALUES (?, ?, ?)
+                """, [row for rows in keyword_rows.values() for row in rows])
+            
+            if danger_rows:
+                await db.executemany("""
+                    INSERT OR REPLACE INTO dangerous_posts (
+                        post_id, danger_score, danger_type, detected_at, created_at, created_day
+                    ) VALUES (?, ?, ?, ?, ?, ?)
+                """, list(danger_rows.values()))
+            
+            if agent_rows:
+                await db.executemany("""
+                    INSERT INTO agents (id, name) VALUES (?, ?)
+                    ON CONFLICT(id) DO NOTHING
+                """, list(agent_rows.values()))
+            
+            if agent_counts:
+                await db.executemany("""
+                    UPDATE agents SET
+                        post_count = post_count + ?,
+                        danger_post_count = danger_post_count + ?
+                    WHERE id = ?
+                """, [(c[0], c[1], agent_id) for agent_id, c in agent_counts.items()])
+            
+            if seen_rows:
+                await db.executemany("""
+                    INSERT OR REPLACE INTO seen_posts (id, saved, seen_at) VALUES (?, ?, ?)
+                """, seen_rows)
+        
+        self.seen_posts.update(row[0] for row in seen_rows)
+        
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+        
+        return {
+            "posts": len(post_rows),
+            "new_posts": len(latest) - len(existing),
+            "dangerous_posts": len(danger_rows),
+            "agents": len(agent_rows),
+            "rejected": len(seen_rows) - len(post_rows),
+            "elapsed_ms": elapsed_ms
+        }
+    
+    async def get_unanalyzed_posts(self, limit: int = 50) -> List[Record]:
+        """获取未分析的帖子"""
+        async with self._read() as db:
+            cursor = await db.execute("""
+                SELECT * FROM posts 
+                WHERE analyzed = 0 AND content IS NOT NULL AND length(content) >= 20
+                ORDER BY created_at DESC
+                LIMIT ?
+            """, (limit,))
+            return await cursor.fetchall()
+    
+    async def get_unanalyzed_agents(self, limit: int = 50) -> List[Record]:
+        """获取未分析的成员"""
+        async with self._read() as db:
+            cursor = await db.execute("""
+                SELECT * FROM agents 
+                WHERE analyzed = 0
+                ORDER BY karma DESC
+                LIMIT ?
+            """, (limit,))
+            return await cursor.fetchall()
+    
+    async def get_top_news(
+        self, 
+        category: Optional[str] = None, 
+        limit: int = 10,
+        date: Optional[str] = None,
+        start_time: Optional[str] = None,
+        end_time: Optional[str] = None,
+        offset: int = 0,
+        columns: Optional[List[str]] = None
+    ) -> List[Record]:
+        """
+        获取 Top 新闻
+        
+        Args:
+            category: 分类
+            limit: 数量限制
+            date: 日期
+            start_time: 开始时间 (ISO格式)
+            end_time: 结束时间 (ISO格式)
+            offset: 偏移量（深分页请使用 get_news_page）
+            columns: 返回的列，None 表示全部
+        """
+        where = "is_top_news = 1"
+        params = []
+        
+        if category:
+            where += " AND category = ?"
+            params.append(category)
+        
+        if date:
+            where += " AND created_day = ?"
+            params.append(date)
+        
+        if start_time:
+            where += " AND created_at >= ?"
+            params.append(start_time)
+        
+        if end_time:
+            where += " AND created_at <= ?"
+            params.append(end_time)
+        
+        return await self._query_partitioned(
+            "posts", columns, where, params,
+            ["importance_score", "created_at"], limit, offset,
+            start=date or start_time, end=date or end_time
+        )
     
     async def get_dangerous_posts(
         self,
@@ -509,8 +2198,9 @@ class Database:
         limit: int = 20,
         date: Optional[str] = None,
         start_time: Optional[str] = None,
-        end_time: Optional[str] = None
-    ) -> List[Dict[str, Any]]:
+        end_time: Optional[str] = None,
+        columns: Optional[List[str]] = None
+    ) -> List[Record]:
         """
         获取危险言论
         
@@ -521,109 +2211,565 @@ class Database:
             date: 日期
             start_time: 开始时间 (ISO格式)
             end_time: 结束时间 (ISO格式)
+            columns: 返回的列，None 表示全部
         """
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            
-            query = "SELECT * FROM dangerous_posts WHERE danger_score >= ?"
-            params = [min_score]
-            
-            if max_score is not None:
-                query += " AND danger_score <= ?"
-                params.append(max_score)
-            
-            if date:
-                query += " AND date(created_at) = ?"
-                params.append(date)
-            
-            if start_time:
-                query += " AND created_at >= ?"
-                params.append(start_time)
-            
-            if end_time:
-                query += " AND created_at <= ?"
-                params.append(end_time)
-            
-            query += " ORDER BY danger_score DESC, created_at DESC LIMIT ?"
-            params.append(limit)
-            
-            cursor = await db.execute(query, params)
-            rows = await cursor.fetchall()
-            return [dict(row) for row in rows]
+        where = "danger_score >= ?"
+        params = [min_score]
+        
+        if max_score is not None:
+            where += " AND danger_score <= ?"
+            params.append(max_score)
+        
+        if date:
+            where += " AND created_day = ?"
+            params.append(date)
+        
+        if start_time:
+            where += " AND created_at >= ?"
+            params.append(start_time)
+        
+        if end_time:
+            where += " AND created_at <= ?"
+            params.append(end_time)
+        
+        return await self._query_partitioned(
+            "dangerous_post_details", columns, where, params,
+            ["danger_score", "created_at"], limit,
+            start=date or start_time, end=date or end_time
+        )
+    
+    async def _query_partitioned(
+        self,
+        table: str,
+        columns: Optional[List[str]],
+        where: str,
+        params: List[Any],
+        order_columns: List[str],
+        limit: int,
+        offset: int = 0,
+        start: Optional[str] = None,
+        end: Optional[str] = None
+    ) -> List[Record]:
+        """
+        在热库及时间范围涉及的归档分区上执行同一查询，按排序键合并
+        
+        未指定时间范围时只查热库。每个分区各取前 limit + offset 行，
+        合并后再分页。
+        
+        Args:
+            table: 表或视图名
+            columns: 返回的列，None 表示全部
+            where: WHERE 条件
+            params: 条件参数
+            order_columns: 降序排序列
+            limit: 数量限制
+            offset: 偏移量
+            start: 时间范围起点（日期或 ISO 时间）
+            end: 时间范围终点（日期或 ISO 时间）
+        """
+        months = months_in_range(self._partition_months, start, end) if (start or end) else []
+        order_by = ", ".join(f"{col} DESC" for col in order_columns)
+        
+        if not months:
+            async with self._read() as db:
+                cursor = await db.execute(
+                    f"SELECT {self._projection(table, columns)} FROM {table} "
+                    f"WHERE {where} ORDER BY {order_by} LIMIT ? OFFSET ?",
+                    list(params) + [limit, offset]
+                )
+                return await cursor.fetchall()
+        
+        # 分区表结构可能落后于热库，显式列出列名
+        projection = self._projection(table, columns or self._table_columns.get(table), required=order_columns)
+        rows = []
+        async with self._read() as db:
+            for month in [None] + months:
+                schema = "main" if month is None else await self._attach_partition(db, month)
+                cursor = await db.execute(
+                    f"SELECT {projection} FROM {schema}.{table} "
+                    f"WHERE {where} ORDER BY {order_by} LIMIT ?",
+                    list(params) + [limit + offset]
+                )
+                rows.extend(await cursor.fetchall())
+        
+        # 与 SQLite 降序一致: NULL 排在最后
+        rows.sort(key=lambda row: tuple((row[col] is not None, row[col]) for col in order_columns), reverse=True)
+        return rows[offset:offset + limit]
+    
+    async def _attach_partition(self, db: aiosqlite.Connection, month: str) -> str:
+        """
+        在读连接上按需 ATTACH 月份分区，超出上限时淘汰最久未用的分区
+        
+        Returns:
+            str: 分区的 schema 名
+        """
+        attached = self._attached.setdefault(id(db), OrderedDict())
+        alias = partition_alias(month)
+        path = partition_path(self.archive_dir, month)
+        inode = os.stat(path).st_ino
+        
+        if alias in attached:
+            if attached[alias] == inode:
+                attached.move_to_end(alias)
+                return alias
+            # 分区文件已被替换
+            await self._detach_alias(db, alias)
+        
+        while len(attached) >= self.archive_max_attached:
+            await self._detach_alias(db, next(iter(attached)))
+        
+        await db.execute(f"ATTACH DATABASE ? AS {alias}", (str(path),))
+        attached[alias] = inode
+        return alias
+    
+    async def _detach_alias(self, db: aiosqlite.Connection, alias: str):
+        """在连接上 DETACH 分区，成功后才移除记录，保证记录与实际状态一致"""
+        attached = self._attached.get(id(db))
+        if not attached or alias not in attached:
+            return
+        await db.execute(f"DETACH DATABASE {alias}")
+        del attached[alias]
     
-    async def get_key_persons(self, limit: int = 20) -> List[Dict[str, Any]]:
+    async def get_key_persons(self, limit: int = 20, columns: Optional[List[str]] = None) -> List[Record]:
         """获取关键人物"""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            cursor = await db.execute("""
-                SELECT * FROM agents 
+        async with self._read() as db:
+            cursor = await db.execute(f"""
+                SELECT {self._projection('agents', columns)} FROM agents 
                 WHERE is_key_person = 1
                 ORDER BY influence_score DESC
                 LIMIT ?
             """, (limit,))
-            rows = await cursor.fetchall()
-            return [dict(row) for row in rows]
+            return await cursor.fetchall()
     
-    async def get_dangerous_agents(self, limit: int = 20) -> List[Dict[str, Any]]:
+    async def get_dangerous_agents(self, limit: int = 20, columns: Optional[List[str]] = None) -> List[Record]:
         """获取发布危险言论的成员"""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            cursor = await db.execute("""
-                SELECT * FROM agents 
+        async with self._read() as db:
+            cursor = await db.execute(f"""
+                SELECT {self._projection('agents', columns)} FROM agents 
                 WHERE danger_post_count > 0
                 ORDER BY danger_post_count DESC
                 LIMIT ?
             """, (limit,))
-            rows = await cursor.fetchall()
-            return [dict(row) for row in rows]
+            return await cursor.fetchall()
     
     async def get_stats(self, date: Optional[str] = None) -> Dict[str, int]:
-        """获取统计数据"""
-        async with aiosqlite.connect(self.db_path) as db:
-            stats = {}
-            
-            cursor = await db.execute("SELECT COUNT(*) FROM posts")
-            stats["total_posts"] = (await cursor.fetchone())[0]
-            
-            cursor = await db.execute("SELECT COUNT(*) FROM posts WHERE analyzed = 1")
-            stats["analyzed_posts"] = (await cursor.fetchone())[0]
+        """获取统计数据（读取触发器维护的计数器）"""
+        async with self._read() as db:
+            cursor = await db.execute(
+                "SELECT name, day, value FROM stats_counters WHERE day = '' OR day = ?",
+                (date or "",)
+            )
+            rows = await cursor.fetchall()
+        
+        stats = {name: 0 for name, _, _ in STAT_COUNTERS}
+        daily = {}
+        for name, day, value in rows:
+            if day:
+                daily[name] = value
+            else:
+                stats[name] = value
+        
+        if date:
+            stats["today_posts"] = daily.get("posts", 0)
+            stats["today_dangerous"] = daily.get("dangerous_posts", 0)
+        
+        return stats
+    
+    async def migrate_content_compression(self, compress: bool = True, batch_size: int = 500) -> Dict[str, Any]:
+        """
+        一次性压缩（或解压）存量帖子正文
+        
+        按 rowid 分批处理，每批一个写事务；正文文本不变，全文索引不会重建。
+        释放出的页面需 VACUUM 后才会归还文件系统。压缩要求开启
+        CONTENT_COMPRESSION，此时全文索引自存明文，不依赖源表中的正文。
+        
+        Args:
+            compress: True 压缩明文正文，False 把压缩正文还原为明文
+            batch_size: 每批行数
             
-            cursor = await db.execute("SELECT COUNT(*) FROM agents")
-            stats["total_agents"] = (await cursor.fetchone())[0]
+        Returns:
+            Dict: 更新行数及耗时 (毫秒)；未开启 CONTENT_COMPRESSION 时请求压缩
+            抛出 ValueError
+        """
+        if compress and not self.compress_content:
+            raise ValueError("CONTENT_COMPRESSION must be enabled before compressing stored content")
+        started = time.perf_counter()
+        source_type = "text" if compress else "blob"
+        last_rowid = 0
+        updated = 0
+        
+        while True:
+            async with self._read() as db:
+                cursor = await db.execute("""
+                    SELECT rowid, content FROM posts
+                    WHERE rowid > ? AND typeof(content) = ?
+                    ORDER BY rowid
+                    LIMIT ?
+                """, (last_rowid, source_type, batch_size))
+                rows = await cursor.fetchall()
             
-            cursor = await db.execute("SELECT COUNT(*) FROM agents WHERE is_key_person = 1")
-            stats["key_persons"] = (await cursor.fetchone())[0]
+            if not rows:
+                break
+            last_rowid = rows[-1][0]
             
-            cursor = await db.execute("SELECT COUNT(*) FROM posts WHERE is_top_news = 1")
-            stats["top_news"] = (await cursor.fetchone())[0]
+            # 读连接已把压缩正文解压为明文
+            updates = []
+            for rowid, content in rows:
+                if compress:
+                    content = compress_text(content, self.compress_min_bytes, self.compress_level)
+                    if not is_compressed(content):
+                        continue
+                updates.append((content, rowid))
             
-            cursor = await db.execute("SELECT COUNT(*) FROM interactions")
-            stats["interactions"] = (await cursor.fetchone())[0]
+            if updates:
+                async with self._write() as db:
+                    await db.executemany(
+                        f"UPDATE posts SET content = ? WHERE rowid = ? AND typeof(content) = '{source_type}'",
+                        updates
+                    )
+                updated += len(updates)
+        
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+        logger.info(f"Content {'compression' if compress else 'decompression'} finished: {updated} posts in {elapsed_ms}ms")
+        return {"updated": updated, "elapsed_ms": elapsed_ms}
+    
+    async def get_content_stats(self) -> Dict[str, Any]:
+        """
+        正文存储统计
+        
+        Returns:
+            Dict: 帖子数、压缩帖子数、原文/实际存储字节数、压缩比及数据库文件大小
+        """
+        async with self._read() as db:
+            cursor = await db.execute("""
+                SELECT
+                    COUNT(*),
+                    COALESCE(SUM(typeof(content) = 'blob'), 0),
+                    COALESCE(SUM(text_size(content)), 0),
+                    COALESCE(SUM(length(CAST(content AS BLOB))), 0)
+                FROM posts
+            """)
+            posts, compressed, raw_bytes, stored_bytes = await cursor.fetchone()
             
-            cursor = await db.execute("SELECT COUNT(*) FROM dangerous_posts")
-            stats["dangerous_posts"] = (await cursor.fetchone())[0]
+            page_size = (await (await db.execute("PRAGMA page_size")).fetchone())[0]
+            page_count = (await (await db.execute("PRAGMA page_count")).fetchone())[0]
+            free_pages = (await (await db.execute("PRAGMA freelist_count")).fetchone())[0]
+        
+        return {
+            "posts": posts,
+            "compressed_posts": compressed,
+            "raw_bytes": raw_bytes,
+            "stored_bytes": stored_bytes,
+            "saved_bytes": raw_bytes - stored_bytes,
+            "ratio": round(stored_bytes / raw_bytes, 3) if raw_bytes else 1.0,
+            "db_bytes": page_size * page_count,
+            "free_bytes": page_size * free_pages
+        }
+    
+    async def checkpoint(self, mode: str = "PASSIVE") -> Dict[str, int]:
+        """
+        执行 WAL 检查点
+        
+        Args:
+            mode: PASSIVE / FULL / RESTART / TRUNCATE
             
-            cursor = await db.execute("SELECT COUNT(*) FROM agents WHERE danger_post_count > 0")
-            stats["dangerous_agents"] = (await cursor.fetchone())[0]
+        Returns:
+            Dict: busy（是否被读事务阻挡）、WAL 帧数、已写回帧数
+        """
+        mode = mode.upper()
+        if mode not in ("PASSIVE", "FULL", "RESTART", "TRUNCATE"):
+            raise ValueError(f"Unknown checkpoint mode: {mode}")
+        
+        async with self._write(exclusive=True) as db:
+            cursor = await db.execute(f"PRAGMA wal_checkpoint({mode})")
+            busy, log_frames, checkpointed = await cursor.fetchone()
+        return {"busy": busy, "log_frames": log_frames, "checkpointed_frames": checkpointed}
+    
+    async def incremental_vacuum(self, max_pages: int = 1024) -> int:
+        """
+        归还至多 max_pages 个空闲页，仅在 auto_vacuum=INCREMENTAL 时生效
+        
+        Returns:
+            int: 归还的页数
+        """
+        async with self._write(exclusive=True) as db:
+            cursor = await db.execute("PRAGMA auto_vacuum")
+            if (await cursor.fetchone())[0] != 2:
+                return 0
+            cursor = await db.execute("PRAGMA freelist_count")
+            before = (await cursor.fetchone())[0]
+            if before == 0:
+                return 0
+            # 该 PRAGMA 每次 step 只归还一页，execute 只会 step 一次；
+            # executescript 会执行到底，但会先提交未完成的事务，故放在独立写入中
+            await db.executescript(f"PRAGMA incremental_vacuum({int(max_pages)})")
+            cursor = await db.execute("PRAGMA freelist_count")
+            after = (await cursor.fetchone())[0]
+        return before - after
+    
+    async def enable_incremental_vacuum(self) -> Dict[str, Any]:
+        """
+        把旧库切换为增量 auto_vacuum 并整理一次
+        
+        需要完整 VACUUM，执行期间写入排队等待，只应在维护窗口手动执行。
+        """
+        started = time.perf_counter()
+        async with self._write(exclusive=True) as db:
+            await db.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            await db.execute("VACUUM")
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+        logger.info(f"Database vacuumed with incremental auto_vacuum in {elapsed_ms}ms")
+        return {"elapsed_ms": elapsed_ms}
+    
+    async def optimize(self, analyze: bool = False, analysis_limit: int = 1000) -> Dict[str, Any]:
+        """
+        更新查询规划器统计信息
+        
+        Args:
+            analyze: True 时对全部表执行 ANALYZE，否则执行 PRAGMA optimize
+                （只分析统计信息过期的表）
+            analysis_limit: 每个索引采样的行数上限，避免大表上长时间占用写连接
+        """
+        started = time.perf_counter()
+        async with self._write() as db:
+            await db.execute(f"PRAGMA analysis_limit={int(analysis_limit)}")
+            await db.execute("ANALYZE" if analyze else "PRAGMA optimize")
+        return {"analyze": analyze, "elapsed_ms": round((time.perf_counter() - started) * 1000, 2)}
+    
+    async def backup(
+        self,
+        directory: Optional[str] = None,
+        pages_per_step: int = 1024,
+        step_sleep_ms: int = 5,
+        keep: int = 7
+    ) -> Dict[str, Any]:
+        """
+        使用 SQLite 在线备份 API 分步备份数据库
+        
+        在独立连接上进行，全程固定在同一读快照，WAL 模式下不阻塞写入；
+        每步复制 pages_per_step 页后暂停 step_sleep_ms 毫秒。先写入临时
+        文件，完成后改名，只保留最近 keep 份。
+        
+        归档目录中的月份分区（不含已移出查询范围的 detached/）在热库之后
+        备份到同名的 -archive 目录：归档先写分区再删热库，热库快照之后
+        迁出的帖子一定已在分区里，恢复时最多出现重复行。
+        
+        Returns:
+            Dict: 备份文件路径、大小、页数、步数、分区备份及耗时 (毫秒)
+        """
+        from core.config import settings
+        target_dir = Path(directory or settings.BACKUP_DIR)
+        target_dir.mkdir(parents=True, exist_ok=True)
+        stem = Path(self.db_path).stem
+        target = target_dir / f"{stem}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.db"
+        pages_per_step = max(1, pages_per_step)
+        step_sleep = max(0, step_sleep_ms) / 1000
+        
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(
+            None, self._backup_sync, Path(self.db_path), target, pages_per_step, step_sleep
+        )
+        
+        partitions = []
+        archive_target = target.with_name(f"{target.stem}-archive")
+        for month in list_partition_months(self.archive_dir):
+            archive_target.mkdir(exist_ok=True)
+            source = partition_path(self.archive_dir, month)
+            partitions.append(await loop.run_in_executor(
+                None, self._backup_sync, source, archive_target / source.name, pages_per_step, step_sleep
+            ))
+        result["partitions"] = len(partitions)
+        result["partition_bytes"] = sum(item["bytes"] for item in partitions)
+        
+        backups = sorted(target_dir.glob(f"{stem}-*.db"))
+        for old in backups[:max(0, len(backups) - max(1, keep))]:
+            old.unlink(missing_ok=True)
+            shutil.rmtree(old.with_name(f"{old.stem}-archive"), ignore_errors=True)
+        
+        logger.info(
+            f"Database backed up to {target} ({result['bytes']} bytes, {result['steps']} steps, "
+            f"{len(partitions)} partitions)"
+        )
+        return result
+    
+    def _backup_sync(self, source_path: Path, target: Path, pages_per_step: int, step_sleep: float) -> Dict[str, Any]:
+        """在线程中执行备份"""
+        started = time.perf_counter()
+        tmp_path = target.with_suffix(".tmp")
+        steps = 0
+        total_pages = 0
+        
+        def progress(status, remaining, total):
+            nonlocal steps, total_pages
+            steps += 1
+            total_pages = total
+        
+        source = sqlite3.connect(str(source_path))
+        dest = sqlite3.connect(str(tmp_path))
+        try:
+            # 固定读快照，其他连接的提交不会导致备份重新开始
+            source.execute("BEGIN")
+            source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+            source.backup(dest, pages=pages_per_step, progress=progress, sleep=step_sleep)
+            source.rollback()
+            dest.execute("PRAGMA journal_mode=DELETE")
+        finally:
+            dest.close()
+            source.close()
+        
+        os.replace(tmp_path, target)
+        return {
+            "path": str(target),
+            "bytes": target.stat().st_size,
+            "pages": total_pages,
+            "steps": steps,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 2)
+        }
+    
+    async def record_maintenance(self, task: str, result: Dict[str, Any]):
+        """记录维护任务的执行时间与结果"""
+        async with self._write() as db:
+            await db.execute(
+                "INSERT OR REPLACE INTO maintenance_runs (task, ran_at, result) VALUES (?, ?, ?)",
+                (task, datetime.now().isoformat(), json.dumps(result, ensure_ascii=False))
+            )
+    
+    async def get_crawl_state(self, sort: str, submolt: str = "") -> Optional[Record]:
+        """
+        获取采集进度
+        
+        Args:
+            sort: 排序方式
+            submolt: 社区分区，空字符串表示全站
             
-            if date:
-                cursor = await db.execute(
-                    "SELECT COUNT(*) FROM dangerous_posts WHERE date(created_at) = ?",
-                    (date,)
-                )
-                stats["today_dangerous"] = (await cursor.fetchone())[0]
+        Returns:
+            Record: 采集进度，没有记录时返回 None
+        """
+        async with self._read() as db:
+            cursor = await db.execute(
+                "SELECT * FROM crawl_state WHERE sort = ? AND submolt = ?",
+                (sort, submolt or "")
+            )
+            return await cursor.fetchone()
+    
+    async def save_crawl_state(self, state: Dict[str, Any]) -> bool:
+        """
+        保存采集进度，pages/fetched 为累计值
+        
+        Args:
+            state: 包含 sort、submolt、newest_*、pending_*、cursor、pages、fetched
             
-            return stats
+        Returns:
+            bool: 是否成功
+        """
+        try:
+            async with self._write() as db:
+                await db.execute("""
+                    INSERT INTO crawl_state
+                    (sort, submolt, newest_id, newest_created_at, pending_id, pending_created_at,
+                     cursor, pages, fetched, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(sort, submolt) DO UPDATE SET
+                        newest_id = excluded.newest_id,
+                        newest_created_at = excluded.newest_created_at,
+                        pending_id = excluded.pending_id,
+                        pending_created_at = excluded.pending_created_at,
+                        cursor = excluded.cursor,
+                        pages = crawl_state.pages + excluded.pages,
+                        fetched = crawl_state.fetched + excluded.fetched,
+                        updated_at = excluded.updated_at
+                """, (
+                    state["sort"],
+                    state.get("submolt") or "",
+                    state.get("newest_id"),
+                    state.get("newest_created_at"),
+                    state.get("pending_id"),
+                    state.get("pending_created_at"),
+                    state.get("cursor"),
+                    state.get("pages", 0),
+                    state.get("fetched", 0),
+                    datetime.now().isoformat()
+                ))
+            return True
+        except Exception as e:
+            logger.error(f"Error saving crawl state: {e}")
+            return False
+    
+    async def get_maintenance_runs(self) -> Dict[str, Dict[str, Any]]:
+        """各维护任务最近一次的执行记录"""
+        async with self._read() as db:
+            cursor = await db.execute("SELECT task, ran_at, result FROM maintenance_runs")
+            rows = await cursor.fetchall()
+        
+        runs = {}
+        for task, ran_at, result in rows:
+            try:
+                detail = json.loads(result) if result else {}
+            except ValueError:
+                detail = {}
+            runs[task] = {"ran_at": ran_at, "result": detail}
+        return runs
+    
+    async def get_health(self) -> Dict[str, Any]:
+        """
+        数据库健康指标
+        
+        Returns:
+            Dict: 页数、空闲页、文件/WAL 大小、auto_vacuum 模式、写入批次统计
+                及各维护任务最近一次的执行记录（含检查点、备份）
+        """
+        async with self._read() as db:
+            pragmas = {}
+            for name in ("page_size", "page_count", "freelist_count", "auto_vacuum", "journal_mode"):
+                cursor = await db.execute(f"PRAGMA {name}")
+                pragmas[name] = (await cursor.fetchone())[0]
+        
+        wal_path = Path(f"{self.db_path}-wal")
+        return {
+            "page_size": pragmas["page_size"],
+            "page_count": pragmas["page_count"],
+            "freelist_count": pragmas["freelist_count"],
+            "db_bytes": pragmas["page_size"] * pragmas["page_count"],
+            "free_bytes": pragmas["page_size"] * pragmas["freelist_count"],
+            "wal_bytes": wal_path.stat().st_size if wal_path.exists() else 0,
+            "auto_vacuum": {0: "none", 1: "full", 2: "incremental"}.get(pragmas["auto_vacuum"], pragmas["auto_vacuum"]),
+            "journal_mode": pragmas["journal_mode"],
+            "write_stats": dict(self.write_stats),
+            "maintenance": await self.get_maintenance_runs()
+        }
     
     async def post_exists(self, post_id: str) -> bool:
         """检查帖子是否存在"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._read() as db:
             cursor = await db.execute("SELECT 1 FROM posts WHERE id = ?", (post_id,))
             return await cursor.fetchone() is not None
     
+    def is_post_seen(self, post_id: str) -> bool:
+        """检查帖子是否已被分类过（内存检查，不访问数据库）"""
+        return post_id in self.seen_posts
+    
+    async def load_seen_posts(self) -> int:
+        """
+        从 seen_posts 表加载最近的已见帖子到内存索引
+        
+        Returns:
+            int: 加载数量
+        """
+        async with self._read() as db:
+            cursor = await db.execute("""
+                SELECT id FROM seen_posts
+                ORDER BY seen_at DESC
+                LIMIT ?
+            """, (self.seen_posts.capacity,))
+            rows = await cursor.fetchall()
+        
+        self.seen_posts.clear()
+        self.seen_posts.update(row[0] for row in reversed(rows))
+        return len(rows)
+    
     async def agent_exists(self, agent_id: str) -> bool:
         """检查成员是否存在"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._read() as db:
             cursor = await db.execute("SELECT 1 FROM agents WHERE id = ?", (agent_id,))
             return await cursor.fetchone() is not None
     
@@ -631,7 +2777,7 @@ class Database:
         self, 
         limit: int = 30,
         date: Optional[str] = None
-    ) -> List[Dict[str, Any]]:
+    ) -> List[Record]:
         """
         获取推送记录列表
         
@@ -639,9 +2785,7 @@ class Database:
             limit: 数量限制
             date: 日期筛选
         """
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            
+        async with self._read() as db:
             query = "SELECT * FROM push_records WHERE success = 1"
             params = []
             
@@ -653,46 +2797,786 @@ class Database:
             params.append(limit)
             
             cursor = await db.execute(query, params)
-            rows = await cursor.fetchall()
-            return [dict(row) for row in rows]
+            return await cursor.fetchall()
     
-    async def get_push_record_by_id(self, push_id: str) -> Optional[Dict[str, Any]]:
+    async def get_push_record_by_id(self, push_id: str) -> Optional[Record]:
         """
         根据ID获取推送记录
         
         Args:
             push_id: 推送记录ID
         """
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
+        async with self._read() as db:
             cursor = await db.execute(
                 "SELECT * FROM push_records WHERE id = ?",
                 (push_id,)
             )
-            row = await cursor.fetchone()
-            return dict(row) if row else None
+            return await cursor.fetchone()
     
     async def get_all_agents(
         self, 
         limit: int = 20, 
-        offset: int = 0
-    ) -> List[Dict[str, Any]]:
+        offset: int = 0,
+        columns: Optional[List[str]] = None
+    ) -> List[Record]:
         """
         获取所有成员
         
         Args:
             limit: 数量限制
             offset: 偏移量
+            columns: 返回的列，None 表示全部
         """
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            cursor = await db.execute("""
-                SELECT * FROM agents 
+        async with self._read() as db:
+            cursor = await db.execute(f"""
+                SELECT {self._projection('agents', columns)} FROM agents 
                 ORDER BY influence_score DESC
                 LIMIT ? OFFSET ?
             """, (limit, offset))
+            return await cursor.fetchall()
+    
+    async def _keyset_page(
+        self,
+        query: str,
+        params: List[Any],
+        order_columns: List[str],
+        limit: int,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        按降序排序键做游标分页
+        
+        Args:
+            query: 基础查询（须已包含 WHERE 子句）
+            params: 基础查询参数
+            order_columns: 降序排序列，最后一列须唯一
+            limit: 每页数量
+            cursor: 上一页返回的 next_cursor
+            
+        Returns:
+            Dict: items 与 next_cursor（无更多数据时为 None）
+        """
+        params = list(params)
+        
+        if cursor:
+            values = decode_cursor(cursor, len(order_columns))
+            if values is None:
+                raise ValueError("Invalid pagination cursor")
+            placeholders = ", ".join("?" for _ in order_columns)
+            query += f" AND ({', '.join(order_columns)}) < ({placeholders})"
+            params.extend(values)
+        
+        query += " ORDER BY " + ", ".join(f"{col} DESC" for col in order_columns) + " LIMIT ?"
+        params.append(limit + 1)
+        
+        async with self._read() as db:
+            cursor_obj = await db.execute(query, params)
+            rows = await cursor_obj.fetchall()
+        
+        items = rows[:limit]
+        next_cursor = None
+        if len(rows) > limit and items:
+            last = items[-1]
+            next_cursor = encode_cursor([last[col] for col in order_columns])
+        
+        return {"items": items, "next_cursor": next_cursor}
+    
+    async def get_agents_page(
+        self,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        columns: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        按影响力游标分页获取成员
+        
+        Args:
+            limit: 每页数量
+            cursor: 分页游标
+            columns: 返回的列，None 表示全部
+        """
+        projection = self._projection("agents", columns, required=["influence_score", "id"])
+        return await self._keyset_page(
+            f"SELECT {projection} FROM agents WHERE 1 = 1",
+            [],
+            ["influence_score", "id"],
+            limit,
+            cursor
+        )
+    
+    async def get_news_page(
+        self,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        category: Optional[str] = None,
+        columns: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        按重要性游标分页获取 Top 新闻
+        
+        Args:
+            limit: 每页数量
+            cursor: 分页游标
+            category: 分类
+            columns: 返回的列，None 表示全部
+        """
+        projection = self._projection("posts", columns, required=["importance_score", "created_at", "id"])
+        query = f"SELECT {projection} FROM posts WHERE is_top_news = 1"
+        params = []
+        
+        if category:
+            query += " AND category = ?"
+            params.append(category)
+        
+        return await self._keyset_page(
+            query,
+            params,
+            ["importance_score", "created_at", "id"],
+            limit,
+            cursor
+        )
+    
+    async def get_dangerous_page(
+        self,
+        min_score: int = 8,
+        max_score: Optional[int] = None,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        columns: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        按危险分数游标分页获取危险言论
+        
+        Args:
+            min_score: 最低危险分数
+            max_score: 最高危险分数
+            limit: 每页数量
+            cursor: 分页游标
+            columns: 返回的列，None 表示全部
+        """
+        projection = self._projection("dangerous_post_details", columns, required=["danger_score", "created_at", "id"])
+        query = f"SELECT {projection} FROM dangerous_post_details WHERE danger_score >= ?"
+        params = [min_score]
+        
+        if max_score is not None:
+            query += " AND danger_score <= ?"
+            params.append(max_score)
+        
+        return await self._keyset_page(
+            query,
+            params,
+            ["danger_score", "created_at", "id"],
+            limit,
+            cursor
+        )
+    
+    async def count_dangerous_posts(self, min_score: int = 0, max_score: Optional[int] = None) -> int:
+        """统计危险分数区间内的危险言论数量（走 danger_score 索引）"""
+        async with self._read() as db:
+            query = "SELECT COUNT(*) FROM dangerous_posts WHERE danger_score >= ?"
+            params = [min_score]
+            
+            if max_score is not None:
+                query += " AND danger_score <= ?"
+                params.append(max_score)
+            
+            cursor = await db.execute(query, params)
+            return (await cursor.fetchone())[0]
+
+    
+    @staticmethod
+    def _fts_filter(fts_table: str, query: str) -> Optional[Tuple[str, List[Any], bool]]:
+        """
+        构造全文检索条件
+        
+        足够长的词走 MATCH；trigram 索引匹配不了的短词（如两个字的中文词）
+        在索引列上做 LIKE 子串过滤，只有短词时无法按 bm25 排序。
+        
+        Args:
+            fts_table: 全文索引表名
+            query: 用户输入
+            
+        Returns:
+            (WHERE 条件, 参数, 是否可按 bm25 排序)；没有可检索的词时返回 None
+        """
+        indexed, short = split_search_terms(query)
+        if not indexed and not short:
+            return None
+        columns = next(cols for table, _, cols in FTS_TABLES if table == fts_table)
+        
+        clauses: List[str] = []
+        params: List[Any] = []
+        if indexed:
+            clauses.append(f"{fts_table} MATCH ?")
+            params.append(build_match_query(" ".join(indexed)))
+        for term in short:
+            # 词只含 \w 字符，只需转义下划线
+            pattern = "%" + term.replace("_", "\\_") + "%"
+            clauses.append("(" + " OR ".join(f"{fts_table}.{col} LIKE ? ESCAPE '\\'" for col in columns) + ")")
+            params.extend([pattern] * len(columns))
+        return " AND ".join(clauses), params, bool(indexed)
+    
+    async def search_posts(
+        self,
+        query: str,
+        limit: int = 20,
+        min_danger_score: Optional[int] = None,
+        top_news_only: bool = False
+    ) -> List[Record]:
+        """
+        全文检索帖子（标题、正文、摘要、关键词），按 bm25 相关度排序
+        
+        Args:
+            query: 检索词，多个词之间为 AND 关系
+            limit: 数量限制
+            min_danger_score: 只返回危险分数不低于该值的帖子
+            top_news_only: 只返回要闻
+        """
+        search = self._fts_filter("posts_fts", query)
+        if search is None:
+            return []
+        where, params, ranked = search
+        
+        if ranked:
+            columns = """
+                highlight(posts_fts, 0, '<mark>', '</mark>') AS title_highlight,
+                snippet(posts_fts, 1, '<mark>', '</mark>', '…', 24) AS content_snippet,
+                bm25(posts_fts, 10.0, 1.0, 4.0, 6.0) AS rank
+            """
+        else:
+            columns = "p.title AS title_highlight, substr(posts_fts.content, 1, 48) AS content_snippet, 0 AS rank"
+        sql = f"""
+            SELECT
+                p.id, p.title, p.summary, p.author_id, p.author_name, p.submolt,
+                p.category, p.importance_score, p.danger_score, p.danger_type,
+                p.is_top_news, p.created_at, p.url,
+                {columns}
+            FROM posts_fts
+            JOIN posts p ON p.rowid = posts_fts.rowid
+            WHERE {where}
+        """
+        
+        if min_danger_score is not None:
+            sql += " AND p.danger_score >= ?"
+            params.append(min_danger_score)
+        
+        if top_news_only:
+            sql += " AND p.is_top_news = 1"
+        
+        sql += f" ORDER BY {'rank' if ranked else 'p.created_at DESC'} LIMIT ?"
+        params.append(limit)
+        
+        async with self._read() as db:
+            cursor = await db.execute(sql, params)
+            return await cursor.fetchall()
+    
+    async def search_agents(self, query: str, limit: int = 10) -> List[Record]:
+        """
+        全文检索成员（名称、简介），按 bm25 相关度排序
+        
+        Args:
+            query: 检索词，多个词之间为 AND 关系
+            limit: 数量限制
+        """
+        search = self._fts_filter("agents_fts", query)
+        if search is None:
+            return []
+        where, params, ranked = search
+        
+        if ranked:
+            columns = """
+                highlight(agents_fts, 0, '<mark>', '</mark>') AS name_highlight,
+                snippet(agents_fts, 1, '<mark>', '</mark>', '…', 16) AS description_snippet,
+                bm25(agents_fts, 5.0, 1.0) AS rank
+            """
+        else:
+            columns = "a.name AS name_highlight, substr(agents_fts.description, 1, 32) AS description_snippet, 0 AS rank"
+        
+        async with self._read() as db:
+            cursor = await db.execute(f"""
+                SELECT a.*, {columns}
+                FROM agents_fts
+                JOIN agents a ON a.rowid = agents_fts.rowid
+                WHERE {where}
+                ORDER BY {'rank' if ranked else 'a.post_count DESC'}
+                LIMIT ?
+            """, (*params, limit))
+            return await cursor.fetchall()
+
+    
+    async def get_keyword_frequency(
+        self,
+        start_day: Optional[str] = None,
+        end_day: Optional[str] = None,
+        limit: int = 20
+    ) -> List[Record]:
+        """
+        统计时间范围内的热门关键词
+        
+        Args:
+            start_day: 开始日期 (YYYY-MM-DD)
+            end_day: 结束日期 (YYYY-MM-DD)
+            limit: 数量限制
+        """
+        async with self._read() as db:
+            # 有日期范围时强制走按天索引，只扫描范围内的行
+            index_hint = " INDEXED BY idx_post_keywords_day" if start_day or end_day else ""
+            query = f"SELECT keyword, COUNT(*) AS count FROM post_keywords{index_hint} WHERE 1 = 1"
+            params: List[Any] = []
+            
+            if start_day:
+                query += " AND created_day >= ?"
+                params.append(start_day)
+            
+            if end_day:
+                query += " AND created_day <= ?"
+                params.append(end_day)
+            
+            query += " GROUP BY keyword ORDER BY count DESC, keyword LIMIT ?"
+            params.append(limit)
+            
+            cursor = await db.execute(query, params)
+            return await cursor.fetchall()
+    
+    async def get_keyword_trend(
+        self,
+        keyword: str,
+        start_day: Optional[str] = None,
+        end_day: Optional[str] = None
+    ) -> List[Record]:
+        """
+        获取关键词的按天出现次数
+        
+        Args:
+            keyword: 关键词
+            start_day: 开始日期 (YYYY-MM-DD)
+            end_day: 结束日期 (YYYY-MM-DD)
+        """
+        keywords = normalize_keywords([keyword])
+        if not keywords:
+            return []
+        
+        async with self._read() as db:
+            query = "SELECT created_day AS day, COUNT(*) AS count FROM post_keywords WHERE keyword = ?"
+            params: List[Any] = [keywords[0]]
+            
+            if start_day:
+                query += " AND created_day >= ?"
+                params.append(start_day)
+            
+            if end_day:
+                query += " AND created_day <= ?"
+                params.append(end_day)
+            
+            query += " GROUP BY created_day ORDER BY created_day"
+            
+            cursor = await db.execute(query, params)
+            return await cursor.fetchall()
+    
+    async def get_keyword_cooccurrence(
+        self,
+        keyword: str,
+        start_day: Optional[str] = None,
+        end_day: Optional[str] = None,
+        limit: int = 20
+    ) -> List[Record]:
+        """
+        获取与指定关键词同时出现的关键词
+        
+        Args:
+            keyword: 关键词
+            start_day: 开始日期 (YYYY-MM-DD)
+            end_day: 结束日期 (YYYY-MM-DD)
+            limit: 数量限制
+        """
+        keywords = normalize_keywords([keyword])
+        if not keywords:
+            return []
+        
+        async with self._read() as db:
+            query = """
+                SELECT other.keyword, COUNT(*) AS count
+                FROM post_keywords base
+                JOIN post_keywords other
+                    ON other.post_id = base.post_id AND other.keyword != base.keyword
+                WHERE base.keyword = ?
+            """
+            params: List[Any] = [keywords[0]]
+            
+            if start_day:
+                query += " AND base.created_day >= ?"
+                params.append(start_day)
+            
+            if end_day:
+                query += " AND base.created_day <= ?"
+                params.append(end_day)
+            
+            query += " GROUP BY other.keyword ORDER BY count DESC, other.keyword LIMIT ?"
+            params.append(limit)
+            
+            cursor = await db.execute(query, params)
+            return await cursor.fetchall()
+    
+    async def get_keyword_posts(
+        self,
+        keyword: str,
+        limit: int = 20,
+        day: Optional[str] = None,
+        columns: Optional[List[str]] = None
+    ) -> List[Record]:
+        """
+        获取包含指定关键词的帖子
+        
+        Args:
+            keyword: 关键词
+            limit: 数量限制
+            day: 日期 (YYYY-MM-DD)
+            columns: 返回的列，None 表示全部
+        """
+        keywords = normalize_keywords([keyword])
+        if not keywords:
+            return []
+        
+        async with self._read() as db:
+            query = f"""
+                SELECT {self._projection('posts', columns, alias='p')} FROM post_keywords k
+                JOIN posts p ON p.id = k.post_id
+                WHERE k.keyword = ?
+            """
+            params: List[Any] = [keywords[0]]
+            
+            if day:
+                query += " AND k.created_day = ?"
+                params.append(day)
+            
+            query += " ORDER BY k.created_day DESC, p.importance_score DESC LIMIT ?"
+            params.append(limit)
+            
+            cursor = await db.execute(query, params)
+            return await cursor.fetchall()
+
+    
+    async def compact_rollups(self, retention_days: Optional[int] = None) -> int:
+        """
+        把超过保留期的小时汇总合并为天汇总
+        
+        Args:
+            retention_days: 小时数据保留天数，默认取配置
+            
+        Returns:
+            int: 合并的小时汇总行数
+        """
+        from core.config import settings
+        days = settings.ROLLUP_HOURLY_RETENTION_DAYS if retention_days is None else retention_days
+        cutoff_day = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
+        
+        async with self._write() as db:
+            cursor = await db.execute(f"""
+                SELECT substr(hour, 1, 10), {", ".join(ROLLUP_DIMENSIONS)}, {", ".join(f"SUM({col})" for col in ROLLUP_MEASURES)}
+                FROM post_rollups_hourly
+                WHERE hour < ?
+                GROUP BY substr(hour, 1, 10), {", ".join(ROLLUP_DIMENSIONS)}
+            """, (cutoff_day,))
             rows = await cursor.fetchall()
-            return [dict(row) for row in rows]
+            
+            if not rows:
+                return 0
+            
+            await self._upsert_rollups(db, "post_rollups_daily", "day", [tuple(row) for row in rows])
+            cursor = await db.execute("DELETE FROM post_rollups_hourly WHERE hour < ?", (cutoff_day,))
+            compacted = cursor.rowcount
+        
+        logger.info(f"Compacted {compacted} hourly rollups before {cutoff_day} into {len(rows)} daily rows")
+        return compacted
+    
+    async def get_rollup_series(
+        self,
+        start: str,
+        end: Optional[str] = None,
+        granularity: str = "day",
+        group_by: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        从汇总表读取时间序列
+        
+        Args:
+            start: 开始时间 (YYYY-MM-DD 或 YYYY-MM-DDTHH)
+            end: 结束时间（含），同上格式
+            granularity: hour 或 day；按天时会合并已压缩的天汇总
+            group_by: 额外分组维度 (category/submolt/danger_bucket)
+        """
+        if granularity not in ("hour", "day"):
+            raise ValueError(f"Unsupported granularity: {granularity}")
+        if group_by is not None and group_by not in ROLLUP_DIMENSIONS:
+            raise ValueError(f"Unsupported rollup dimension: {group_by}")
+        
+        end = end or "9999"
+        measures = ", ".join(ROLLUP_MEASURES)
+        
+        if granularity == "hour":
+            source = f"""
+                SELECT hour AS bucket, {", ".join(ROLLUP_DIMENSIONS)}, {measures}
+                FROM post_rollups_hourly WHERE hour >= ? AND hour <= ?
+            """
+            params = [start, end + "\uffff"]
+        else:
+            source = f"""
+                SELECT day AS bucket, {", ".join(ROLLUP_DIMENSIONS)}, {measures}
+                FROM post_rollups_daily WHERE day >= ? AND day <= ?
+                UNION ALL
+                SELECT substr(hour, 1, 10), {", ".join(ROLLUP_DIMENSIONS)}, {measures}
+                FROM post_rollups_hourly WHERE hour >= ? AND hour <= ?
+            """
+            params = [start[:10], end[:10], start[:10], end[:10] + "\uffff"]
+        
+        group_cols = "bucket" + (f", {group_by}" if group_by else "")
+        async with self._read() as db:
+            cursor = await db.execute(f"""
+                SELECT {group_cols}, {", ".join(f"SUM({col}) AS {col}" for col in ROLLUP_MEASURES)}
+                FROM ({source})
+                GROUP BY {group_cols}
+                ORDER BY {group_cols}
+            """, params)
+            rows = await cursor.fetchall()
+        
+        series = []
+        for row in rows:
+            item = row.to_dict()
+            importance_sum = item.pop("importance_sum") or 0
+            item["avg_importance"] = round(importance_sum / item["post_count"], 2) if item["post_count"] else 0
+            series.append(item)
+        return series
+    
+    async def get_risk_distribution(self, start: str, end: Optional[str] = None) -> Dict[str, int]:
+        """
+        按危险分桶统计帖子数量
+        
+        Args:
+            start: 开始日期 (YYYY-MM-DD)
+            end: 结束日期（含）
+        """
+        series = await self.get_rollup_series(start, end, granularity="day", group_by="danger_bucket")
+        distribution = {name: 0 for name, _ in reversed(DANGER_BUCKETS)}
+        for item in series:
+            distribution[item["danger_bucket"]] = distribution.get(item["danger_bucket"], 0) + item["post_count"]
+        return distribution
 
+    
+    async def archive_partitions(self, hot_days: Optional[int] = None) -> Dict[str, Any]:
+        """
+        把超过热数据保留期的帖子迁移到月份分区（冷库）
+        
+        每批先写入并提交分区，再从热库删除，中途中断最多留下重复行，下次
+        运行时覆盖。迁出的正文一律压缩存储，危险言论、关键词与评论采集记录
+        随帖子一起迁入分区。统计计数器保留已归档的行，rebuild_stats_counters
+        只统计热库。关键词统计、全文索引与游标分页只查询热库：分区里的
+        关键词行只作保存，分区帖子不进入全文索引。
+        
+        Args:
+            hot_days: 热库保留天数，None 使用配置，<= 0 表示不归档
+            
+        Returns:
+            Dict: 归档帖子数、涉及月份、移出查询范围的分区及耗时 (毫秒)
+        """
+        hot_days = self.archive_hot_days if hot_days is None else hot_days
+        if hot_days <= 0:
+            return {"archived": 0, "months": [], "detached": [], "elapsed_ms": 0}
+        
+        started = time.perf_counter()
+        cutoff_hour = (datetime.now() - timedelta(days=hot_days)).strftime("%Y-%m-%dT00")
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        
+        async with self._read() as db:
+            cursor = await db.execute(
+                "SELECT DISTINCT substr(created_hour, 1, 7) FROM posts WHERE created_hour < ?",
+                (cutoff_hour,)
+            )
+            months = sorted(row[0] for row in await cursor.fetchall())
+        
+        archived = 0
+        for month in months:
+            upper = min(next_month(month), cutoff_hour)
+            partition = await self._open_partition(month)
+            try:
+                while True:
+                    async with self._read() as db:
+                        cursor = await db.execute(
+                            "SELECT * FROM posts WHERE created_hour >= ? AND created_hour < ? LIMIT ?",
+                            (month, upper, self.archive_batch_size)
+                        )
+                        posts = await cursor.fetchall()
+                        if not posts:
+                            break
+                        ids = [row["id"] for row in posts]
+                        related = {}
+                        for table, column in ARCHIVE_TABLES.items():
+                            if table == "posts":
+                                continue
+                            cursor = await db.execute(
+                                f"SELECT * FROM {table} WHERE {column} IN ({', '.join('?' for _ in ids)})",
+                                ids
+                            )
+                            related[table] = await cursor.fetchall()
+                    
+                    await self._copy_to_partition(partition, "posts", posts)
+                    for table, rows in related.items():
+                        await self._copy_to_partition(partition, table, rows)
+                    await partition.commit()
+                    
+                    await self._delete_archived(ids)
+                    archived += len(ids)
+            finally:
+                await partition.close()
+            
+            if month not in self._partition_months:
+                self._partition_months = sorted(self._partition_months + [month])
+        
+        detached = await self._detach_expired_partitions()
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+        
+        if archived or detached:
+            logger.info(
+                f"Archived {archived} posts into {len(months)} partitions, "
+                f"detached {len(detached)} expired partitions in {elapsed_ms}ms"
+            )
+        return {"archived": archived, "months": months, "detached": detached, "elapsed_ms": elapsed_ms}
+    
+    async def _open_partition(self, month: str) -> aiosqlite.Connection:
+        """打开（必要时创建）月份分区，表结构与热库保持一致"""
+        async with self._read() as db:
+            names = list(ARCHIVE_TABLES) + ARCHIVE_VIEWS
+            cursor = await db.execute(f"""
+                SELECT type, sql FROM sqlite_master
+                WHERE tbl_name IN ({", ".join("?" for _ in names)})
+                    AND type IN ('table', 'index', 'view') AND sql IS NOT NULL
+            """, names)
+            schema = await cursor.fetchall()
+            
+            hot_columns = {}
+            for table in ARCHIVE_TABLES:
+                cursor = await db.execute(f"PRAGMA table_info({table})")
+                hot_columns[table] = {row[1]: row[2] for row in await cursor.fetchall()}
+        
+        partition = await aiosqlite.connect(str(partition_path(self.archive_dir, month)))
+        try:
+            # 先建表并补齐列，再建依赖这些列的索引与视图
+            for object_type in ("table", "index", "view"):
+                for row_type, sql in schema:
+                    if row_type == object_type:
+                        keyword = f"CREATE {object_type.upper()} "
+                        await partition.execute(sql.replace(keyword, f"{keyword}IF NOT EXISTS ", 1))
+                if object_type == "table":
+                    for table, columns in hot_columns.items():
+                        await self._ensure_columns(partition, table, columns)
+            await partition.commit()
+        except Exception:
+            await partition.close()
+            raise
+        return partition
+    
+    async def _copy_to_partition(self, partition: aiosqlite.Connection, table: str, rows: List[Record]):
+        """把热库的行写入分区，正文压缩存储"""
+        if not rows:
+            return
+        
+        columns = rows[0].keys()
+        compressed = [columns.index(col) for col in COMPRESSED_COLUMNS.get(table, []) if col in columns]
+        values = []
+        for row in rows:
+            row_values = list(row)
+            for index in compressed:
+                row_values[index] = compress_text(row_values[index], self.compress_min_bytes, self.compress_level)
+            values.append(row_values)
+        
+        await partition.executemany(
+            f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+            values
+        )
+    
+    async def _delete_archived(self, post_ids: List[str]):
+        """
+        从热库删除已归档的帖子
+        
+        删除触发器会扣减统计计数器，先把这些行的贡献加回去，使计数器
+        继续反映全部历史。
+        """
+        async with self._write() as db:
+            await db.execute("CREATE TEMP TABLE IF NOT EXISTS archive_batch (id TEXT PRIMARY KEY)")
+            await db.executemany("INSERT OR IGNORE INTO temp.archive_batch (id) VALUES (?)", [(i,) for i in post_ids])
+            
+            for name, table, expr in STAT_COUNTERS:
+                if table not in ARCHIVE_TABLES:
+                    continue
+                await db.execute(f"""
+                    UPDATE stats_counters SET value = value + (
+                        SELECT COALESCE(SUM({expr.format(row=table)}), 0) FROM {table}
+                        WHERE {ARCHIVE_TABLES[table]} IN (SELECT id FROM temp.archive_batch)
+                    )
+                    WHERE name = ? AND day = ''
+                """, (name,))
+            
+            for name, table in DAILY_STAT_COUNTERS:
+                if table not in ARCHIVE_TABLES:
+                    continue
+                await db.execute(f"""
+                    UPDATE stats_counters SET value = value + (
+                        SELECT COUNT(*) FROM {table}
+                        WHERE {ARCHIVE_TABLES[table]} IN (SELECT id FROM temp.archive_batch)
+                            AND date(created_at) = stats_counters.day
+                    )
+                    WHERE name = ? AND day IN (
+                        SELECT date(created_at) FROM {table}
+                        WHERE {ARCHIVE_TABLES[table]} IN (SELECT id FROM temp.archive_batch)
+                    )
+                """, (name,))
+            
+            await db.execute("DELETE FROM posts WHERE id IN (SELECT id FROM temp.archive_batch)")
+            await db.execute("DELETE FROM temp.archive_batch")
+    
+    async def _detach_expired_partitions(self) -> List[str]:
+        """
+        把超过保留月数的分区移到 detached/ 目录，不再参与查询
+        
+        先在写连接与全部读连接上 DETACH，再移动文件（Windows 上不能移动仍被
+        打开的文件），移动成功后才把月份移出查询范围。期间借出全部读连接，
+        避免并发查询重新 ATTACH。文件不会被删除，需要时可移回归档目录重新启用。
+        """
+        if self.archive_retention_months <= 0:
+            return []
+        
+        oldest = shift_month(datetime.now().strftime("%Y-%m"), -self.archive_retention_months)
+        expired = [month for month in self._partition_months if month < oldest]
+        if not expired:
+            return []
+        
+        detached_dir = self.archive_dir / "detached"
+        detached_dir.mkdir(parents=True, exist_ok=True)
+        
+        if self._attached.get(id(self._writer)):
+            async with self._write(exclusive=True) as writer:
+                for month in expired:
+                    await self._detach_alias(writer, partition_alias(month))
+        
+        readers = [await self._reader_queue.get() for _ in self._readers]
+        moved = []
+        try:
+            for reader in readers:
+                for month in expired:
+                    await self._detach_alias(reader, partition_alias(month))
+            
+            for month in expired:
+                path = partition_path(self.archive_dir, month)
+                try:
+                    os.replace(path, detached_dir / path.name)
+                except OSError as e:
+                    logger.error(f"Error moving expired partition {month}: {e}")
+                    continue
+                moved.append(month)
+            
+            self._partition_months = [month for month in self._partition_months if month not in moved]
+        finally:
+            for reader in readers:
+                self._reader_queue.put_nowait(reader)
+        return moved
 
 db = Database()
@@ -0,0 +1,197 @@
+"""
+采集日志
+追加写、按段轮转的本地日志，采集到的原始帖子先落盘，再由消费者写入数据库
+"""
+import json
+import logging
+import os
+import struct
+import threading
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 记录头: 负载长度 + CRC32
+_HEADER = struct.Struct(">II")
+
+Position = Tuple[int, int]
+
+
+class IngestJournal:
+    """
+    采集日志
+    
+    每条记录为 [长度][CRC32][JSON 负载]。写入只追加到当前段，超过
+    segment_bytes 后轮转到新段；消费者处理完成后调用 commit 保存检查点，
+    检查点之前的段会被删除。进程重启后从检查点继续重放。
+    """
+    
+    CHECKPOINT_FILE = "checkpoint.json"
+    
+    def __init__(self, directory: str, segment_bytes: int = 16 * 1024 * 1024, fsync: bool = True):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_bytes = segment_bytes
+        self.fsync = fsync
+        
+        self._lock = threading.Lock()
+        self._checkpoint: Position = self._load_checkpoint()
+        
+        segments = self._segments()
+        # 重启后总是写入新段，避免在可能残缺的旧段尾部追加
+        self._segment = (segments[-1] + 1) if segments else max(self._checkpoint[0], 1)
+        self._file = None
+        self._size = 0
+    
+    def _segment_path(self, segment: int) -> Path:
+        return self.directory / f"segment-{segment:012d}.log"
+    
+    def _segments(self) -> List[int]:
+        """按顺序列出现有段号"""
+        segments = []
+        for path in self.directory.glob("segment-*.log"):
+            try:
+                segments.append(int(path.stem.split("-", 1)[1]))
+            except ValueError:
+                continue
+        return sorted(segments)
+    
+    def _load_checkpoint(self) -> Position:
+        path = self.directory / self.CHECKPOINT_FILE
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            return int(data["segment"]), int(data["offset"])
+        except FileNotFoundError:
+            return 0, 0
+        except (ValueError, KeyError, TypeError) as e:
+            logger.error(f"Invalid journal checkpoint, replaying from start: {e}")
+            return 0, 0
+    
+    def _open_segment(self):
+        self._file = open(self._segment_path(self._segment), "ab")
+        self._size = self._file.tell()
+    
+    def append(self, records: List[Dict[str, Any]]) -> int:
+        """
+        追加一批记录并落盘
+        
+        Args:
+            records: 可 JSON 序列化的记录
+            
+        Returns:
+            int: 写入字节数
+        """
+        if not records:
+            return 0
+        
+        chunks = []
+        for record in records:
+            payload = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            chunks.append(_HEADER.pack(len(payload), zlib.crc32(payload)) + payload)
+        data = b"".join(chunks)
+        
+        with self._lock:
+            if self._file is None:
+                self._open_segment()
+            elif self._size > 0 and self._size + len(data) > self.segment_bytes:
+                self._file.close()
+                self._segment += 1
+                self._open_segment()
+            
+            self._file.write(data)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self._size += len(data)
+        
+        return len(data)
+    
+    def read(self, max_records: int = 1000) -> Tuple[List[Dict[str, Any]], Position]:
+        """
+        从检查点开始读取待处理记录
+        
+        Args:
+            max_records: 最多读取条数
+            
+        Returns:
+            tuple: (记录列表, 读完这些记录后的位置)，位置用于 commit
+        """
+        records: List[Dict[str, Any]] = []
+        
+        with self._lock:
+            position = self._checkpoint
+            
+            for segment in self._segments():
+                if segment < position[0]:
+                    continue
+                offset = position[1] if segment == position[0] else 0
+                is_active = segment >= self._segment
+                
+                with open(self._segment_path(segment), "rb") as f:
+                    f.seek(offset)
+                    while len(records) < max_records:
+                        header = f.read(_HEADER.size)
+                        if len(header) < _HEADER.size:
+                            break
+                        length, crc = _HEADER.unpack(header)
+                        payload = f.read(length)
+                        if len(payload) < length or zlib.crc32(payload) != crc:
+                            if not is_active:
+                                logger.error(f"Corrupted journal record in segment {segment} at offset {offset}, skipping rest of segment")
+                            break
+                        try:
+                            records.append(json.loads(payload.decode("utf-8")))
+                        except ValueError as e:
+                            logger.error(f"Undecodable journal record in segment {segment} at offset {offset}: {e}")
+                        offset = f.tell()
+                
+                position = (segment, offset)
+                if len(records) >= max_records or is_active:
+                    break
+                # 旧段已读完，后续从下一段开头继续
+                position = (segment + 1, 0)
+        
+        return records, position
+    
+    @property
+    def checkpoint(self) -> Position:
+        """当前检查点位置"""
+        with self._lock:
+            return self._checkpoint
+    
+    def commit(self, position: Position):
+        """保存检查点并删除已完全处理的段"""
+        with self._lock:
+            path = self.directory / self.CHECKPOINT_FILE
+            tmp_path = path.with_suffix(".tmp")
+            tmp_path.write_text(
+                json.dumps({"segment": position[0], "offset": position[1]}),
+                encoding="utf-8"
+            )
+            os.replace(tmp_path, path)
+            self._checkpoint = position
+            
+            for segment in self._segments():
+                if segment < position[0] and segment != self._segment:
+                    self._segment_path(segment).unlink(missing_ok=True)
+    
+    def stats(self) -> Dict[str, Any]:
+        """日志状态：段数量、总字节数、检查点"""
+        with self._lock:
+            segments = self._segments()
+            total_bytes = sum(self._segment_path(s).stat().st_size for s in segments)
+            return {
+                "segments": len(segments),
+                "bytes": total_bytes,
+                "active_segment": self._segment,
+                "checkpoint": {"segment": self._checkpoint[0], "offset": self._checkpoint[1]}
+            }
+    
+    def close(self):
+        """关闭当前段文件"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,99 @@
+"""
+数据库维护
+按各自周期执行 WAL 检查点、增量 VACUUM、统计信息更新与在线备份
+"""
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .database import Database
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseMaintenance:
+    """
+    数据库维护任务调度
+    
+    每个任务最近一次的执行时间记录在 maintenance_runs 表中，进程重启后
+    仍按原周期执行；周期 <= 0 的任务不执行。所有任务都经写入队列或独立
+    连接执行，不需要停机。
+    """
+    
+    def __init__(self, database: Database):
+        from core.config import settings
+        self.db = database
+        self.settings = settings
+    
+    def _tasks(self) -> List[Tuple[str, int, Callable[[], Awaitable[Dict[str, Any]]]]]:
+        return [
+            ("checkpoint", self.settings.MAINTENANCE_CHECKPOINT_INTERVAL, self._checkpoint),
+            ("incremental_vacuum", self.settings.MAINTENANCE_VACUUM_INTERVAL, self._incremental_vacuum),
+            ("optimize", self.settings.MAINTENANCE_OPTIMIZE_INTERVAL, self._optimize),
+            ("analyze", self.settings.MAINTENANCE_ANALYZE_INTERVAL, self._analyze),
+            ("backup", self.settings.BACKUP_INTERVAL, self._backup),
+        ]
+    
+    async def run_due(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        执行所有到期的维护任务
+        
+        Returns:
+            Dict: 任务名 -> 执行结果
+        """
+        now = now or datetime.now()
+        runs = await self.db.get_maintenance_runs()
+        results = {}
+        
+        for task, interval, func in self._tasks():
+            if interval <= 0:
+                continue
+            
+            last = runs.get(task, {}).get("ran_at")
+            if last:
+                try:
+                    if now - datetime.fromisoformat(last) < timedelta(seconds=interval):
+                        continue
+                except ValueError:
+                    pass
+            
+            try:
+                result = await func()
+            except Exception as e:
+                logger.error(f"Maintenance task {task} failed: {e}")
+                continue
+            
+            await self.db.record_maintenance(task, result)
+            results[task] = result
+        
+        return results
+    
+    async def _checkpoint(self) -> Dict[str, Any]:
+        """WAL 超过阈值时截断，否则被动检查点"""
+        health = await self.db.get_health()
+        mode = "TRUNCATE" if health["wal_bytes"] >= self.settings.WAL_TRUNCATE_BYTES else "PASSIVE"
+        result = await self.db.checkpoint(mode)
+        result["mode"] = mode
+        result["wal_bytes"] = health["wal_bytes"]
+        return result
+    
+    async def _incremental_vacuum(self) -> Dict[str, Any]:
+        """空闲页超过阈值时归还一部分"""
+        health = await self.db.get_health()
+        freed = 0
+        if health["freelist_count"] >= self.settings.VACUUM_MIN_FREE_PAGES:
+            freed = await self.db.incremental_vacuum(self.settings.VACUUM_STEP_PAGES)
+        return {"freelist_count": health["freelist_count"], "freed_pages": freed}
+    
+    async def _optimize(self) -> Dict[str, Any]:
+        return await self.db.optimize(analysis_limit=self.settings.ANALYSIS_LIMIT)
+    
+    async def _analyze(self) -> Dict[str, Any]:
+        return await self.db.optimize(analyze=True, analysis_limit=self.settings.ANALYSIS_LIMIT)
+    
+    async def _backup(self) -> Dict[str, Any]:
+        return await self.db.backup(
+            pages_per_step=self.settings.BACKUP_PAGES_PER_STEP,
+            step_sleep_ms=self.settings.BACKUP_STEP_SLEEP_MS,
+            keep=self.settings.BACKUP_KEEP
+        )
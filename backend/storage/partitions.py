@@ -0,0 +1,66 @@
+"""
+归档分区
+按月份划分的冷数据库文件命名与时间范围路由
+"""
+import re
+from pathlib import Path
+from typing import List, Optional
+
+_PARTITION_RE = re.compile(r"^posts-(\d{4}-\d{2})\.db$")
+
+
+def partition_path(directory: Path, month: str) -> Path:
+    """月份分区文件路径，month 格式为 YYYY-MM"""
+    return Path(directory) / f"posts-{month}.db"
+
+
+def partition_alias(month: str) -> str:
+    """ATTACH 时使用的 schema 名"""
+    return "p_" + month.replace("-", "_")
+
+
+def list_partition_months(directory: Path) -> List[str]:
+    """列出目录中已有的分区月份（升序）"""
+    directory = Path(directory)
+    if not directory.is_dir():
+        return []
+    months = []
+    for path in directory.iterdir():
+        match = _PARTITION_RE.match(path.name)
+        if match:
+            months.append(match.group(1))
+    return sorted(months)
+
+
+def next_month(month: str) -> str:
+    """下一个月份"""
+    year, mon = int(month[:4]), int(month[5:7])
+    if mon == 12:
+        return f"{year + 1:04d}-01"
+    return f"{year:04d}-{mon + 1:02d}"
+
+
+def shift_month(month: str, months: int) -> str:
+    """向前（负数）或向后平移若干个月"""
+    index = int(month[:4]) * 12 + int(month[5:7]) - 1 + months
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def months_in_range(months: List[str], start: Optional[str], end: Optional[str]) -> List[str]:
+    """
+    筛选与时间范围相交的分区月份
+    
+    Args:
+        months: 候选月份
+        start: 范围起点（日期或 ISO 时间），None 表示不限
+        end: 范围终点（日期或 ISO 时间），None 表示不限
+    
+    Returns:
+        List[str]: 相交的月份
+    """
+    start_month = start[:7] if start else None
+    end_month = end[:7] if end else None
+    return [
+        month for month in months
+        if (start_month is None or month >= start_month) and (end_month is None or month <= end_month)
+    ]
@@ -0,0 +1,84 @@
+"""
+轻量查询结果行
+以共享的列索引 + 原始元组表示一行，避免为每行构造 dict
+"""
+from typing import Any, Dict, Iterator, List, Tuple
+
+from .compression import decompress_text
+
+# 列索引缓存: id(cursor.description) -> (description, {列名: 下标})
+# 持有 description 引用以保证 id 不会被复用
+_INDEX_CACHE: Dict[int, Tuple[tuple, Dict[str, int]]] = {}
+_INDEX_CACHE_LIMIT = 256
+
+
+class Record:
+    """
+    只读的查询结果行
+    
+    与 sqlite3.Row 行为一致：按列名/下标取值、迭代得到各列的值、
+    keys() 返回列名；另提供 get()/items()/to_dict()。dict(record) 与
+    FastAPI 的 JSON 编码都通过 keys() 得到对象形式。
+    """
+    
+    __slots__ = ("_index", "_values")
+    
+    def __init__(self, index: Dict[str, int], values: tuple):
+        self._index = index
+        self._values = values
+    
+    def __getitem__(self, key: Any) -> Any:
+        if isinstance(key, int):
+            return self._values[key]
+        return self._values[self._index[key]]
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        position = self._index.get(key)
+        return default if position is None else self._values[position]
+    
+    def keys(self) -> List[str]:
+        return list(self._index)
+    
+    def values(self) -> tuple:
+        return self._values
+    
+    def items(self) -> List[Tuple[str, Any]]:
+        return list(zip(self._index, self._values))
+    
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._values)
+    
+    def __len__(self) -> int:
+        return len(self._values)
+    
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, Record):
+            return self._values == other._values and list(self._index) == list(other._index)
+        return NotImplemented
+    
+    __hash__ = None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为普通 dict（需要修改行内容时使用）"""
+        return dict(zip(self._index, self._values))
+    
+    def __repr__(self) -> str:
+        return f"Record({self.to_dict()!r})"
+
+
+def record_factory(cursor, row: tuple) -> Record:
+    """
+    sqlite3 row_factory：同一结果集的所有行共享一个列索引
+    
+    压缩存储的正文只有在被查询的列中出现时才会在这里解压。
+    """
+    description = cursor.description
+    cached = _INDEX_CACHE.get(id(description))
+    if cached is None or cached[0] is not description:
+        if len(_INDEX_CACHE) >= _INDEX_CACHE_LIMIT:
+            _INDEX_CACHE.clear()
+        cached = (description, {col[0]: i for i, col in enumerate(description)})
+        _INDEX_CACHE[id(description)] = cached
+    if bytes in map(type, row):
+        row = tuple(decompress_text(value) for value in row)
+    return Record(cached[1], row)
@@ -0,0 +1,39 @@
+"""
+已处理帖子索引
+内存中的有界 LRU 集合，用于采集去重
+"""
+from collections import OrderedDict
+from typing import Iterable
+
+
+class SeenPostIndex:
+    """已见帖子 ID 的有界 LRU 集合"""
+    
+    def __init__(self, capacity: int = 200000):
+        self.capacity = max(1, capacity)
+        self._ids: "OrderedDict[str, None]" = OrderedDict()
+    
+    def __contains__(self, post_id: str) -> bool:
+        if post_id in self._ids:
+            self._ids.move_to_end(post_id)
+            return True
+        return False
+    
+    def __len__(self) -> int:
+        return len(self._ids)
+    
+    def add(self, post_id: str):
+        """加入一个帖子 ID，超出容量时淘汰最久未访问的条目"""
+        self._ids[post_id] = None
+        self._ids.move_to_end(post_id)
+        if len(self._ids) > self.capacity:
+            self._ids.popitem(last=False)
+    
+    def update(self, post_ids: Iterable[str]):
+        """批量加入帖子 ID"""
+        for post_id in post_ids:
+            self.add(post_id)
+    
+    def clear(self):
+        """清空索引"""
+        self._ids.clear()
@@ -0,0 +1,31 @@
+"""
+测试公共配置
+在导入 core.config 之前把数据、日志与缓存目录指向临时目录
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+_TMP_DIR = Path(tempfile.mkdtemp(prefix="moltlook-tests-"))
+os.environ.update({
+    "DB_PATH": str(_TMP_DIR / "moltlook.db"),
+    "LOGS_DIR": str(_TMP_DIR / "logs"),
+    "JOURNAL_DIR": str(_TMP_DIR / "journal"),
+    "HTTP_CACHE_DIR": str(_TMP_DIR / "http_cache"),
+    "ARCHIVE_DIR": str(_TMP_DIR / "archive"),
+    "BACKUP_DIR": str(_TMP_DIR / "backups"),
+    "MOLTBOOK_API_KEY": "test-key",
+    "AI_API_URL": "",
+})
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """每个测试独立的数据库文件"""
+    return str(tmp_path / "moltlook.db")
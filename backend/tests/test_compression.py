@@ -0,0 +1,23 @@
+"""
+正文压缩测试
+"""
+from storage.compression import compress_text, decompress_text, is_compressed, text_size
+
+
+def test_round_trip_preserves_text():
+    text = "端到端加密的讨论 mixed ASCII " * 30
+    packed = compress_text(text, min_bytes=16)
+    assert is_compressed(packed)
+    assert len(packed) < len(text.encode("utf-8"))
+    assert decompress_text(packed) == text
+    assert text_size(packed) == text_size(text) == len(text.encode("utf-8"))
+
+
+def test_short_or_incompressible_values_are_kept():
+    assert compress_text("短文本", min_bytes=256) == "短文本"
+    noise = "q8Zk3vX1pL7mW0rT5yB9"
+    assert compress_text(noise, min_bytes=16) == noise
+    assert compress_text(None) is None
+    assert decompress_text("明文") == "明文"
+    assert decompress_text(b"raw bytes") == b"raw bytes"
+    assert text_size(None) == 0
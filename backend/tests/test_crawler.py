@@ -0,0 +1,156 @@
+"""
+增量采集测试
+"""
+import asyncio
+
+from collector.crawler import IncrementalCrawler
+from collector.models import Post
+from collector.moltbook_client import PostsPage
+
+
+class FakeClient:
+    """按游标返回预置页面的客户端"""
+    
+    def __init__(self, pages):
+        self.pages = pages
+        self.calls = []
+    
+    async def get_posts_page(self, sort="new", limit=100, after=None, submolt=None, priority=0):
+        self.calls.append(after)
+        posts, next_cursor = self.pages[after]
+        return PostsPage(posts, next_cursor)
+
+
+def _post(post_id, created_at):
+    return Post(id=post_id, title=post_id, content="", author_id="a1", created_at=created_at)
+
+
+STATE = {
+    "newest_id": "n0",
+    "newest_created_at": "2026-01-02T00:00:00Z"
+}
+
+
+def test_non_chronological_sort_ignores_high_water_mark():
+    # hot 排序中比高水位更早的帖子依然是新帖子
+    client = FakeClient({
+        None: ([_post("h1", "2026-01-03T00:00:00Z"), _post("h2", "2026-01-01T00:00:00Z")], "h2"),
+        "h2": ([_post("h3", "2025-12-01T00:00:00Z"), _post("h4", "2025-11-01T00:00:00Z")], None),
+    })
+    crawler = IncrementalCrawler(client, is_seen=lambda post_id: False, page_size=2)
+    
+    result = asyncio.run(crawler.crawl(sort="hot", state=dict(STATE, sort="hot")))
+    
+    assert [p.id for p in result.posts] == ["h1", "h2", "h3", "h4"]
+    assert result.complete
+
+
+def test_non_chronological_sort_stops_on_page_scanned_by_the_shard():
+    seen = set()
+    crawler = IncrementalCrawler(FakeClient({}), is_seen=seen.__contains__, page_size=2)
+    
+    crawler.client = FakeClient({
+        None: ([_post("h3", "2026-01-03T00:00:00Z"), _post("h4", "2026-01-03T00:00:00Z")], "h4"),
+        "h4": ([_post("h5", "2026-01-03T00:00:00Z")], None),
+    })
+    first = asyncio.run(crawler.crawl(sort="top"))
+    asyncio.run(crawler.commit(first))
+    seen.update(p.id for p in first.posts)
+    
+    client = FakeClient({
+        None: ([_post("h1", "2026-01-01T00:00:00Z"), _post("h2", "2026-01-01T00:00:00Z")], "h2"),
+        "h2": ([_post("h3", "2026-01-03T00:00:00Z"), _post("h4", "2026-01-03T00:00:00Z")], "h4"),
+        "h4": ([_post("h5", "2026-01-03T00:00:00Z")], None),
+    })
+    crawler.client = client
+    result = asyncio.run(crawler.crawl(sort="top", state=first.state))
+    
+    assert [p.id for p in result.posts] == ["h1", "h2"]
+    assert client.calls == [None, "h2"]
+    assert result.complete
+
+
+def test_posts_seen_by_other_shards_do_not_stop_non_chronological_crawl():
+    seen = {"h3", "h4"}
+    client = FakeClient({
+        None: ([_post("h1", "2026-01-01T00:00:00Z"), _post("h2", "2026-01-01T00:00:00Z")], "h2"),
+        "h2": ([_post("h3", "2026-01-03T00:00:00Z"), _post("h4", "2026-01-03T00:00:00Z")], "h4"),
+        "h4": ([_post("h5", "2026-01-03T00:00:00Z")], None),
+    })
+    crawler = IncrementalCrawler(client, is_seen=seen.__contains__, page_size=2)
+    
+    result = asyncio.run(crawler.crawl(sort="top", state=dict(STATE, sort="top")))
+    
+    assert [p.id for p in result.posts] == ["h1", "h2", "h5"]
+    assert client.calls == [None, "h2", "h4"]
+
+
+def test_post_ingested_by_another_shard_does_not_end_chronological_crawl():
+    # 分区分片先采到 B，全站 new 分片随后看到 [C, B, A]，A 不能被跳过
+    ingested = set()
+    client = FakeClient({
+        None: ([
+            _post("C", "2026-01-05T00:00:00Z"),
+            _post("B", "2026-01-04T00:00:00Z"),
+            _post("A", "2026-01-03T00:00:00Z"),
+            _post("n0", "2026-01-02T00:00:00Z"),
+        ], "n0"),
+    })
+    crawler = IncrementalCrawler(client, is_seen=ingested.__contains__, page_size=4)
+    
+    tech = FakeClient({None: ([_post("B", "2026-01-04T00:00:00Z")], None)})
+    crawler.client = tech
+    tech_result = asyncio.run(crawler.crawl(sort="new", submolt="technology"))
+    asyncio.run(crawler.commit(tech_result))
+    ingested.update(p.id for p in tech_result.posts)
+    
+    crawler.client = client
+    result = asyncio.run(crawler.crawl(sort="new", state=dict(STATE, sort="new")))
+    
+    assert [p.id for p in result.posts] == ["C", "A"]
+    assert result.complete
+    assert result.state["newest_id"] == "C"
+
+
+def test_chronological_sort_stops_at_high_water_mark():
+    client = FakeClient({
+        None: ([_post("n2", "2026-01-03T00:00:00Z"), _post("n1", "2026-01-01T00:00:00Z")], "n1"),
+    })
+    crawler = IncrementalCrawler(client, is_seen=lambda post_id: False, page_size=2)
+    
+    result = asyncio.run(crawler.crawl(sort="new", state=dict(STATE, sort="new")))
+    
+    assert [p.id for p in result.posts] == ["n2"]
+    assert result.state["newest_id"] == "n2"
+
+
+def test_unchanged_page_short_circuits_and_commits_cache_after_persisting():
+    class CachingClient(FakeClient):
+        def __init__(self, pages):
+            super().__init__(pages)
+            self.committed = []
+        
+        async def get_posts_page(self, sort="new", limit=100, after=None, submolt=None, priority=0):
+            self.calls.append(after)
+            if f"posts?after={after}" in self.committed:
+                return PostsPage([], unchanged=True)
+            posts, next_cursor = self.pages[after]
+            return PostsPage(posts, next_cursor, cache_key=f"posts?after={after}")
+        
+        async def commit_cache(self, keys):
+            self.committed.extend(keys)
+    
+    client = CachingClient({
+        None: ([_post("h1", "2026-01-03T00:00:00Z"), _post("h2", "2026-01-01T00:00:00Z")], None),
+    })
+    crawler = IncrementalCrawler(client, is_seen=lambda post_id: False, page_size=2)
+    
+    first = asyncio.run(crawler.crawl(sort="hot"))
+    retried = asyncio.run(crawler.crawl(sort="hot"))
+    asyncio.run(crawler.commit(retried))
+    after_commit = asyncio.run(crawler.crawl(sort="hot"))
+    
+    assert [p.id for p in first.posts] == [p.id for p in retried.posts] == ["h1", "h2"]
+    assert after_commit.posts == []
+    assert after_commit.complete
+    assert after_commit.pages == 1
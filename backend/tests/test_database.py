@@ -0,0 +1,850 @@
+"""
+数据库写入测试
+"""
+import asyncio
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from storage import database as database_module
+from storage.database import Database
+
+
+def _run(scenario, db_path, compress_content=False, **pragmas):
+    """在新的事件循环中执行测试场景，结束时总是关闭连接池"""
+    async def main():
+        database = Database(db_path, read_pool_size=1)
+        database.compress_content = compress_content
+        database.compress_min_bytes = 16
+        database._pragmas.update(pragmas)
+        await database.connect()
+        try:
+            await database.init_tables()
+            await scenario(database)
+        finally:
+            await database.close()
+    
+    asyncio.run(main())
+
+
+def test_write_fails_instead_of_hanging_when_lock_is_held(db_path):
+    async def scenario(database):
+        blocker = sqlite3.connect(db_path, isolation_level=None)
+        blocker.execute("BEGIN IMMEDIATE")
+        try:
+            async def write():
+                async with database._write() as conn:
+                    await conn.execute(
+                        "INSERT OR REPLACE INTO seen_posts (id, seen_at) VALUES (?, ?)",
+                        ("p1", 0)
+                    )
+            
+            results = await asyncio.wait_for(
+                asyncio.gather(write(), write(), return_exceptions=True), timeout=5
+            )
+            assert all(isinstance(r, sqlite3.OperationalError) for r in results)
+        finally:
+            blocker.execute("ROLLBACK")
+            blocker.close()
+        
+        # 锁释放后写入任务仍可继续工作
+        await asyncio.wait_for(write(), timeout=5)
+        async with database._read() as conn:
+            cursor = await conn.execute("SELECT COUNT(*) FROM seen_posts")
+            assert (await cursor.fetchone())[0] == 1
+    
+    _run(scenario, db_path, busy_timeout=100)
+
+
+def test_writer_waits_for_another_process_writer(db_path):
+    # api.py 与 scheduler.py 各有一个写连接，短暂的写事务不应让对方失败
+    async def scenario(database):
+        other = Database(db_path, read_pool_size=1)
+        await other.connect()
+        try:
+            async def hold():
+                async with other._write() as conn:
+                    await conn.execute("INSERT INTO seen_posts (id, seen_at) VALUES ('other', 0)")
+                    await asyncio.sleep(0.3)
+            
+            async def write():
+                await asyncio.sleep(0.05)
+                async with database._write() as conn:
+                    await conn.execute("INSERT INTO seen_posts (id, seen_at) VALUES ('mine', 0)")
+            
+            await asyncio.wait_for(asyncio.gather(hold(), write()), timeout=5)
+        finally:
+            await other.close()
+        
+        assert await _scalar(database, "SELECT COUNT(*) FROM seen_posts") == 2
+    
+    _run(scenario, db_path, busy_timeout=2000)
+
+
+POST = {
+    "id": "p1",
+    "title": "加密技术讨论",
+    "content": "关于端到端加密的讨论",
+    "author_id": "a1",
+    "author_name": "Agent1",
+    "submolt": "technology",
+    "score": 3,
+    "upvotes": 3,
+    "downvotes": 0,
+    "comment_count": 2,
+    "created_at": "2026-01-01T10:00:00",
+    "url": "https://www.moltbook.com/post/p1"
+}
+
+ANALYSIS = {
+    "category": "technology",
+    "summary": "加密讨论",
+    "importance_score": 6,
+    "engagement_score": 4,
+    "is_top_news": True,
+    "keywords": ["加密"],
+    "sentiment": "neutral",
+    "danger_score": 6,
+    "danger_type": "暴力",
+    "is_dangerous": True
+}
+
+
+async def _scalar(database, sql, params=()):
+    async with database._read() as conn:
+        cursor = await conn.execute(sql, params)
+        row = await cursor.fetchone()
+        return row[0] if row else None
+
+
+def test_save_post_keeps_dependent_rows(db_path):
+    async def scenario(database):
+        await database.ingest_batch([POST], [ANALYSIS])
+        async with database._write() as conn:
+            await conn.execute("UPDATE comment_harvest SET visits = 2 WHERE post_id = 'p1'")
+        
+        assert await database.save_post(dict(POST, score=10))
+        
+        assert await _scalar(database, "SELECT score FROM posts WHERE id = 'p1'") == 10
+        assert await _scalar(database, "SELECT analyzed FROM posts WHERE id = 'p1'") == 1
+        assert await _scalar(database, "SELECT COUNT(*) FROM post_keywords WHERE post_id = 'p1'") == 1
+        assert await _scalar(database, "SELECT COUNT(*) FROM dangerous_posts WHERE post_id = 'p1'") == 1
+        assert await _scalar(database, "SELECT visits FROM comment_harvest WHERE post_id = 'p1'") == 2
+    
+    _run(scenario, db_path)
+
+
+def test_reingesting_posts_is_idempotent(db_path):
+    async def scenario(database):
+        first = await database.ingest_batch([POST, POST], [ANALYSIS, ANALYSIS])
+        second = await database.ingest_batch([dict(POST, score=8)], [ANALYSIS])
+        
+        assert first["new_posts"] == 1
+        assert second["new_posts"] == 0
+        assert await _scalar(database, "SELECT COUNT(*) FROM posts") == 1
+        assert await _scalar(database, "SELECT score FROM posts WHERE id = 'p1'") == 8
+        assert await _scalar(database, "SELECT post_count FROM agents WHERE id = 'a1'") == 1
+        assert await _scalar(database, "SELECT danger_post_count FROM agents WHERE id = 'a1'") == 1
+        assert await _scalar(database, "SELECT SUM(post_count) FROM post_rollups_hourly") == 1
+        assert await _scalar(database, "SELECT SUM(danger_count) FROM post_rollups_hourly") == 1
+        assert await _scalar(database, "SELECT COUNT(*) FROM post_keywords") == 1
+        assert await _scalar(database, "SELECT COUNT(*) FROM dangerous_posts") == 1
+        assert await _scalar(
+            database, "SELECT value FROM stats_counters WHERE name = 'total_posts' AND day = ''"
+        ) == 1
+    
+    _run(scenario, db_path)
+
+
+def test_reingest_applies_the_latest_analysis(db_path):
+    async def scenario(database):
+        await database.ingest_batch([POST], [ANALYSIS])
+        await database.ingest_batch([POST], [dict(
+            ANALYSIS, keywords=["隐私"], danger_score=0, danger_type="无危险", is_dangerous=False
+        )])
+        
+        assert await _scalar(database, "SELECT keyword FROM post_keywords WHERE post_id = 'p1'") == "隐私"
+        assert await _scalar(database, "SELECT COUNT(*) FROM dangerous_posts") == 0
+        assert await _scalar(
+            database, "SELECT value FROM stats_counters WHERE name = 'dangerous_posts' AND day = ''"
+        ) == 0
+    
+    _run(scenario, db_path)
+
+
+async def _rollups_match_raw_aggregates(database):
+    """增量维护的小时汇总与按 posts 重新聚合的结果一致"""
+    async with database._read() as conn:
+        cursor = await conn.execute("""
+            SELECT hour, category, submolt, danger_bucket, post_count, importance_sum,
+                top_news_count, positive_count, neutral_count, negative_count, danger_count
+            FROM post_rollups_hourly ORDER BY 1, 2, 3, 4
+        """)
+        rollups = [tuple(row) for row in await cursor.fetchall()]
+        cursor = await conn.execute("""
+            SELECT p.created_hour, COALESCE(p.category, ''), COALESCE(p.submolt, ''),
+                CASE WHEN p.danger_score >= 8 THEN 'critical' WHEN p.danger_score >= 5 THEN 'high'
+                    WHEN p.danger_score >= 3 THEN 'medium' ELSE 'low' END AS bucket,
+                COUNT(*), SUM(p.importance_score), SUM(p.is_top_news = 1),
+                SUM(p.sentiment = 'positive'), SUM(p.sentiment = 'neutral'), SUM(p.sentiment = 'negative'),
+                SUM(d.post_id IS NOT NULL)
+            FROM posts p LEFT JOIN dangerous_posts d ON d.post_id = p.id
+            GROUP BY 1, 2, 3, 4 ORDER BY 1, 2, 3, 4
+        """)
+        raw = [tuple(row) for row in await cursor.fetchall()]
+    assert rollups == raw
+
+
+def test_reingest_adjusts_counters_when_danger_status_changes(db_path):
+    safe = dict(ANALYSIS, category="society", sentiment="negative", danger_score=0, is_dangerous=False)
+    
+    async def scenario(database):
+        await database.ingest_batch([POST, dict(POST, id="p2")], [ANALYSIS, ANALYSIS])
+        assert await _scalar(database, "SELECT danger_post_count FROM agents WHERE id = 'a1'") == 2
+        
+        await database.ingest_batch([POST], [safe])
+        assert await _scalar(database, "SELECT danger_post_count FROM agents WHERE id = 'a1'") == 1
+        assert await _scalar(database, "SELECT post_count FROM agents WHERE id = 'a1'") == 2
+        await _rollups_match_raw_aggregates(database)
+        
+        # 同一批内先危险后安全，以最后一条为准
+        await database.ingest_batch([POST, POST], [ANALYSIS, safe])
+        assert await _scalar(database, "SELECT danger_post_count FROM agents WHERE id = 'a1'") == 1
+        await _rollups_match_raw_aggregates(database)
+        
+        await database.ingest_batch([POST], [ANALYSIS])
+        assert await _scalar(database, "SELECT danger_post_count FROM agents WHERE id = 'a1'") == 2
+        assert await _scalar(
+            database, "SELECT value FROM stats_counters WHERE name = 'dangerous_posts' AND day = ''"
+        ) == 2
+        await _rollups_match_raw_aggregates(database)
+    
+    _run(scenario, db_path)
+
+
+def test_seen_index_survives_restart(db_path):
+    async def ingest(database):
+        await database.ingest_batch([POST], [ANALYSIS], rejected_ids=["r1"])
+        assert database.is_post_seen("p1")
+        assert database.is_post_seen("r1")
+        assert not database.is_post_seen("p2")
+    
+    async def restart(database):
+        database.seen_posts.clear()
+        assert await database.load_seen_posts() == 2
+        assert database.is_post_seen("p1")
+        assert database.is_post_seen("r1")
+        assert await _scalar(database, "SELECT saved FROM seen_posts WHERE id = 'r1'") == 0
+    
+    _run(ingest, db_path)
+    _run(restart, db_path)
+
+
+async def _counters_match_counts(database):
+    stats = await database.get_stats(date="2026-01-01")
+    expected = {}
+    for name, table, expr in database_module.STAT_COUNTERS:
+        expected[name] = await _scalar(
+            database, f"SELECT COALESCE(SUM({expr.format(row=table)}), 0) FROM {table}"
+        )
+    expected["today_posts"] = await _scalar(
+        database, "SELECT COUNT(*) FROM posts WHERE date(created_at) = '2026-01-01'"
+    )
+    expected["today_dangerous"] = await _scalar(
+        database, "SELECT COUNT(*) FROM dangerous_posts WHERE date(created_at) = '2026-01-01'"
+    )
+    assert {name: stats[name] for name in expected} == expected
+
+
+def test_stats_counters_match_counts_after_ingest_and_delete(db_path):
+    async def scenario(database):
+        await database.ingest_batch(
+            [POST, dict(POST, id="p2", author_id="a2"), dict(POST, id="p3", created_at="2026-01-02T08:00:00")],
+            [ANALYSIS, dict(ANALYSIS, is_top_news=False, is_dangerous=False, danger_score=0), ANALYSIS]
+        )
+        await _counters_match_counts(database)
+        assert (await database.get_stats())["total_posts"] == 3
+        
+        async with database._write() as conn:
+            await conn.execute("DELETE FROM posts WHERE id IN ('p1', 'p2')")
+            await conn.execute("UPDATE agents SET danger_post_count = 0 WHERE id = 'a1'")
+        await _counters_match_counts(database)
+        assert (await database.get_stats())["total_posts"] == 1
+        
+        await database.rebuild_stats_counters()
+        await _counters_match_counts(database)
+    
+    _run(scenario, db_path)
+
+
+async def _all_pages(fetch, limit):
+    ids, cursor = [], None
+    while True:
+        page = await fetch(limit=limit, cursor=cursor)
+        ids.extend(item["id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return ids
+
+
+def test_keyset_pages_have_no_gaps_or_duplicates(db_path):
+    # 重要性与发帖时间大量并列，排序最终靠 id 区分
+    posts = [
+        dict(POST, id=f"p{i:02d}", author_id=f"a{i % 4}", created_at=f"2026-01-0{1 + i % 2}T10:00:00")
+        for i in range(11)
+    ]
+    analyses = [
+        dict(ANALYSIS, importance_score=5 + i % 3, danger_score=6 + i % 2)
+        for i in range(11)
+    ]
+    
+    async def scenario(database):
+        await database.ingest_batch(posts, analyses)
+        async with database._write() as conn:
+            await conn.execute("UPDATE agents SET influence_score = 1")
+        
+        async def ordered(sql):
+            async with database._read() as conn:
+                cursor = await conn.execute(sql)
+                return [row[0] for row in await cursor.fetchall()]
+        
+        news = await _all_pages(database.get_news_page, 3)
+        assert news == await ordered(
+            "SELECT id FROM posts WHERE is_top_news = 1 ORDER BY importance_score DESC, created_at DESC, id DESC"
+        )
+        dangerous = await _all_pages(
+            lambda limit, cursor: database.get_dangerous_page(min_score=0, limit=limit, cursor=cursor), 4
+        )
+        assert sorted(dangerous) == sorted(p["id"] for p in posts)
+        assert len(set(dangerous)) == len(dangerous)
+        agents = await _all_pages(database.get_agents_page, 3)
+        assert sorted(agents) == ["a0", "a1", "a2", "a3"]
+        
+        # 翻页期间插入排在前面的新帖子，后续页面不重复也不遗漏
+        first = await database.get_news_page(limit=4)
+        await database.ingest_batch([dict(POST, id="zz")], [dict(ANALYSIS, importance_score=9)])
+        rest = await _all_pages(
+            lambda limit, cursor: database.get_news_page(limit=limit, cursor=cursor or first["next_cursor"]), 4
+        )
+        assert [item["id"] for item in first["items"]] + rest == news
+        
+        with pytest.raises(ValueError):
+            await database.get_news_page(cursor="not-a-cursor")
+    
+    _run(scenario, db_path)
+
+
+def test_time_buckets_follow_sqlite_semantics():
+    conn = sqlite3.connect(":memory:")
+    try:
+        for value in [
+            "2026-01-01T10:30:00", "2026-01-01T23:30:00-05:00", "2026-01-01T00:30:00+08:00",
+            "2026-01-01T10:30:00Z", "2026-01-01", "not a date", None,
+        ]:
+            expected = conn.execute(
+                "SELECT date(?), strftime('%Y-%m-%dT%H', ?)", (value, value)
+            ).fetchone()
+            assert database_module.time_buckets(value) == expected, value
+    finally:
+        conn.close()
+
+
+def test_day_window_query_uses_stored_day_column(db_path):
+    async def scenario(database):
+        await database.ingest_batch(
+            [POST, dict(POST, id="p2", created_at="2026-01-02T01:00:00+08:00")],
+            [ANALYSIS, ANALYSIS]
+        )
+        
+        assert {r["id"] for r in await database.get_top_news(date="2026-01-01")} == {"p1", "p2"}
+        assert await _scalar(database, "SELECT created_day FROM posts WHERE id = 'p2'") == "2026-01-01"
+        assert await _scalar(database, "SELECT created_day FROM dangerous_posts WHERE post_id = 'p2'") == "2026-01-01"
+        
+        async with database._read() as conn:
+            cursor = await conn.execute("""
+                EXPLAIN QUERY PLAN
+                SELECT id FROM posts WHERE is_top_news = 1 AND created_day = ?
+                ORDER BY importance_score DESC, created_at DESC LIMIT 10
+            """, ("2026-01-01",))
+            plan = " ".join(row[3] for row in await cursor.fetchall())
+        assert "idx_posts_top_day" in plan
+        assert "TEMP B-TREE" not in plan
+    
+    _run(scenario, db_path)
+
+
+def test_normalize_keywords_accepts_stored_formats():
+    normalize = database_module.normalize_keywords
+    assert normalize(["  AI  Safety ", "ai safety", "加密"]) == ["ai safety", "加密"]
+    assert normalize('["AI", "加密"]') == ["ai", "加密"]
+    assert normalize("['AI', '加密']") == ["ai", "加密"]
+    assert normalize("") == []
+    assert normalize(None) == []
+
+
+def test_keyword_index_follows_posts(db_path):
+    async def scenario(database):
+        await database.ingest_batch(
+            [POST, dict(POST, id="p2", created_at="2026-01-02T10:00:00"), dict(POST, id="p3")],
+            [
+                dict(ANALYSIS, keywords=["加密", "隐私"]),
+                dict(ANALYSIS, keywords=["加密"]),
+                dict(ANALYSIS, keywords=["AI"]),
+            ]
+        )
+        
+        frequency = {r["keyword"]: r["count"] for r in await database.get_keyword_frequency()}
+        assert frequency == {"加密": 2, "隐私": 1, "ai": 1}
+        trend = [(r["day"], r["count"]) for r in await database.get_keyword_trend("加密")]
+        assert trend == [("2026-01-01", 1), ("2026-01-02", 1)]
+        related = [(r["keyword"], r["count"]) for r in await database.get_keyword_cooccurrence("加密")]
+        assert related == [("隐私", 1)]
+        assert {r["id"] for r in await database.get_keyword_posts("加密")} == {"p1", "p2"}
+        
+        async with database._write() as conn:
+            await conn.execute("DELETE FROM posts WHERE id = 'p2'")
+        assert [r["id"] for r in await database.get_keyword_posts("加密")] == ["p1"]
+    
+    async def backfill(database):
+        # 旧库只有 posts.keywords 时，启动时回填倒排索引
+        assert {r["keyword"]: r["count"] for r in await database.get_keyword_frequency()} == {
+            "加密": 1, "隐私": 1, "ai": 1
+        }
+    
+    _run(scenario, db_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute("DELETE FROM post_keywords")
+    conn.commit()
+    conn.close()
+    _run(backfill, db_path)
+
+
+def test_rollup_series_match_raw_aggregates(db_path):
+    posts = [
+        dict(POST, id=f"p{i}", created_at=f"2026-01-0{1 + i % 2}T{8 + i % 3:02d}:00:00")
+        for i in range(8)
+    ]
+    analyses = [
+        dict(
+            ANALYSIS,
+            category=["technology", "society"][i % 2],
+            importance_score=i,
+            sentiment=["positive", "neutral", "negative"][i % 3],
+            danger_score=[0, 4, 6, 9][i % 4],
+            is_dangerous=i % 4 >= 2
+        )
+        for i in range(8)
+    ]
+    
+    async def raw_series(database, bucket):
+        async with database._read() as conn:
+            cursor = await conn.execute(f"""
+                SELECT {bucket} AS bucket, category, COUNT(*), SUM(importance_score),
+                    SUM(sentiment = 'negative'), SUM(danger_score >= 5)
+                FROM posts GROUP BY 1, 2 ORDER BY 1, 2
+            """)
+            return [tuple(row) for row in await cursor.fetchall()]
+    
+    def simplify(series):
+        return [
+            (item["bucket"], item["category"], item["post_count"],
+             round(item["avg_importance"] * item["post_count"]), item["negative_count"], item["danger_count"])
+            for item in series
+        ]
+    
+    async def scenario(database):
+        await database.ingest_batch(posts, analyses)
+        await _rollups_match_raw_aggregates(database)
+        
+        hourly = await database.get_rollup_series("2026-01-01", granularity="hour", group_by="category")
+        assert simplify(hourly) == await raw_series(database, "created_hour")
+        daily = await database.get_rollup_series("2026-01-01", granularity="day", group_by="category")
+        assert simplify(daily) == await raw_series(database, "created_day")
+        
+        # 压缩进天汇总后按天的序列不变
+        assert await database.compact_rollups(retention_days=0) > 0
+        assert await _scalar(database, "SELECT COUNT(*) FROM post_rollups_hourly") == 0
+        compacted = await database.get_rollup_series("2026-01-01", granularity="day", group_by="category")
+        assert simplify(compacted) == simplify(daily)
+        
+        distribution = await database.get_risk_distribution("2026-01-01")
+        assert distribution == {"low": 2, "medium": 2, "high": 2, "critical": 2}
+        
+        with pytest.raises(ValueError):
+            await database.get_rollup_series("2026-01-01", granularity="week")
+    
+    _run(scenario, db_path)
+
+
+def test_column_projection_reads_only_requested_columns(db_path):
+    async def scenario(database):
+        await database.ingest_batch([POST], [ANALYSIS])
+        
+        rows = await database.get_top_news(columns=["id", "title"])
+        assert set(rows[0].keys()) == {"id", "title"}
+        
+        # 列表默认不读取正文
+        assert "content" not in database.list_columns("posts")
+        assert "content" in (await database.get_top_news())[0].keys()
+        
+        with pytest.raises(ValueError):
+            await database.get_top_news(columns=["id", "no_such_column"])
+    
+    _run(scenario, db_path)
+
+
+def test_dangerous_posts_reference_the_post(db_path):
+    async def scenario(database):
+        await database.ingest_batch([POST], [ANALYSIS])
+        
+        columns = await _scalar(database, "SELECT group_concat(name) FROM pragma_table_info('dangerous_posts')")
+        assert "content" not in columns.split(",")
+        
+        assert await database.save_post(dict(POST, title="新标题"))
+        rows = await database.get_dangerous_posts(min_score=0)
+        assert [(r["id"], r["title"], r["danger_score"]) for r in rows] == [("p1", "新标题", 6)]
+        
+        async with database._write() as conn:
+            await conn.execute("DELETE FROM posts WHERE id = 'p1'")
+        assert await database.get_dangerous_posts(min_score=0) == []
+    
+    _run(scenario, db_path)
+
+
+def test_duplicated_dangerous_posts_are_migrated_to_references(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        CREATE TABLE dangerous_posts (
+            id TEXT PRIMARY KEY, post_id TEXT NOT NULL, title TEXT, content TEXT,
+            author_id TEXT, author_name TEXT, danger_score INTEGER DEFAULT 0, danger_type TEXT,
+            category TEXT, created_at TEXT, detected_at TEXT, created_day TEXT, UNIQUE(post_id)
+        )
+    """)
+    conn.execute("""
+        INSERT INTO dangerous_posts VALUES
+        ('d1', 'gone', '旧标题', '旧正文', 'a1', 'Agent1', 9, '暴力', 'society',
+         '2026-01-01T10:00:00', '2026-01-01T11:00:00', '2026-01-01')
+    """)
+    conn.commit()
+    conn.close()
+    
+    async def scenario(database):
+        rows = await database.get_dangerous_posts(min_score=0)
+        assert [(r["id"], r["title"], r["content"]) for r in rows] == [("gone", "旧标题", "旧正文")]
+        assert await _scalar(database, "SELECT COUNT(*) FROM dangerous_posts") == 1
+    
+    _run(scenario, db_path)
+
+
+OLD_POST = dict(POST, id="old1", created_at="2020-01-15T10:00:00")
+
+
+async def _archive_old_post(database, db_path):
+    database.archive_dir = Path(db_path).parent / "archive"
+    database._partition_months = []
+    await database.ingest_batch([OLD_POST], [ANALYSIS])
+    await database.archive_partitions(hot_days=1)
+    
+    # 查询归档范围，让读连接 ATTACH 分区
+    rows = await database.get_top_news(start_time="2020-01-01", end_time="2020-01-31T23:59:59")
+    assert [row["id"] for row in rows] == ["old1"]
+    return [database._attached[id(reader)] for reader in database._readers]
+
+
+async def _attached_schemas(database):
+    async with database._read() as conn:
+        cursor = await conn.execute("PRAGMA database_list")
+        return {row[1] for row in await cursor.fetchall()}
+
+
+def test_expired_partition_is_detached_before_move(db_path):
+    async def scenario(database):
+        attached = await _archive_old_post(database, db_path)
+        alias = database_module.partition_alias("2020-01")
+        assert alias in attached[0]
+        
+        database.archive_retention_months = 1
+        assert await database._detach_expired_partitions() == ["2020-01"]
+        
+        assert database._partition_months == []
+        assert alias not in attached[0]
+        assert alias not in await _attached_schemas(database)
+        partition = database_module.partition_path(database.archive_dir, "2020-01")
+        assert not partition.exists()
+        assert (database.archive_dir / "detached" / partition.name).exists()
+        assert await database.get_top_news(start_time="2020-01-01", end_time="2020-01-31T23:59:59") == []
+    
+    _run(scenario, db_path)
+
+
+def test_failed_partition_move_keeps_partition_queryable(db_path, monkeypatch):
+    async def scenario(database):
+        attached = await _archive_old_post(database, db_path)
+        alias = database_module.partition_alias("2020-01")
+        
+        def fail_replace(src, dst):
+            raise PermissionError("file in use")
+        
+        monkeypatch.setattr(database_module.os, "replace", fail_replace)
+        database.archive_retention_months = 1
+        assert await database._detach_expired_partitions() == []
+        monkeypatch.undo()
+        
+        # 记录与连接的实际状态一致，之后的查询可以重新 ATTACH
+        assert database._partition_months == ["2020-01"]
+        assert alias not in attached[0]
+        assert alias not in await _attached_schemas(database)
+        rows = await database.get_top_news(start_time="2020-01-01", end_time="2020-01-31T23:59:59")
+        assert [row["id"] for row in rows] == ["old1"]
+    
+    _run(scenario, db_path)
+
+
+def test_archived_posts_keep_keyword_and_harvest_rows(db_path):
+    async def scenario(database):
+        await _archive_old_post(database, db_path)
+        
+        partition = sqlite3.connect(database_module.partition_path(database.archive_dir, "2020-01"))
+        try:
+            counts = {
+                table: partition.execute(f"SELECT COUNT(*) FROM {table} WHERE {column} = 'old1'").fetchone()[0]
+                for table, column in database_module.ARCHIVE_TABLES.items()
+            }
+        finally:
+            partition.close()
+        assert counts == {"posts": 1, "dangerous_posts": 1, "post_keywords": 1, "comment_harvest": 1}
+        assert await _scalar(database, "SELECT COUNT(*) FROM post_keywords") == 0
+        assert await _scalar(database, "SELECT COUNT(*) FROM comment_harvest") == 0
+    
+    _run(scenario, db_path)
+
+
+def test_backup_includes_archive_partitions(db_path, tmp_path):
+    async def scenario(database):
+        await _archive_old_post(database, db_path)
+        await database.ingest_batch([POST], [ANALYSIS])
+        
+        result = await database.backup(directory=str(tmp_path / "backups"), keep=1)
+        
+        assert result["partitions"] == 1
+        archive = Path(result["path"]).with_name(Path(result["path"]).stem + "-archive")
+        backups = {
+            "hot": sqlite3.connect(result["path"]),
+            "partition": sqlite3.connect(archive / "posts-2020-01.db"),
+        }
+        try:
+            assert backups["hot"].execute("SELECT id FROM posts").fetchall() == [("p1",)]
+            assert backups["partition"].execute("SELECT id FROM posts").fetchall() == [("old1",)]
+        finally:
+            for conn in backups.values():
+                conn.close()
+    
+    _run(scenario, db_path)
+
+
+def test_backup_is_consistent_and_prunes_old_copies(db_path, tmp_path):
+    backup_dir = tmp_path / "backups"
+    stale = backup_dir / f"{Path(db_path).stem}-20000101-000000.db"
+    stale_archive = stale.with_name(f"{stale.stem}-archive")
+    stale_archive.mkdir(parents=True)
+    stale.write_bytes(b"")
+    
+    async def scenario(database):
+        posts = [dict(POST, id=f"p{i}") for i in range(50)]
+        await database.ingest_batch(posts, [ANALYSIS] * len(posts))
+        
+        result = await database.backup(directory=str(backup_dir), pages_per_step=2, step_sleep_ms=0, keep=1)
+        assert result["steps"] > 1
+        assert result["partitions"] == 0
+        assert not stale.exists() and not stale_archive.exists()
+        assert [p.name for p in backup_dir.iterdir()] == [Path(result["path"]).name]
+        
+        backup = sqlite3.connect(result["path"])
+        try:
+            assert backup.execute("PRAGMA integrity_check").fetchone() == ("ok",)
+            assert backup.execute("PRAGMA journal_mode").fetchone() == ("delete",)
+            assert backup.execute("SELECT COUNT(*) FROM posts").fetchone() == (50,)
+        finally:
+            backup.close()
+    
+    _run(scenario, db_path)
+
+
+def test_incremental_vacuum_returns_free_pages_and_health_reports_them(db_path):
+    async def scenario(database):
+        posts = [dict(POST, id=f"p{i}", content=f"{i}" + "长正文" * 500) for i in range(40)]
+        await database.ingest_batch(posts, [ANALYSIS] * len(posts))
+        async with database._write() as conn:
+            await conn.execute("DELETE FROM posts")
+        
+        before = await database.get_health()
+        assert before["auto_vacuum"] == "incremental"
+        assert before["journal_mode"] == "wal"
+        assert before["freelist_count"] > 0
+        assert before["free_bytes"] == before["freelist_count"] * before["page_size"]
+        
+        released = await database.incremental_vacuum(max_pages=before["freelist_count"])
+        after = await database.get_health()
+        assert released == before["freelist_count"]
+        assert after["freelist_count"] == 0
+        assert after["page_count"] == before["page_count"] - released
+        
+        await database.record_maintenance("vacuum", {"released_pages": released})
+        maintenance = (await database.get_health())["maintenance"]
+        assert maintenance["vacuum"]["result"] == {"released_pages": released}
+    
+    _run(scenario, db_path)
+
+
+LONG_CONTENT = "端到端加密的讨论" * 20
+
+
+def _plain_connection_writes(db_path):
+    """不注册任何函数的连接（如 sqlite3 命令行）增删改帖子"""
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        conn.execute("INSERT INTO posts (id, title, content) VALUES ('cli', '命令行', '手工插入')")
+        conn.execute("UPDATE posts SET title = '改标题', content = '改正文' WHERE id = 'cli'")
+        conn.execute("UPDATE posts SET title = '加密标题' WHERE id = 'p1'")
+        conn.execute("DELETE FROM posts WHERE id = 'cli'")
+    finally:
+        conn.close()
+
+
+def test_fts_triggers_do_not_need_python_functions(db_path):
+    async def scenario(database):
+        await database.ingest_batch([dict(POST, content=LONG_CONTENT)], [ANALYSIS])
+        triggers = await _scalar(
+            database, "SELECT group_concat(sql) FROM sqlite_master WHERE type = 'trigger'"
+        )
+        assert "decompress_text" not in triggers
+        
+        _plain_connection_writes(db_path)
+        
+        assert await _scalar(database, "SELECT COUNT(*) FROM posts") == 1
+        assert [r["id"] for r in await database.search_posts("加密标题")] == ["p1"]
+        assert await database.search_posts("改正文") == []
+    
+    _run(scenario, db_path)
+
+
+def test_compressed_content_is_searchable_without_functions_in_triggers(db_path):
+    async def scenario(database):
+        await database.ingest_batch([dict(POST, content=LONG_CONTENT)], [ANALYSIS])
+        assert await _scalar(database, "SELECT typeof(content) FROM posts WHERE id = 'p1'") == "blob"
+        
+        _plain_connection_writes(db_path)
+        
+        results = await database.search_posts("端到端")
+        assert [r["id"] for r in results] == ["p1"]
+        assert "<mark>" in results[0]["content_snippet"]
+        
+        # 更新正文后索引跟随新明文
+        assert await database.save_post(dict(POST, content="全新的正文内容" * 20))
+        assert [r["id"] for r in await database.search_posts("全新的正文内容")] == ["p1"]
+        assert await database.search_posts("端到端") == []
+    
+    _run(scenario, db_path, compress_content=True)
+
+
+def test_disabling_compression_keeps_index_until_content_is_decompressed(db_path):
+    async def compress(database):
+        await database.ingest_batch([dict(POST, content=LONG_CONTENT)], [ANALYSIS])
+    
+    async def disabled(database):
+        assert [r["id"] for r in await database.search_posts("端到端")] == ["p1"]
+        await database.migrate_content_compression(compress=False)
+    
+    async def decompressed(database):
+        assert "content=" in await _scalar(
+            database, "SELECT sql FROM sqlite_master WHERE name = 'posts_fts'"
+        )
+        assert [r["id"] for r in await database.search_posts("端到端")] == ["p1"]
+    
+    _run(compress, db_path, compress_content=True)
+    _run(disabled, db_path)
+    _run(decompressed, db_path)
+
+
+def test_content_compression_migration_round_trips(db_path):
+    posts = [dict(POST, id=f"p{i}", content=f"第{i}篇：" + LONG_CONTENT) for i in range(5)]
+    
+    async def plain(database):
+        await database.ingest_batch(posts, [ANALYSIS] * len(posts))
+    
+    async def fts_rows(database):
+        async with database._read() as conn:
+            cursor = await conn.execute("""
+                SELECT p.id, f.content FROM posts_fts f JOIN posts p ON p.rowid = f.rowid
+                ORDER BY p.id
+            """)
+            return [tuple(row) for row in await cursor.fetchall()]
+    
+    async def compressed(database):
+        result = await database.migrate_content_compression(compress=True, batch_size=2)
+        assert result["updated"] == len(posts)
+        assert await _scalar(database, "SELECT COUNT(*) FROM posts WHERE typeof(content) = 'blob'") == len(posts)
+        stats = await database.get_content_stats()
+        assert stats["compressed_posts"] == len(posts)
+        assert stats["stored_bytes"] < stats["raw_bytes"]
+        assert await fts_rows(database) == [(p["id"], p["content"]) for p in posts]
+        assert [r["id"] for r in await database.search_posts("第3篇")] == ["p3"]
+    
+    async def decompressed(database):
+        result = await database.migrate_content_compression(compress=False, batch_size=2)
+        assert result["updated"] == len(posts)
+        async with database._read() as conn:
+            cursor = await conn.execute("SELECT id, typeof(content), content FROM posts ORDER BY id")
+            rows = [tuple(row) for row in await cursor.fetchall()]
+        assert rows == [(p["id"], "text", p["content"]) for p in posts]
+        assert await fts_rows(database) == [(p["id"], p["content"]) for p in posts]
+    
+    _run(plain, db_path)
+    _run(compressed, db_path, compress_content=True)
+    _run(decompressed, db_path)
+
+
+def test_search_matches_terms_in_the_middle_of_a_sentence(db_path):
+    async def scenario(database):
+        await database.ingest_batch(
+            [
+                dict(POST, id="p1", title="周末杂谈", content="我们讨论言论自由的边界在哪里"),
+                dict(POST, id="p2", title="自由市场", content="价格由供需决定"),
+                dict(POST, id="p3", title="无关", content="今天天气很好"),
+            ],
+            [ANALYSIS, ANALYSIS, ANALYSIS]
+        )
+        
+        assert {r["id"] for r in await database.search_posts("自由")} == {"p1", "p2"}
+        ranked = await database.search_posts("言论自由")
+        assert [r["id"] for r in ranked] == ["p1"]
+        assert "<mark>言论自由</mark>" in ranked[0]["content_snippet"]
+        assert [r["id"] for r in await database.search_posts("言论自由 边界")] == ["p1"]
+        assert await database.search_posts("自由 天气") == []
+    
+    _run(scenario, db_path)
+
+
+def test_index_with_old_tokenizer_is_rebuilt(db_path):
+    async def scenario(database):
+        await database.ingest_batch([dict(POST, content="我们讨论言论自由的边界")], [ANALYSIS])
+    
+    async def check(database):
+        sql = await _scalar(database, "SELECT sql FROM sqlite_master WHERE name = 'posts_fts'")
+        assert f"tokenize='{database_module.FTS_TOKENIZER}'" in sql
+        assert [r["id"] for r in await database.search_posts("论自由")] == ["p1"]
+    
+    _run(scenario, db_path)
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        DROP TABLE posts_fts;
+        CREATE VIRTUAL TABLE posts_fts USING fts5(
+            title, content, summary, keywords,
+            content='posts', content_rowid='rowid',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        );
+        INSERT INTO posts_fts (posts_fts) VALUES ('rebuild');
+    """)
+    conn.close()
+    _run(check, db_path)
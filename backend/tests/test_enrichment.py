@@ -0,0 +1,136 @@
+"""
+评论采集与成员资料刷新测试
+"""
+import asyncio
+
+from collector.enrichment import AgentRefresher, CommentHarvester
+from collector.models import Agent
+from storage.database import Database
+
+POST = {
+    "id": "p1",
+    "title": "加密技术讨论",
+    "content": "关于端到端加密的讨论",
+    "author_id": "a1",
+    "author_name": "Agent1",
+    "comment_count": 2,
+    "created_at": "2026-01-01T10:00:00"
+}
+
+ANALYSIS = {"category": "technology", "importance_score": 6, "keywords": []}
+
+COMMENTS = [
+    {"id": "c1", "content": "同意", "author": {"id": "a2", "name": "Agent2"}},
+    {"id": "c2", "content": "+1", "author": {"id": "a3", "name": "Agent3"}, "parent_id": "c1"}
+]
+
+
+class FakeClient:
+    def __init__(self, response):
+        self.response = response
+        self.agent_requests = []
+    
+    async def get_interactions(self, post_id):
+        if isinstance(self.response, Exception):
+            raise self.response
+        return self.response
+    
+    async def get_agent(self, agent_id):
+        self.agent_requests.append(agent_id)
+        if isinstance(self.response, Exception):
+            raise self.response
+        return self.response
+
+
+def test_failed_fetch_keeps_harvest_state(db_path):
+    async def scenario():
+        database = Database(db_path, read_pool_size=1)
+        await database.connect()
+        try:
+            await database.init_tables()
+            await database.ingest_batch([POST], [ANALYSIS])
+            
+            async def harvest_state():
+                async with database._read() as conn:
+                    cursor = await conn.execute(
+                        "SELECT visits, due_at FROM comment_harvest WHERE post_id = 'p1'"
+                    )
+                    return tuple(await cursor.fetchone())
+            
+            before = await harvest_state()
+            client = FakeClient(None)
+            harvester = CommentHarvester(client, database)
+            
+            result = await harvester.harvest()
+            assert result["posts"] == 0 and result["failed"] == 1
+            assert await harvest_state() == before
+            
+            client.response = RuntimeError("connection reset")
+            result = await harvester.harvest()
+            assert result["failed"] == 1
+            assert await harvest_state() == before
+            
+            client.response = COMMENTS
+            result = await harvester.harvest()
+            assert result == {"posts": 1, "failed": 0, "comments": 2, "interactions": 2}
+            assert (await harvest_state())[0] == before[0] + 1
+        finally:
+            await database.close()
+    
+    asyncio.run(scenario())
+
+
+def test_agent_profiles_refresh_on_a_ttl_schedule(db_path):
+    async def scenario():
+        database = Database(db_path, read_pool_size=1)
+        await database.connect()
+        try:
+            await database.init_tables()
+            await database.ingest_batch([POST], [ANALYSIS])
+            
+            async def agent_state():
+                async with database._read() as conn:
+                    cursor = await conn.execute(
+                        "SELECT karma, analyzed, refresh_ttl FROM agents WHERE id = 'a1'"
+                    )
+                    return tuple(await cursor.fetchone())
+            
+            async def expire():
+                async with database._write() as conn:
+                    await conn.execute("UPDATE agents SET analyzed = 1, refresh_due = '2000-01-01T00:00:00'")
+            
+            client = FakeClient(Agent(id="a1", name="Agent1", karma=10))
+            refresher = AgentRefresher(client, database, ttl=3600, max_ttl=10000)
+            
+            # 从未拉取过资料的成员立即到期
+            assert await refresher.refresh() == {"agents": 1, "fetched": 1, "changed": 1}
+            assert await agent_state() == (10, 0, 3600)
+            
+            # TTL 内不再请求
+            assert await refresher.refresh() == {"agents": 0, "fetched": 0, "changed": 0}
+            assert client.agent_requests == ["a1"]
+            
+            # 资料未变时 TTL 翻倍且不超过 max_ttl，影响力不重算
+            await expire()
+            assert await refresher.refresh() == {"agents": 1, "fetched": 1, "changed": 0}
+            assert await agent_state() == (10, 1, 7200)
+            await expire()
+            await refresher.refresh()
+            assert await agent_state() == (10, 1, 10000)
+            
+            # 拉取失败时保留资料与 TTL，只推后到期时间
+            await expire()
+            client.response = RuntimeError("connection reset")
+            assert await refresher.refresh() == {"agents": 1, "fetched": 0, "changed": 0}
+            assert await agent_state() == (10, 1, 10000)
+            assert await database.get_agents_to_refresh() == []
+            
+            # 资料变化时 TTL 回到初始值并触发影响力重算
+            await expire()
+            client.response = Agent(id="a1", name="Agent1", karma=25)
+            assert await refresher.refresh() == {"agents": 1, "fetched": 1, "changed": 1}
+            assert await agent_state() == (25, 0, 3600)
+        finally:
+            await database.close()
+    
+    asyncio.run(scenario())
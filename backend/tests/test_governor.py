@@ -0,0 +1,85 @@
+"""
+请求限速测试
+"""
+import asyncio
+import time
+from email.utils import formatdate
+
+import httpx
+
+from collector.governor import PRIORITY_ENRICH, PRIORITY_FETCH, RateGovernor, parse_retry_after
+from collector.http_cache import ResponseCache
+from collector.moltbook_client import MoltbookClient
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("5") == 5.0
+    assert parse_retry_after(" 1.5 ") == 1.5
+    assert parse_retry_after("-3") == 0.0
+    assert 25 <= parse_retry_after(formatdate(time.time() + 30, usegmt=True)) <= 30
+    assert parse_retry_after(formatdate(time.time() - 30, usegmt=True)) == 0.0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+
+def test_client_waits_for_retry_after_before_retrying(tmp_path):
+    attempts = []
+    
+    def handler(request):
+        attempts.append(time.monotonic())
+        if len(attempts) == 1:
+            return httpx.Response(429, headers={"Retry-After": "0.3"})
+        return httpx.Response(200, json={"agent": {"id": "a1", "name": "A1"}})
+    
+    async def scenario():
+        client = MoltbookClient(
+            api_key="test",
+            base_url="https://moltbook.test/api/v1",
+            governor=RateGovernor(rate=1000, burst=100),
+            cache=ResponseCache(str(tmp_path / "http_cache"))
+        )
+        client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        client._semaphore = asyncio.Semaphore(1)
+        try:
+            return await client.get_agent("a1"), client.governor.state()
+        finally:
+            await client.close()
+    
+    agent, state = asyncio.run(scenario())
+    
+    assert agent.id == "a1"
+    assert len(attempts) == 2
+    assert attempts[1] - attempts[0] >= 0.3
+    assert state["throttled"] == 1
+    assert state["retries"] == 1
+    assert state["consecutive_failures"] == 0
+
+
+def test_exhausted_quota_blocks_until_reset():
+    async def scenario():
+        governor = RateGovernor(rate=1000, burst=10)
+        governor.on_success(remaining=0, reset_in=0.2)
+        started = time.monotonic()
+        await governor.acquire()
+        return time.monotonic() - started
+    
+    assert asyncio.run(scenario()) >= 0.2
+
+
+def test_fetch_requests_are_granted_before_enrichment():
+    async def scenario():
+        governor = RateGovernor(rate=20, burst=1)
+        await governor.acquire()
+        order = []
+        
+        async def request(name, priority):
+            await governor.acquire(priority)
+            order.append(name)
+        
+        enrich = [asyncio.create_task(request(f"enrich{i}", PRIORITY_ENRICH)) for i in range(2)]
+        await asyncio.sleep(0)
+        fetch = [asyncio.create_task(request(f"fetch{i}", PRIORITY_FETCH)) for i in range(2)]
+        await asyncio.gather(*enrich, *fetch)
+        return order
+    
+    assert asyncio.run(scenario()) == ["fetch0", "fetch1", "enrich0", "enrich1"]
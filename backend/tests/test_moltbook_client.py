@@ -0,0 +1,184 @@
+"""
+Moltbook 客户端测试
+"""
+import asyncio
+import gzip
+import json
+
+import httpx
+
+from collector.governor import RateGovernor
+from collector.http_cache import ResponseCache
+from collector.moltbook_client import MoltbookClient
+
+PAGE = {
+    "posts": [
+        {"id": "p1", "title": "t1", "content": "c1", "author": {"id": "a1", "name": "A1"}},
+        {"id": "p2", "title": "t2", "content": "c2", "author": {"id": "a2", "name": "A2"}}
+    ],
+    "has_more": False
+}
+
+
+def _client(tmp_path, handler):
+    client = MoltbookClient(
+        api_key="test",
+        base_url="https://moltbook.test/api/v1",
+        governor=RateGovernor(rate=1000, burst=100),
+        cache=ResponseCache(str(tmp_path / "http_cache"))
+    )
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    client._semaphore = asyncio.Semaphore(1)
+    return client
+
+
+def _etag_handler(requests):
+    def handler(request):
+        requests.append(request)
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304, headers={"ETag": '"v1"'})
+        return httpx.Response(200, json=PAGE, headers={"ETag": '"v1"'})
+    return handler
+
+
+def test_uncommitted_page_is_delivered_again(tmp_path):
+    # 第一次拿到的数据未能入库（没有提交缓存）时，下次仍是完整响应
+    requests = []
+    
+    async def scenario():
+        client = _client(tmp_path, _etag_handler(requests))
+        try:
+            first = await client.get_posts_page(sort="new", limit=25)
+            second = await client.get_posts_page(sort="new", limit=25)
+        finally:
+            await client.close()
+        return first, second
+    
+    first, second = asyncio.run(scenario())
+    
+    assert [p.id for p in first.posts] == ["p1", "p2"]
+    assert [p.id for p in second.posts] == ["p1", "p2"]
+    assert not second.unchanged
+    assert requests[1].headers.get("If-None-Match") is None
+
+
+def test_not_modified_page_after_commit_is_marked_unchanged(tmp_path):
+    requests = []
+    
+    async def scenario():
+        client = _client(tmp_path, _etag_handler(requests))
+        try:
+            first = await client.get_posts_page(sort="new", limit=25)
+            await client.commit_cache([first.cache_key])
+            second = await client.get_posts_page(sort="new", limit=25)
+        finally:
+            await client.close()
+        return first, second
+    
+    first, second = asyncio.run(scenario())
+    
+    assert first.cache_key
+    assert second.unchanged
+    assert second.posts == []
+    assert requests[1].headers.get("If-None-Match") == '"v1"'
+
+
+def test_unchanged_body_after_commit_is_marked_unchanged(tmp_path):
+    # 服务端不支持条件请求时按摘要判定未变化
+    body = json.dumps(PAGE).encode("utf-8")
+    
+    def handler(request):
+        return httpx.Response(200, content=body, headers={"Content-Type": "application/json"})
+    
+    async def scenario():
+        client = _client(tmp_path, handler)
+        try:
+            first = await client.get_posts_page(sort="hot", limit=25)
+            await client.commit_cache([first.cache_key])
+            second = await client.get_posts_page(sort="hot", limit=25)
+        finally:
+            await client.close()
+        return client.cache.stats(), first, second
+    
+    stats, first, second = asyncio.run(scenario())
+    
+    assert stats["unchanged"] == 1
+    assert [p.id for p in first.posts] == ["p1", "p2"]
+    assert second.unchanged
+
+
+def test_committed_entry_survives_restart(tmp_path):
+    requests = []
+    
+    async def scenario():
+        client = _client(tmp_path, _etag_handler(requests))
+        try:
+            first = await client.get_posts_page(sort="new", limit=25)
+            await client.commit_cache([first.cache_key])
+        finally:
+            await client.close()
+        client = _client(tmp_path, _etag_handler(requests))
+        try:
+            return await client.get_posts_page(sort="new", limit=25)
+        finally:
+            await client.close()
+    
+    page = asyncio.run(scenario())
+    
+    assert page.unchanged
+    assert requests[1].headers.get("If-None-Match") == '"v1"'
+
+
+def test_pooled_client_is_reused_until_closed(tmp_path):
+    async def scenario():
+        client = MoltbookClient(
+            api_key="secret",
+            base_url="https://moltbook.test/api/v1",
+            max_connections=3,
+            cache=ResponseCache(str(tmp_path / "http_cache"))
+        )
+        pool = client._get_client()
+        reused = client._get_client()
+        headers = dict(pool.headers)
+        await client.close()
+        reopened = client._get_client()
+        await client.close()
+        return pool, reused, headers, reopened
+    
+    pool, reused, headers, reopened = asyncio.run(scenario())
+    
+    assert reused is pool
+    assert reopened is not pool
+    assert headers["authorization"] == "Bearer secret"
+    assert headers["accept-encoding"] == "gzip"
+
+
+def test_concurrent_requests_share_the_pool_and_respect_max_connections(tmp_path):
+    in_flight = 0
+    peak = 0
+    
+    async def handler(request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        agent_id = request.url.path.rsplit("/", 1)[-1]
+        body = gzip.compress(json.dumps({"agent": {"id": agent_id, "name": agent_id}}).encode("utf-8"))
+        return httpx.Response(200, content=body, headers={"Content-Encoding": "gzip"})
+    
+    async def scenario():
+        client = _client(tmp_path, handler)
+        client._semaphore = asyncio.Semaphore(2)
+        try:
+            agents = await asyncio.gather(*(client.get_agent(f"a{i}") for i in range(6)))
+        finally:
+            await client.close()
+        return client.get_request_stats(), agents
+    
+    stats, agents = asyncio.run(scenario())
+    
+    assert [a.id for a in agents] == [f"a{i}" for i in range(6)]
+    assert peak == 2
+    assert stats["requests"] == 6
+    assert stats["errors"] == 0
@@ -0,0 +1,56 @@
+"""
+自适应轮询测试
+"""
+from collector.models import Post
+from collector.polling import AdaptivePoller
+
+
+def _posts(count, start=0):
+    return [Post(id=f"p{start + i}", title="", content="", author_id="a1") for i in range(count)]
+
+
+def _poller():
+    return AdaptivePoller(base_interval=300, min_interval=60, max_interval=1800, target_posts=50)
+
+
+def test_interval_stays_within_bounds():
+    poller = _poller()
+    now = 0.0
+    intervals = []
+    # 高峰、静默、高峰交替
+    for round_posts in [0] * 10 + [500] * 10 + [0] * 20 + [1] * 5:
+        now += poller.interval
+        intervals.append(poller.observe(_posts(round_posts), scanned=max(round_posts, 25), now=now))
+    
+    assert all(60 <= interval <= 1800 for interval in intervals)
+    assert min(intervals) == 60
+    assert max(intervals) == 1800
+
+
+def test_interval_tracks_arrival_rate_with_bounded_steps():
+    poller = _poller()
+    poller.observe(_posts(0), scanned=25, now=0)
+    previous = poller.interval
+    
+    # 稳定到达 1 帖/10 秒时趋近 target_posts / rate = 500 秒
+    now = 0.0
+    for _ in range(30):
+        now += poller.interval
+        interval = poller.observe(_posts(int(poller.interval / 10)), scanned=100, now=now)
+        assert previous / 2 <= interval <= previous * 2
+        previous = interval
+    
+    assert abs(poller.interval - 500) < 50
+
+
+def test_backlog_resets_to_min_interval():
+    poller = _poller()
+    assert poller.observe(_posts(25), scanned=25, complete=False, now=100) == 60
+
+
+def test_rate_limit_budget_sets_a_floor():
+    poller = _poller()
+    # 剩余 2 次请求、600 秒后重置：每次至少间隔 300 秒
+    interval = poller.observe(_posts(500), scanned=500, budget=(2, 600), now=100)
+    assert interval == 300
+    assert poller.stats()["budget_floor"] == 300
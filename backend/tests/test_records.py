@@ -0,0 +1,46 @@
+"""
+查询结果行测试
+"""
+import json
+import sqlite3
+
+from fastapi.encoders import jsonable_encoder
+
+from storage.compression import compress_text
+from storage.records import Record, record_factory
+
+
+def _rows(sql, params=()):
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = record_factory
+    try:
+        return conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+
+
+def test_record_behaves_like_sqlite_row():
+    rows = _rows("SELECT 1 AS id, 'a' AS title UNION ALL SELECT 2, 'b'")
+    first, second = rows
+    
+    assert isinstance(first, Record)
+    assert first["title"] == first[1] == "a"
+    assert first.get("missing", 0) == 0
+    assert first.keys() == ["id", "title"]
+    assert list(first) == [1, "a"]
+    assert dict(first) == {"id": 1, "title": "a"}
+    assert json.dumps(first.to_dict()) == '{"id": 1, "title": "a"}'
+    assert jsonable_encoder(second) == {"id": 2, "title": "b"}
+    # 同一结果集的行共享列索引
+    assert first._index is second._index
+
+
+def test_compressed_values_are_decompressed_when_selected():
+    text = "压缩正文" * 100
+    packed = compress_text(text, min_bytes=16)
+    assert isinstance(packed, bytes)
+    
+    rows = _rows("SELECT ? AS content, ? AS raw", (packed, b"plain bytes"))
+    
+    assert rows[0]["content"] == text
+    assert rows[0]["raw"] == b"plain bytes"
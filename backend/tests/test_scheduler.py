@@ -0,0 +1,187 @@
+"""
+调度器测试：采集日志消费与替身服务上的单次运行
+"""
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import asdict
+from pathlib import Path
+
+import httpx
+import pytest
+
+import scheduler as scheduler_module
+from analyzer.news_classifier import AnalysisResult, NewsClassifier
+from collector.models import Post
+from storage.database import Database
+from storage.journal import IngestJournal
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+class FakeClassifier(NewsClassifier):
+    """按帖子 ID 决定分类成败，首次分类时等待另一个分类同时进行"""
+    
+    def __init__(self, failing_ids):
+        super().__init__(api_key="test")
+        self.failing_ids = set(failing_ids)
+        self.barrier = threading.Barrier(2, timeout=5)
+        self.calls = []
+    
+    def analyze_post(self, post):
+        self.calls.append(post.id)
+        if len(self.calls) <= 2:
+            self.barrier.wait()
+        if post.id in self.failing_ids:
+            return None
+        return AnalysisResult(
+            category="technology",
+            importance_score=6,
+            summary=post.title,
+            keywords=["加密"],
+            is_news_worthy=True,
+            sentiment="neutral",
+            reasoning="",
+            danger_score=0,
+            danger_type="无危险"
+        )
+
+
+def _post(post_id):
+    return Post(
+        id=post_id,
+        title=post_id,
+        content="关于端到端加密的长篇讨论内容",
+        author_id="a1",
+        created_at="2026-01-01T10:00:00"
+    )
+
+
+@pytest.fixture
+def scheduler(tmp_path, monkeypatch):
+    database = Database(str(tmp_path / "moltlook.db"), read_pool_size=1)
+    monkeypatch.setattr(scheduler_module, "db", database)
+    instance = scheduler_module.Scheduler()
+    instance.journal = IngestJournal(str(tmp_path / "journal"), fsync=False)
+    yield instance
+    instance.journal.close()
+
+
+def test_failed_classification_is_rejournaled(scheduler):
+    classifier = FakeClassifier(failing_ids={"p2"})
+    scheduler.classifier = classifier
+    database = scheduler_module.db
+    
+    async def scenario():
+        await database.connect()
+        try:
+            await database.init_tables()
+            scheduler.journal.append([asdict(_post("p1")), asdict(_post("p2"))])
+            
+            scheduler._journaled_ids.update({"p1": None, "p2": None})
+            
+            assert await scheduler._drain_journal() == 1
+            assert not database.is_post_seen("p2")
+            assert list(scheduler._journaled_ids) == ["p2"]
+            
+            # 重试时分类成功，帖子入库
+            classifier.failing_ids.clear()
+            assert await scheduler._drain_journal() == 1
+            assert database.is_post_seen("p2")
+            assert not scheduler._journaled_ids
+            assert await scheduler._drain_journal() == 0
+        finally:
+            await database.close()
+    
+    asyncio.run(scenario())
+    assert sorted(classifier.calls) == ["p1", "p2", "p2"]
+
+
+def test_failed_classification_is_dropped_after_max_attempts(scheduler, monkeypatch):
+    monkeypatch.setattr(scheduler_module.settings, "JOURNAL_MAX_ATTEMPTS", 2)
+    classifier = FakeClassifier(failing_ids={"p1", "p2"})
+    scheduler.classifier = classifier
+    database = scheduler_module.db
+    
+    async def scenario():
+        await database.connect()
+        try:
+            await database.init_tables()
+            scheduler.journal.append([asdict(_post("p1")), asdict(_post("p2"))])
+            scheduler._journaled_ids.update({"p1": None, "p2": None})
+            
+            assert await scheduler._drain_journal() == 0
+            assert await scheduler._drain_journal() == 0
+            assert await scheduler._drain_journal() == 0
+            # 放弃重试的帖子不再阻止之后的采集重新写入日志
+            assert not scheduler._journaled_ids
+        finally:
+            await database.close()
+    
+    asyncio.run(scenario())
+    assert sorted(classifier.calls) == ["p1", "p1", "p2", "p2"]
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_run_once_against_simulator(tmp_path):
+    # README 中记载的 scheduler.py --once 对着替身服务完整跑一轮
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    simulator = subprocess.Popen(
+        [
+            sys.executable, "-m", "simulator", "--port", str(port), "--backlog", "10",
+            "--agents", "3", "--latency-ms", "0", "--latency-jitter-ms", "0",
+            "--llm-latency-ms", "0", "--llm-latency-jitter-ms", "0"
+        ],
+        cwd=BACKEND_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = time.monotonic() + 15
+        while True:
+            try:
+                httpx.get(f"{base}/_sim/stats", timeout=1)
+                break
+            except httpx.HTTPError:
+                assert time.monotonic() < deadline, "simulator did not start"
+                time.sleep(0.2)
+        
+        env = dict(
+            os.environ,
+            MOLTBOOK_BASE_URL=f"{base}/api/v1",
+            MOLTBOOK_API_KEY="sim",
+            AI_API_URL=f"{base}/v1/chat/completions",
+            AI_API_KEY="sim",
+            WECOM_ENABLED="false",
+            DB_PATH=str(tmp_path / "loadtest.db"),
+            LOGS_DIR=str(tmp_path / "logs"),
+            JOURNAL_DIR=str(tmp_path / "journal"),
+            HTTP_CACHE_DIR=str(tmp_path / "http_cache"),
+            ARCHIVE_DIR=str(tmp_path / "archive"),
+            BACKUP_DIR=str(tmp_path / "backups")
+        )
+        result = subprocess.run(
+            [sys.executable, "scheduler.py", "--once"],
+            cwd=BACKEND_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+            timeout=120
+        )
+    finally:
+        simulator.terminate()
+        simulator.wait(timeout=10)
+    
+    assert result.returncode == 0, result.stderr[-2000:]
+    assert "执行结果" in result.stdout
+    assert "'collected': 0," not in result.stdout
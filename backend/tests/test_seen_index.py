@@ -0,0 +1,17 @@
+"""
+已见帖子索引测试
+"""
+from storage.seen_index import SeenPostIndex
+
+
+def test_index_evicts_least_recently_seen():
+    index = SeenPostIndex(capacity=2)
+    index.update(["a", "b"])
+    assert "a" in index
+    
+    index.add("c")
+    
+    assert "a" in index
+    assert "b" not in index
+    assert "c" in index
+    assert len(index) == 2
@@ -23,7 +23,7 @@ export const dashboardApi = {
 
 // Feed API
 export const feedApi = {
-  getFeed: (params?: { page?: number; pageSize?: number; min_score?: number; submolt?: string; risk_level?: string }) =>
+  getFeed: (params?: { page?: number; pageSize?: number; min_score?: number; submolt?: string; risk_level?: string; cursor?: string }) =>
     api.get('/feed', { params }),
   getPost: (id: string) => api.get(`/posts/${id}`),
   getComments: (id: string) => api.get(`/posts/${id}/comments`)
@@ -40,7 +40,7 @@ export const networkApi = {
 
 // Agents API
 export const agentsApi = {
-  getAgents: (params?: { page?: number; page_size?: number; risk_level?: string; community_id?: number }) =>
+  getAgents: (params?: { page?: number; page_size?: number; risk_level?: string; community_id?: number; cursor?: string }) =>
     api.get('/agents', { params }),
   getAgent: (id: string) => api.get(`/agent/${id}`),
   getRiskyAgents: (params?: { limit?: number; min_conspiracy?: number }) =>